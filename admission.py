@@ -0,0 +1,121 @@
+# admission.py
+
+import time
+from collections import OrderedDict
+from log_config import get_logger
+from metrics import Counter
+
+logger = get_logger(__name__)
+
+SHED_MESSAGES = Counter('bot_shed_messages_total', 'Mensajes descartados antes de procesarse, por motivo '
+                        '(rate_limited, too_long, queue_full).', ('reason',))
+
+class AdmissionRejectedError(Exception):
+    """
+    Se lanza cuando un mensaje no se admite para procesarse.
+
+    Atributos:
+    - reason (str): 'rate_limited' si el chat superó su límite o 'too_long' si el mensaje es demasiado largo.
+    - notify (bool): Si conviene avisarle al usuario; en una ráfaga solo se avisa el primer rechazo de cada motivo.
+    """
+
+    def __init__(self, reason, message, notify=True):
+        super().__init__(message)
+        self.reason = reason
+        self.notify = notify
+
+class TokenBucket:
+    """
+    Clase TokenBucket, límite de frecuencia con ráfagas.
+
+    Se acumulan `rate` fichas por segundo hasta un máximo de `burst`; cada mensaje consume una.
+    """
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.warned = None  # motivo del último rechazo avisado desde el último mensaje admitido
+
+    def try_acquire(self, now):
+        """Consume una ficha si hay disponible. Retorna True si se pudo."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class AdmissionController:
+    """
+    Clase AdmissionController que decide si un mensaje entrante se procesa.
+
+    Va delante del QueryExecutor, que limita las consultas en ejecución y en espera para
+    todo el bot: aquí se rechazan, antes de corregir el texto o consultar el clima, los
+    mensajes demasiado largos y los de un chat que supera su límite de frecuencia, para
+    que un solo chat no pueda llenar la cola del resto.
+
+    Se usa desde el event loop, por lo que no necesita locks.
+    """
+
+    def __init__(self, rate=0.5, burst=5, max_message_chars=1000, max_chats=10000, clock=time.monotonic):
+        """
+        Inicializa una instancia de AdmissionController.
+
+        Parámetros:
+        - rate (float): Mensajes por segundo que se admiten de cada chat (0 = sin límite).
+        - burst (int): Mensajes seguidos que un chat puede enviar antes de que se aplique `rate`.
+        - max_message_chars (int): Largo máximo de un mensaje (0 = sin límite).
+        - max_chats (int): Chats de los que se recuerda el límite; se olvidan primero los inactivos.
+        - clock (callable): Fuente del tiempo en segundos, reemplazable para simular flujos de mensajes.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_message_chars = max_message_chars
+        self.max_chats = max(1, max_chats)
+        self.clock = clock
+        self._buckets = OrderedDict()
+
+    def admit(self, chat_id, texto):
+        """
+        Consume una ficha del límite de `chat_id` y comprueba el mensaje.
+
+        La ficha se consume aunque el mensaje sea demasiado largo, así que un chat que envía
+        mensajes largos sin parar también queda limitado. Solo el primer rechazo de cada
+        motivo después de un mensaje admitido lleva `notify=True`.
+
+        Lanza:
+        - AdmissionRejectedError: Si el mensaje no debe procesarse.
+        """
+        bucket = self._bucket(chat_id) if self.rate else None
+        if bucket is not None and not bucket.try_acquire(self.clock()):
+            self._reject(bucket, 'rate_limited', f'El chat {chat_id} superó {self.rate:g} mensajes/s.')
+        if self.max_message_chars and len(texto) > self.max_message_chars:
+            self._reject(bucket, 'too_long', f'Mensaje de {len(texto)} caracteres en el chat {chat_id}.')
+        if bucket is not None:
+            bucket.warned = None
+
+    def _bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst, self.clock())
+            if len(self._buckets) > self.max_chats:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(chat_id)
+        return bucket
+
+    def _reject(self, bucket, reason, message):
+        SHED_MESSAGES.inc(reason)
+        notify = bucket is None or bucket.warned != reason
+        if bucket is not None:
+            bucket.warned = reason
+        raise AdmissionRejectedError(reason, message, notify)
+
+    def retry_after(self, chat_id):
+        """Segundos hasta que `chat_id` vuelva a tener una ficha disponible."""
+        bucket = self._buckets.get(chat_id)
+        if bucket is None or not self.rate:
+            return 0.0
+        return max(0.0, (1 - bucket.tokens) / self.rate - (self.clock() - bucket.updated))
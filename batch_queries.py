@@ -0,0 +1,160 @@
+# batch_queries.py
+#
+# Procesa sin Telegram un archivo JSONL de mensajes, repartiéndolo entre varios procesos.
+# Cada línea de entrada es un objeto con el campo "text" (los demás campos se copian a la
+# salida) o directamente un string JSON. Cada línea de salida agrega "response", o
+# "analysis" con --parse-only, o "error" si el mensaje no se pudo procesar.
+# Uso: python batch_queries.py mensajes.jsonl -o respuestas.jsonl --workers 4 --parse-only
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from model.chatbot import ErrorResponse, WeatherChatbot
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+_worker_bot = None
+
+def _init_worker(bot_factory):
+    """Crea el chatbot de cada proceso worker una única vez."""
+    global _worker_bot
+    _worker_bot = bot_factory()
+
+def _process_chunk(texts, parse_only):
+    return process_chunk(_worker_bot, texts, parse_only)
+
+def process_chunk(bot, texts, parse_only=False):
+    """
+    Procesa un lote de mensajes con `bot.process_queries`. Si el lote falla se procesan
+    de a uno, para que un mensaje problemático no arrastre al resto.
+
+    Retorna:
+    - list: Respuesta o análisis de cada mensaje, o un dict {"error": ...} si falló.
+    """
+    try:
+        return bot.process_queries(texts, parse_only)
+    except Exception as e:
+        logger.error(f"Error al procesar un lote de {len(texts)} mensajes, se procesan de a uno: {e}")
+    results = []
+    for texto in texts:
+        try:
+            results.append(bot.process_queries([texto], parse_only)[0])
+        except Exception as e:
+            results.append({'error': str(e)})
+    return results
+
+def read_messages(lines):
+    """Convierte las líneas JSONL en registros (dict con 'text'), ignorando las vacías."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"Línea {number} ignorada, no es JSON válido: {e}")
+            continue
+        if isinstance(record, str):
+            record = {'text': record}
+        if not isinstance(record, dict) or not isinstance(record.get('text'), str):
+            logger.error(f"Línea {number} ignorada, falta el campo 'text'.")
+            continue
+        yield record
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def format_result(record, result, parse_only):
+    output = dict(record)
+    if isinstance(result, dict) and 'error' in result:
+        output['error'] = result['error']
+    elif isinstance(result, ErrorResponse):
+        output['error'] = str(result)
+    elif parse_only:
+        output['analysis'] = [
+            {'sentence': sentence, 'probability': probability, 'intent': intent, 'cities': list(cities)}
+            for sentence, probability, intent, cities in result
+        ]
+    else:
+        output['response'] = result
+    return output
+
+def process_stream(records, output, workers=1, parse_only=False, chunk_size=64, bot_factory=WeatherChatbot):
+    """
+    Procesa los registros por lotes y escribe cada resultado en `output` como JSONL, en el
+    mismo orden de entrada y a medida que están listos.
+
+    Parámetros:
+    - records (iterable): Registros con el campo 'text'.
+    - output (file): Archivo de texto donde se escriben los resultados.
+    - workers (int): Procesos a usar; con 1 se procesa en el proceso actual.
+    - parse_only (bool): Si es True solo se analiza el texto, sin consultar el clima.
+    - chunk_size (int): Mensajes por lote enviado a cada worker.
+    - bot_factory (callable): Construye el chatbot de cada worker.
+
+    Retorna:
+    - int: Cantidad de mensajes procesados.
+    """
+    count = 0
+
+    def write(chunk, results):
+        for record, result in zip(chunk, results):
+            output.write(json.dumps(format_result(record, result, parse_only), ensure_ascii=False) + '\n')
+        output.flush()
+        return len(chunk)
+
+    if workers <= 1:
+        bot = bot_factory()
+        for chunk in chunked(records, chunk_size):
+            count += write(chunk, process_chunk(bot, [record['text'] for record in chunk], parse_only))
+        return count
+
+    # Como mucho dos lotes en espera por worker: la entrada se lee a medida que avanza la salida.
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bot_factory,)) as pool:
+        for chunk in chunked(records, chunk_size):
+            pending.append((chunk, pool.submit(_process_chunk, [record['text'] for record in chunk], parse_only)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                count += write(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            count += write(chunk, future.result())
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description='Procesa en lote un archivo JSONL de mensajes.')
+    parser.add_argument('input', help="archivo JSONL de entrada ('-' para la entrada estándar)")
+    parser.add_argument('-o', '--output', default='-', help="archivo JSONL de salida ('-' para la salida estándar)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='procesos a usar')
+    parser.add_argument('--chunk-size', type=int, default=64, help='mensajes por lote')
+    parser.add_argument('--parse-only', action='store_true', help='solo corrección, intención y ciudades, sin consultar el clima')
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf8')
+    start = time.perf_counter()
+    try:
+        count = process_stream(read_messages(source), output, args.workers, args.parse_only, args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f'{count} mensajes procesados en {elapsed:.1f} s ({count / elapsed if elapsed else 0:.1f} mensajes/s) con {args.workers} workers.')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/gazetteer_benchmark.py
+#
+# Compara CityGazetteer con la búsqueda lineal anterior sobre una lista de nombres.
+# Uso (desde la raíz del proyecto): python -m benchmarks.gazetteer_benchmark
+
+import json
+import time
+from model.gazetteer import CityGazetteer
+
+CITY_FILE = 'model/names_of_cities.json'
+QUESTIONS_FILE = 'model/questions/temperature_response.json'
+
+def measure(label, function, items, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            function(item)
+    elapsed = time.perf_counter() - start
+    calls = len(items) * repeat
+    print(f"{label:<45} {calls:>7} llamadas  {elapsed * 1e6 / calls:>10.2f} µs/llamada")
+    return elapsed
+
+def main():
+    start = time.perf_counter()
+    gazetteer = CityGazetteer.from_json(CITY_FILE)
+    print(f"Carga del gazetteer: {time.perf_counter() - start:.2f} s ({len(gazetteer)} nombres)")
+    start = time.perf_counter()
+    gazetteer.contains_any('')
+    print(f"Construcción del autómata: {time.perf_counter() - start:.2f} s")
+
+    # Comportamiento anterior: lista deduplicada y recorrida en cada consulta.
+    city_list = list(gazetteer.names)
+
+    with open(QUESTIONS_FILE, 'r', encoding='utf8') as file:
+        contexts = [question.lower() for question in json.load(file)][:200]
+    lookups = [word for context in contexts for word in context.split()][:2000]
+
+    print()
+    old = measure('exacta: nombre in list', lambda name: name in city_list, lookups[:200])
+    new = measure('exacta: nombre in CityGazetteer', lambda name: name in gazetteer, lookups, repeat=100)
+    print(f"  aceleración: x{(old / 200) / (new / (len(lookups) * 100)):.0f}")
+
+    old = measure('contexto: any(city in context ...)', lambda context: any(city in context for city in city_list), contexts[:50])
+    new = measure('contexto: CityGazetteer.contains_any', gazetteer.contains_any, contexts, repeat=20)
+    print(f"  aceleración: x{(old / 50) / (new / (len(contexts) * 20)):.0f}")
+
+    mismatches = [context for context in contexts[:50]
+                  if any(city in context for city in city_list) != gazetteer.contains_any(context)]
+    print(f"\nResultados distintos entre ambas búsquedas: {len(mismatches)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/group_benchmark.py
+#
+# Compara pedir el clima de mensajes con varias ciudades por nombre (una petición por ciudad)
+# y por id en peticiones agrupadas al endpoint `group`, con la caché vacía, contra un
+# OpenWeatherMap local. Entre las dos pasadas se aprenden los ids de las respuestas por nombre.
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.group_benchmark --messages 100 --cities-per-message 5 --warm 200
+
+import argparse
+import asyncio
+import random
+import time
+from benchmarks.stats import summarize, print_table
+from benchmarks.stubs import FakeOpenWeatherMap
+from weather_package.async_client import AsyncWeatherClient
+from weather_package.weather_api import WeatherData
+from weather_package.city_ids import city_ids
+
+async def run_pass(client, server, messages, warm_cities, use_ids):
+    """Pide cada mensaje con la caché vacía y luego precarga `warm_cities`; devuelve tiempos y peticiones."""
+    latencies = []
+    requests_before = server.requests
+    for cities in messages:
+        WeatherData._cache.clear()
+        if not use_ids:
+            city_ids.clear()
+        start = time.perf_counter()
+        await client.fetch_many(cities)
+        latencies.append(time.perf_counter() - start)
+    message_requests = server.requests - requests_before
+
+    WeatherData._cache.clear()
+    if not use_ids:
+        city_ids.clear()
+    requests_before = server.requests
+    start = time.perf_counter()
+    await client.fetch_many(warm_cities)
+    warm_seconds = time.perf_counter() - start
+    return latencies, message_requests, warm_seconds, server.requests - requests_before
+
+async def run(args, server):
+    rng = random.Random(42)
+    names = [f'ciudad {index}' for index in range(args.warm)]
+    messages = [rng.sample(names, args.cities_per_message) for _ in range(args.messages)]
+    client = AsyncWeatherClient()
+    try:
+        by_name = await run_pass(client, server, messages, names, use_ids=False)
+        # La precarga de la primera pasada dejó aprendido el id de cada ciudad.
+        by_id = await run_pass(client, server, messages, names, use_ids=True)
+    finally:
+        await client.aclose()
+    return {'por nombre': by_name, 'por id (group)': by_id}
+
+def main():
+    parser = argparse.ArgumentParser(description='Peticiones por nombre o agrupadas por id a OpenWeatherMap.')
+    parser.add_argument('--messages', type=int, default=100, help='mensajes con varias ciudades')
+    parser.add_argument('--cities-per-message', type=int, default=5, help='ciudades por mensaje')
+    parser.add_argument('--warm', type=int, default=200, help='ciudades de la precarga de la caché')
+    parser.add_argument('--owm-latency', type=float, default=50, help='latencia simulada de OpenWeatherMap en ms')
+    args = parser.parse_args()
+
+    with FakeOpenWeatherMap(latency=args.owm_latency / 1000) as server:
+        results = asyncio.run(run(args, server))
+
+    print_table({name: summarize(latencies) for name, (latencies, _, _, _) in results.items()},
+                f'Mensajes con {args.cities_per_message} ciudades, caché vacía')
+    for name, (_, message_requests, warm_seconds, warm_requests) in results.items():
+        print(f'{name}: {message_requests} peticiones para {args.messages} mensajes; '
+              f'precarga de {args.warm} ciudades en {warm_seconds * 1000:.0f} ms con {warm_requests} peticiones')
+
+if __name__ == "__main__":
+    main()
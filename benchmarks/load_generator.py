@@ -0,0 +1,214 @@
+# benchmarks/load_generator.py
+#
+# Prueba de carga de WeatherChatbot: genera mensajes realistas (plantillas de model/questions
+# con ciudades de model/names_of_cities.json elegidas con una distribución de Zipf, con varias
+# oraciones y varias ciudades por mensaje) y los envía al pool de consultas del bot a un ritmo
+# fijo, sin esperar las respuestas (lazo abierto), contra OpenWeatherMap y LanguageTool locales.
+# La latencia se mide desde el instante en que el mensaje debía llegar, así que la espera en
+# cola cuenta. Con varios valores de --qps se prueban de menor a mayor para ver dónde se satura.
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.load_generator --qps 5 10 20 40 --duration 20
+#     python -m benchmarks.load_generator --qps 50 --mode fork --workers 4 --skew 1.3 --show 5
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from benchmarks.stats import summarize
+from benchmarks.stubs import FakeOpenWeatherMap, install_fake_language_tool
+
+CITY_SPAN = re.compile(r"[A-ZÁÉÍÓÚÑ][\w'’.-]*(?:\s+(?:de\s+|del\s+|la\s+|los\s+|las\s+)?[A-ZÁÉÍÓÚÑ][\w'’.-]*)*")
+LATIN_NAME = re.compile(r"^[A-Za-zÁÉÍÓÚÑÜáéíóúñüÀ-ÿ' .-]+$")
+
+def extract_templates(questions, gazetteer):
+    """
+    Convierte preguntas del corpus en plantillas reemplazando su única ciudad por '{city}'.
+    Se descartan las preguntas sin ciudad reconocible o con más de una.
+    """
+    templates = []
+    for question in questions:
+        spans = [match for match in CITY_SPAN.finditer(question) if match.group().lower() in gazetteer]
+        if len(spans) == 1:
+            span = spans[0]
+            templates.append(question[:span.start()] + '{city}' + question[span.end():])
+    return templates
+
+def load_cities(file_name, limit=None, seed=42):
+    """Nombres principales de las ciudades en alfabeto latino, en un orden de popularidad aleatorio pero fijo."""
+    with open(file_name, encoding='utf8') as file:
+        names = [city[0] for city in json.load(file) if isinstance(city[0], str) and LATIN_NAME.match(city[0])]
+    names = list(dict.fromkeys(names))
+    random.Random(seed).shuffle(names)
+    return names[:limit] if limit else names
+
+class MessageSynthesizer:
+    """
+    Clase MessageSynthesizer que genera mensajes de usuario sintéticos.
+
+    Cada mensaje tiene una oración y, con probabilidad `multi_sentence`, de 2 a `max_sentences`.
+    Cada oración es una plantilla con una ciudad o, con probabilidad `multi_city`, de 2 a
+    `max_cities` unidas con 'y'. La ciudad de rango r se elige con probabilidad proporcional
+    a 1 / r ** skew.
+    """
+
+    def __init__(self, templates, cities, skew=1.1, multi_sentence=0.2, multi_city=0.15,
+                 max_sentences=3, max_cities=3, seed=42):
+        self.templates = templates
+        self.cities = cities
+        self.multi_sentence = multi_sentence
+        self.multi_city = multi_city
+        self.max_sentences = max_sentences
+        self.max_cities = max_cities
+        self._rng = random.Random(seed)
+        weights = [1 / rank ** skew for rank in range(1, len(cities) + 1)]
+        total = sum(weights)
+        self._cumulative = []
+        accumulated = 0.0
+        for weight in weights:
+            accumulated += weight / total
+            self._cumulative.append(accumulated)
+
+    def city(self):
+        return self._rng.choices(self.cities, cum_weights=self._cumulative)[0]
+
+    def sentence(self):
+        template = self._rng.choice(self.templates)
+        if self._rng.random() < self.multi_city:
+            cities = list(dict.fromkeys(self.city() for _ in range(self._rng.randint(2, self.max_cities))))
+            places = ', '.join(cities[:-1]) + ' y ' + cities[-1] if len(cities) > 1 else cities[0]
+        else:
+            places = self.city()
+        return template.replace('{city}', places)
+
+    def message(self):
+        count = self._rng.randint(2, self.max_sentences) if self._rng.random() < self.multi_sentence else 1
+        return ' '.join(self.sentence() for _ in range(count))
+
+async def run_step(executor, synthesizer, qps, duration, arrivals_rng, poisson):
+    """
+    Envía mensajes durante `duration` segundos a `qps` por segundo y espera a que terminen.
+    Las latencias son solo las de las respuestas correctas; los errores se cuentan aparte.
+    """
+    from model.chatbot import ErrorResponse
+    from query_executor import ExecutorBusyError
+
+    latencies = []
+    counts = {'sent': 0, 'rejected': 0, 'errors': 0}
+
+    async def send(text, scheduled):
+        try:
+            response = await executor.submit(text)
+        except ExecutorBusyError:
+            counts['rejected'] += 1
+            return
+        except Exception:
+            counts['errors'] += 1
+            return
+        if isinstance(response, ErrorResponse):
+            counts['errors'] += 1
+            return
+        latencies.append(time.perf_counter() - scheduled)
+
+    tasks = []
+    start = time.perf_counter()
+    scheduled = start
+    while scheduled < start + duration:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(send(synthesizer.message(), scheduled)))
+        counts['sent'] += 1
+        scheduled += arrivals_rng.expovariate(qps) if poisson else 1 / qps
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed), counts, elapsed
+
+async def run_steps(executor, synthesizer, server, args):
+    """Ejecuta una etapa por cada valor de --qps en el mismo event loop, que es al que queda ligado el pool."""
+    arrivals_rng = random.Random(args.seed)
+    rows = []
+    for qps in args.qps:
+        before, requests_before = cache_snapshot(executor), server.requests
+        summary, counts, _ = await run_step(executor, synthesizer, qps, args.duration, arrivals_rng, args.poisson)
+        rows.append((qps, summary, counts, server.requests - requests_before, hit_rates(before, cache_snapshot(executor))))
+    return rows
+
+def cache_snapshot(executor):
+    """Aciertos y consultas de las cachés del proceso; None si el bot corre en otros procesos."""
+    from weather_package.weather_api import WeatherData
+    bot = executor.bot
+    if bot is None:
+        return None
+    weather = WeatherData.cache_stats()
+    parse = bot.parse_cache_stats()
+    correction = bot.corrector.stats()
+    return {
+        'clima': (weather['hits'], weather['hits'] + weather['misses']),
+        'análisis': (parse.get('hits', 0), parse.get('hits', 0) + parse.get('misses', 0)),
+        # Correcciones resueltas sin llamar a LanguageTool (caché o vocabulario conocido).
+        'corrección': (correction['cache_hits'] + correction['fast_path'],
+                       correction['cache_hits'] + correction['fast_path'] + correction['corrections']),
+    }
+
+def hit_rates(before, after):
+    if before is None or after is None:
+        return 'n/d (el bot corre en otros procesos)'
+    rates = []
+    for name in after:
+        hits = after[name][0] - before[name][0]
+        lookups = after[name][1] - before[name][1]
+        rates.append(f'{name} {hits / lookups:.0%}' if lookups else f'{name} -')
+    return ', '.join(rates)
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de WeatherChatbot a un ritmo fijo, sin conexión.')
+    parser.add_argument('--qps', type=float, nargs='+', default=[5, 10, 20], help='mensajes por segundo de cada etapa')
+    parser.add_argument('--duration', type=float, default=20, help='segundos de cada etapa')
+    parser.add_argument('--poisson', action='store_true', help='llegadas de Poisson en lugar de equiespaciadas')
+    parser.add_argument('--skew', type=float, default=1.1, help='exponente de Zipf de la popularidad de las ciudades')
+    parser.add_argument('--cities', type=int, default=5000, help='ciudades distintas que se pueden pedir (0 = todas)')
+    parser.add_argument('--multi-sentence', type=float, default=0.2, help='proporción de mensajes con varias oraciones')
+    parser.add_argument('--multi-city', type=float, default=0.15, help='proporción de oraciones con varias ciudades')
+    parser.add_argument('--mode', default='thread', choices=('thread', 'process', 'fork'), help='modo del pool de consultas')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='workers del pool')
+    parser.add_argument('--max-queue', type=int, default=1000, help='consultas en espera antes de rechazar')
+    parser.add_argument('--owm-latency', type=float, default=50, help='latencia simulada de OpenWeatherMap en ms')
+    parser.add_argument('--languagetool-latency', type=float, default=30, help='latencia simulada de LanguageTool en ms')
+    parser.add_argument('--show', type=int, default=0, help='mostrar algunos mensajes generados')
+    parser.add_argument('--seed', type=int, default=42, help='semilla de los mensajes y las llegadas')
+    parser.add_argument('--bundle', help='bundle de inferencia a usar en lugar de WeatherChatbot.BUNDLE_PATH')
+    args = parser.parse_args()
+
+    install_fake_language_tool(args.languagetool_latency / 1000)
+    from model.chatbot import WeatherChatbot
+    from model.gazetteer import CityGazetteer
+    from model.preparation_data import load_data, files_questions
+    from query_executor import QueryExecutor
+    if args.bundle:
+        WeatherChatbot.BUNDLE_PATH = args.bundle
+
+    gazetteer = CityGazetteer.load(WeatherChatbot.CITY_FILE, WeatherChatbot.CITY_COMPILED_FILE)
+    questions = [question for file_name in files_questions.values() for question in load_data(file_name)]
+    templates = extract_templates(questions, gazetteer)
+    cities = load_cities(WeatherChatbot.CITY_FILE, args.cities or None, args.seed)
+    synthesizer = MessageSynthesizer(templates, cities, args.skew, args.multi_sentence, args.multi_city, seed=args.seed)
+    print(f'{len(templates)} plantillas de {len(questions)} preguntas, {len(cities)} ciudades (Zipf {args.skew:g})')
+    for _ in range(args.show):
+        print(f'  {synthesizer.message()}')
+
+    with FakeOpenWeatherMap(latency=args.owm_latency / 1000) as server:
+        executor = QueryExecutor(WeatherChatbot, mode=args.mode, workers=args.workers, max_queue=args.max_queue)
+        try:
+            rows = asyncio.run(run_steps(executor, synthesizer, server, args))
+        finally:
+            executor.shutdown()
+
+    print(f"\nCarga en lazo abierto ({args.mode} x{args.workers}, {args.duration:g} s por etapa)")
+    print(f"{'qps':>7} {'enviados':>9} {'resp/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rechaz.':>8} {'errores':>8} {'OWM':>6}  aciertos de caché")
+    for qps, summary, counts, upstream, rates in rows:
+        print(f"{qps:>7g} {counts['sent']:>9} {summary['throughput']:>8.1f} {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} "
+              f"{summary['p99_ms']:>9.1f} {counts['rejected']:>8} {counts['errors']:>8} {upstream:>6}  {rates}")
+
+if __name__ == "__main__":
+    main()
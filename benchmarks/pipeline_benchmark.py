@@ -0,0 +1,116 @@
+# benchmarks/pipeline_benchmark.py
+#
+# Mide la latencia de cada etapa de WeatherChatbot.process_query sin conexión,
+# usando las preguntas de model/questions como carga, un OpenWeatherMap local
+# y un LanguageTool simulado.
+# Uso (desde la raíz del proyecto): python -m benchmarks.pipeline_benchmark --limit 300
+
+import argparse
+import random
+import time
+from benchmarks.stats import summarize, print_table
+from benchmarks.stubs import FakeOpenWeatherMap, install_fake_language_tool
+
+STAGES = ('correction', 'sentence_split', 'intent', 'city_extraction', 'weather_fetch', 'rendering', 'total')
+
+def load_questions(limit=None, seed=42):
+    from model.preparation_data import load_data, files_questions
+    questions = [question for file_name in files_questions.values() for question in load_data(file_name)]
+    random.Random(seed).shuffle(questions)
+    return questions[:limit] if limit else questions
+
+def run_stages(bot, question, cold_weather):
+    """Ejecuta las etapas de process_query por separado y devuelve la duración de cada una."""
+    from weather_package import WeatherSnapshot, fetch_many_sync
+    from weather_package.weather_api import WeatherData
+
+    timings = {}
+    start = time.perf_counter()
+    corrected = bot.correct_text(question, 100)
+    timings['correction'] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    sentences = list(bot.nlp(corrected).sents)
+    timings['sentence_split'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    intents = bot.classify_intents(sentences)
+    timings['intent'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    cities = [bot.classify_city(sentence) for sentence in sentences]
+    timings['city_extraction'] = time.perf_counter() - mark
+
+    requested = [city for (probability, _), found in zip(intents, cities) if probability >= .5 for city in found]
+    if requested:
+        if cold_weather:
+            WeatherData._cache.clear()
+        mark = time.perf_counter()
+        weather_by_city = fetch_many_sync(requested)
+        timings['weather_fetch'] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        for (probability, intent), found in zip(intents, cities):
+            if probability >= .5:
+                for city in found:
+                    getattr(WeatherSnapshot(weather_by_city[city]), intent)
+        timings['rendering'] = time.perf_counter() - mark
+
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia por etapa de process_query sin conexión.')
+    parser.add_argument('--limit', type=int, default=300, help='cantidad de preguntas (0 = todas)')
+    parser.add_argument('--owm-latency', type=float, default=20, help='latencia simulada de OpenWeatherMap en ms')
+    parser.add_argument('--languagetool-latency', type=float, default=30, help='latencia simulada de LanguageTool en ms')
+    parser.add_argument('--warm', action='store_true', help='no vaciar la caché del clima entre mensajes')
+    parser.add_argument('--no-fast-path', action='store_true',
+                        help='consultar siempre LanguageTool (las preguntas del corpus forman el vocabulario conocido)')
+    parser.add_argument('--bundle', help='bundle de inferencia a usar en lugar de WeatherChatbot.BUNDLE_PATH')
+    args = parser.parse_args()
+
+    install_fake_language_tool(args.languagetool_latency / 1000)
+    from model.chatbot import WeatherChatbot
+    from weather_package.weather_api import WeatherData
+    if args.bundle:
+        WeatherChatbot.BUNDLE_PATH = args.bundle
+
+    questions = load_questions(args.limit or None)
+    with FakeOpenWeatherMap(latency=args.owm_latency / 1000) as server:
+        bot = WeatherChatbot()
+        if args.no_fast_path:
+            bot.corrector.vocabulary = frozenset()
+        bot.warm_up()  # como QueryExecutor antes de atender consultas: autómata de ciudades, tabla lunar
+        requests_before = server.requests
+
+        samples = {stage: [] for stage in STAGES}
+        for question in questions:
+            for stage, seconds in run_stages(bot, question, not args.warm).items():
+                samples[stage].append(seconds)
+        print_table({stage: summarize(samples[stage]) for stage in STAGES},
+                    f"Etapas de process_query ({len(questions)} preguntas, {server.requests - requests_before} peticiones a OWM)")
+
+        # Las etapas anteriores no pasan por parse_query y vacían la caché del clima, así que
+        # antes de la pasada de extremo a extremo se cargan todas las cachés con las mismas preguntas.
+        for question in questions:
+            bot.process_query(question)
+        parse_before, weather_before = bot.parse_cache_stats(), WeatherData.cache_stats()
+        requests_before = server.requests
+
+        durations = []
+        start = time.perf_counter()
+        for question in questions:
+            mark = time.perf_counter()
+            bot.process_query(question)
+            durations.append(time.perf_counter() - mark)
+        print()
+        print_table({'process_query': summarize(durations, time.perf_counter() - start)}, 'process_query con cachés cargadas')
+        parse, weather = bot.parse_cache_stats(), WeatherData.cache_stats()
+        print(f"\nAciertos en la pasada con cachés cargadas: análisis {parse.get('hits', 0) - parse_before.get('hits', 0)} "
+              f"de {len(questions)}, clima {weather['hits'] - weather_before['hits']}, "
+              f"{server.requests - requests_before} peticiones a OWM")
+        print(f"Corrección: {bot.corrector.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/refresh_benchmark.py
+#
+# Mide cuántas consultas al clima esperan a OpenWeatherMap con y sin la renovación anticipada
+# de la caché (RefreshAheadScheduler). Para no esperar una hora se usa un TTL de pocos segundos
+# y las ciudades se piden con una distribución de Zipf, como en el tráfico real.
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.refresh_benchmark --seconds 20 --ttl 3 --qps 50
+
+import argparse
+import asyncio
+import random
+import time
+from benchmarks.stats import summarize, print_table
+from benchmarks.stubs import FakeOpenWeatherMap
+from weather_package.async_client import AsyncWeatherClient
+from weather_package.cache import TTLCache, weather_cache_key
+from weather_package.refresh import CityPopularity, RefreshAheadScheduler
+from weather_package.weather_api import WeatherData
+from weather_package import refresh, async_client, weather_api
+
+def zipf_cities(count, skew, seed=42):
+    """Generador infinito de nombres de ciudad con frecuencia proporcional a 1 / rango ** skew."""
+    rng = random.Random(seed)
+    cities = [f'ciudad {rank}' for rank in range(1, count + 1)]
+    weights = [1 / rank ** skew for rank in range(1, count + 1)]
+    while True:
+        yield from rng.choices(cities, weights, k=256)
+
+async def run_once(args, refresh_ahead, upstream):
+    # Cada corrida empieza con la caché y los contadores de popularidad vacíos.
+    WeatherData._cache = TTLCache(maxsize=args.cities, ttl=args.ttl)
+    tracker = CityPopularity(half_life=args.ttl)
+    for module in (refresh, async_client, weather_api):
+        module.popularity = tracker
+    client = AsyncWeatherClient()
+    scheduler = None
+    if refresh_ahead:
+        scheduler = RefreshAheadScheduler(client, WeatherData._cache, tracker, top_n=args.top_n,
+                                          margin=args.ttl * 0.2, budget=args.budget, interval=args.ttl * 0.05)
+        scheduler.start()
+
+    hot = {weather_cache_key(f'ciudad {rank}') for rank in range(1, args.top_n + 1)}
+    latencies = {'todas': [], 'populares': []}
+    hot_misses = 0
+    seen = set()
+    upstream_before = upstream.requests
+    cities = zipf_cities(args.cities, args.skew)
+
+    async def ask(city):
+        nonlocal hot_misses
+        key = weather_cache_key(city)
+        age = WeatherData._cache.age(key)
+        cached = age is not None and age < args.ttl
+        start = time.perf_counter()
+        await client.fetch(city)
+        elapsed = time.perf_counter() - start
+        latencies['todas'].append(elapsed)
+        if key in hot:
+            latencies['populares'].append(elapsed)
+            # La primera consulta de cada ciudad siempre espera a la API; no se cuenta.
+            hot_misses += not cached and key in seen
+            seen.add(key)
+
+    start = time.perf_counter()
+    tasks = []
+    for index in range(int(args.seconds * args.qps)):
+        await asyncio.sleep(max(0.0, start + index / args.qps - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(ask(next(cities))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if scheduler is not None:
+        scheduler.stop()
+    await client.aclose()
+    return {
+        'summaries': {name: summarize(samples, elapsed) for name, samples in latencies.items()},
+        'hot_requests': len(latencies['populares']),
+        'hot_misses': hot_misses,
+        'upstream': upstream.requests - upstream_before,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Aciertos de caché con y sin renovación anticipada.')
+    parser.add_argument('--seconds', type=float, default=20, help='duración de cada corrida')
+    parser.add_argument('--qps', type=float, default=50, help='consultas por segundo')
+    parser.add_argument('--cities', type=int, default=200, help='ciudades distintas')
+    parser.add_argument('--skew', type=float, default=1.1, help='exponente de la distribución de Zipf')
+    parser.add_argument('--ttl', type=float, default=3, help='segundos de validez de la caché')
+    parser.add_argument('--top-n', type=int, default=10, help='ciudades populares a mantener renovadas')
+    parser.add_argument('--budget', type=int, default=600, help='peticiones por minuto para renovar')
+    parser.add_argument('--owm-latency', type=float, default=50, help='latencia simulada de OpenWeatherMap en ms')
+    args = parser.parse_args()
+
+    results = {}
+    with FakeOpenWeatherMap(latency=args.owm_latency / 1000) as upstream:
+        for refresh_ahead in (False, True):
+            name = 'con renovación' if refresh_ahead else 'sin renovación'
+            results[name] = asyncio.run(run_once(args, refresh_ahead, upstream))
+
+    print_table({f'{name}: {group}': summary for name, result in results.items()
+                 for group, summary in result['summaries'].items()},
+                f'Consultas al clima (TTL {args.ttl:g} s, {args.top_n} ciudades populares)')
+    for name, result in results.items():
+        print(f"{name}: {result['hot_misses']} de {result['hot_requests']} consultas a ciudades populares "
+              f"esperaron a la API (sin contar la primera de cada una); {result['upstream']} peticiones a la API en total")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# benchmarks/stats.py
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+def summarize(samples, elapsed=None):
+    """p50/p95/p99 en milisegundos y operaciones por segundo de una lista de duraciones en segundos."""
+    ordered = sorted(samples)
+    total = elapsed if elapsed is not None else sum(ordered)
+    return {
+        'count': len(ordered),
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p95_ms': percentile(ordered, 0.95) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'throughput': len(ordered) / total if total else 0.0,
+    }
+
+def print_table(rows, title=None):
+    """Imprime {nombre: summarize(...)} como tabla."""
+    if title:
+        print(title)
+    print(f"{'etapa':<22} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, row in rows.items():
+        print(f"{name:<22} {row['count']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['throughput']:>10.1f}")
@@ -0,0 +1,365 @@
+# benchmarks/stubs.py
+#
+# Sustitutos locales de los servicios externos para medir el bot sin conexión.
+
+import json
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import requests
+import language_tool_python
+from weather_package.config import Config
+from weather_package.city_ids import city_ids
+
+# Coordenadas reales para que TimezoneFinder siempre encuentre una zona horaria.
+LOCATIONS = [
+    (40.4165, -3.7026, 'ES'), (-34.6132, -58.3772, 'AR'), (19.4285, -99.1277, 'MX'),
+    (4.6097, -74.0817, 'CO'), (-33.4569, -70.6483, 'CL'), (35.6895, 139.6917, 'JP'),
+    (48.8534, 2.3488, 'FR'), (-38.9516, -68.0591, 'AR'), (41.3888, 2.159, 'ES'), (-12.0432, -77.0282, 'PE'),
+]
+
+class _LocalServer(ThreadingHTTPServer):
+    # Con la cola por defecto (5) las conexiones simultáneas que no entran esperan un
+    # reintento de SYN de un segundo, que no tiene nada que ver con lo que se mide.
+    request_queue_size = 128
+
+def fake_weather(city):
+    """Respuesta de OpenWeatherMap determinista para `city`."""
+    seed = zlib.crc32(city.encode('utf8'))
+    lat, lon, country = LOCATIONS[seed % len(LOCATIONS)]
+    temp = round(-5 + (seed % 400) / 10, 2)
+    now = int(time.time())
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": 800, "main": "Clear", "description": "cielo claro", "icon": "01d" if seed % 2 else "04n"}],
+        "base": "stations",
+        "main": {"temp": temp, "feels_like": temp - 1, "temp_min": temp - 2, "temp_max": temp + 3,
+                 "pressure": 1000 + seed % 30, "humidity": seed % 100},
+        "visibility": 10000,
+        "wind": {"speed": (seed % 120) / 10, "deg": seed % 360},
+        "clouds": {"all": seed % 100},
+        "dt": now,
+        "sys": {"type": 2, "id": seed % 100000, "country": country, "sunrise": now - 6 * 3600, "sunset": now + 6 * 3600},
+        "timezone": 3600,
+        "id": seed % 10000000,
+        "name": city.title(),
+        "cod": 200,
+    }
+
+class FakeOpenWeatherMap:
+    """
+    Servidor HTTP local que imita los endpoints /data/2.5/weather (por nombre, `q=`) y
+    /data/2.5/group (hasta 20 ids, `id=1,2,3`) de OpenWeatherMap. El endpoint `group` solo
+    conoce los ids que ya devolvió una búsqueda por nombre, como pasaría con un id aprendido.
+
+    Mientras el servidor está activo el índice de ids de ciudades empieza vacío y no se
+    guarda en disco, para no mezclar ids simulados con los reales.
+
+    Uso:
+        with FakeOpenWeatherMap(latency=0.05) as server:
+            ...  # Config.OW_URL y Config.OW_GROUP_URL apuntan al servidor mientras dure el bloque
+    """
+    GROUP_LIMIT = 20
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.requests = 0
+        self.group_requests = 0
+        self.cities_by_id = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    server.group_requests += self.path.startswith('/data/2.5/group')
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.handle(urlparse(self.path))
+                payload = json.dumps(body).encode('utf8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _LocalServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+        self._previous_urls = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/data/2.5/weather?"
+
+    @property
+    def group_url(self):
+        return self.url.replace('/weather?', '/group?')
+
+    def handle(self, url):
+        query = parse_qs(url.query)
+        if url.path.endswith('/group'):
+            return self.handle_group(query)
+        city = query.get('q', [''])[0]
+        if not city:
+            return 400, {"cod": "400", "message": "Nothing to geocode"}
+        data = fake_weather(city)
+        with self._lock:
+            self.cities_by_id[data['id']] = city
+        return 200, data
+
+    def handle_group(self, query):
+        ids = [city_id for city_id in query.get('id', [''])[0].split(',') if city_id]
+        if not ids:
+            return 400, {"cod": "400", "message": "Nothing to geocode"}
+        if len(ids) > self.GROUP_LIMIT:
+            return 400, {"cod": "400", "message": "too many id"}
+        items = []
+        for city_id in ids:
+            city = self.cities_by_id.get(int(city_id))
+            if city is not None:
+                # Como la API real, `group` trae la zona horaria dentro de `sys`.
+                data = fake_weather(city)
+                data['sys']['timezone'] = data.pop('timezone')
+                items.append(data)
+        return 200, {"cnt": len(items), "list": items}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._previous_urls = (Config.OW_URL, Config.OW_GROUP_URL)
+        Config.OW_URL = self.url
+        Config.OW_GROUP_URL = self.group_url
+        city_ids.path = None
+        city_ids.clear()
+        return self
+
+    def stop(self):
+        Config.OW_URL, Config.OW_GROUP_URL = self._previous_urls
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class FakeTelegramBotAPI:
+    """
+    Servidor HTTP local que imita la Bot API de Telegram lo suficiente para python-telegram-bot:
+    getMe, getUpdates (con espera larga), sendMessage, deleteWebhook, setWebhook y close.
+
+    Los mensajes de usuarios se agregan con `push_message` y las respuestas del bot quedan en
+    `replies` como (chat_id, texto, instante). Si el bot registró un webhook, cada mensaje se
+    le envía por POST (con hasta `max_connections` peticiones simultáneas, como Telegram) en
+    lugar de esperar a getUpdates.
+
+    Uso:
+        with FakeTelegramBotAPI() as telegram:
+            Application.builder().token('123:abc').base_url(telegram.base_url)...
+    """
+    BOT_USER = {"id": 1, "is_bot": True, "first_name": "Clima", "username": "clima_test_bot",
+                "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.updates = deque()
+        self.replies = []
+        self.pushed_at = {}
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.webhook_failures = 0
+        self._delivery = None
+        self._session = None
+        self._next_update_id = 1
+        self._condition = threading.Condition()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf8') if length else ''
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params = json.loads(body or '{}')
+                else:
+                    params = {key: values[0] for key, values in parse_qs(body).items()}
+                method = self.path.rstrip('/').rsplit('/', 1)[-1]
+                result = api.handle(method, params)
+                if result is None:
+                    payload = json.dumps({"ok": False, "error_code": 404, "description": "Not Found"}).encode('utf8')
+                    self.send_response(404)
+                else:
+                    payload = json.dumps({"ok": True, "result": result}).encode('utf8')
+                    self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _LocalServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def handle(self, method, params):
+        if method == 'getMe':
+            return self.BOT_USER
+        if method == 'getUpdates':
+            return self._get_updates(int(params.get('offset') or 0), float(params.get('timeout') or 0),
+                                     int(params.get('limit') or 100))
+        if method == 'sendMessage':
+            chat_id = int(params['chat_id'])
+            with self._condition:
+                self.replies.append((chat_id, params.get('text', ''), time.perf_counter()))
+                self._condition.notify_all()
+            return {"message_id": len(self.replies), "date": int(time.time()), "from": self.BOT_USER,
+                    "chat": {"id": chat_id, "type": "private"}, "text": params.get('text', '')}
+        if method == 'setWebhook':
+            max_connections = int(params.get('max_connections') or 40)
+            self._session = requests.Session()
+            self._session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=max_connections))
+            self._delivery = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='webhook')
+            self.webhook_secret = params.get('secret_token')
+            self.webhook_url = params.get('url')
+            return True
+        if method in ('deleteWebhook', 'close', 'logOut'):
+            self.webhook_url = None
+            return True
+        if method == 'getWebhookInfo':
+            return {"url": self.webhook_url or '', "has_custom_certificate": False, "pending_update_count": len(self.updates)}
+        return None
+
+    def _get_updates(self, offset, timeout, limit):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.updates and self.updates[0]['update_id'] < offset:
+                self.updates.popleft()
+            while not self.updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._condition.wait(remaining)
+            return list(self.updates)[:limit]
+
+    def make_update(self, chat_id, text):
+        with self._condition:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+        user = {"id": chat_id, "is_bot": False, "first_name": "Usuario"}
+        return {"update_id": update_id, "message": {
+            "message_id": update_id, "date": int(time.time()), "text": text, "from": user,
+            "chat": {"id": chat_id, "type": "private", "first_name": "Usuario"}}}
+
+    def push_message(self, chat_id, text):
+        """Simula que el usuario `chat_id` le escribe `text` al bot."""
+        update = self.make_update(chat_id, text)
+        self.pushed_at.setdefault(chat_id, []).append(time.perf_counter())
+        if self.webhook_url:
+            self._delivery.submit(self._deliver, self.webhook_url, update)
+            return update
+        with self._condition:
+            self.updates.append(update)
+            self._condition.notify_all()
+        return update
+
+    def _deliver(self, url, update):
+        headers = {'X-Telegram-Bot-Api-Secret-Token': self.webhook_secret} if self.webhook_secret else {}
+        try:
+            self._session.post(url, json=update, headers=headers, timeout=10).raise_for_status()
+        except requests.RequestException:
+            with self._condition:
+                self.webhook_failures += 1
+
+    def _reply_count(self, chats=None):
+        if chats is None:
+            return len(self.replies)
+        return sum(chat_id in chats for chat_id, _, _ in self.replies)
+
+    def wait_for_replies(self, count, timeout=60.0, chats=None):
+        """
+        Espera a que el bot haya enviado `count` respuestas (solo a `chats`, si se indica);
+        devuelve True si llegaron a tiempo.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._reply_count(chats) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def latencies(self, chats=None):
+        """
+        Segundos entre cada mensaje y la respuesta a ese chat, en orden de llegada por chat.
+        Solo tiene sentido en los chats a los que el bot responde cada mensaje (ver `chats`).
+        """
+        replies_by_chat = {}
+        for chat_id, _, replied_at in self.replies:
+            replies_by_chat.setdefault(chat_id, []).append(replied_at)
+        return [replied - pushed for chat_id, pushed_times in self.pushed_at.items() if chats is None or chat_id in chats
+                for pushed, replied in zip(pushed_times, replies_by_chat.get(chat_id, []))]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._condition.notify_all()
+        if self._delivery is not None:
+            self._delivery.shutdown(wait=False)
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class FakeLanguageTool:
+    """LanguageTool sin servidor Java: no encuentra errores y simula la latencia de cada consulta."""
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.checks = 0
+
+    def check(self, text):
+        self.checks += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return []
+
+    def close(self):
+        pass
+
+def install_fake_language_tool(latency=0.0):
+    """Reemplaza language_tool_python.LanguageTool; debe llamarse antes de crear WeatherChatbot."""
+    FakeLanguageTool.latency = latency
+    language_tool_python.LanguageTool = FakeLanguageTool
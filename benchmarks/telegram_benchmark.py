@@ -0,0 +1,164 @@
+# benchmarks/telegram_benchmark.py
+#
+# Ejecuta el bot completo (main.py) contra una Bot API de Telegram local, con OpenWeatherMap
+# y LanguageTool simulados, y mide la latencia de cada mensaje hasta su respuesta.
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.telegram_benchmark --messages 200 --mode fork --workers 4
+#     python -m benchmarks.telegram_benchmark --transport polling webhook --rate 50
+#     python -m benchmarks.telegram_benchmark --mode fork --kill-worker   # prueba el reinicio de workers
+#     python -m benchmarks.telegram_benchmark --rate 10 --flood-rate 20 --chat-rate 0.5   # un chat inunda al bot
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import signal
+import socket
+import time
+from benchmarks.stats import summarize, print_table
+from benchmarks.stubs import FakeOpenWeatherMap, FakeTelegramBotAPI, install_fake_language_tool
+from benchmarks.pipeline_benchmark import load_questions
+from bot_config import BotConfig
+from metrics import registry
+
+FLOOD_CHAT = 999
+FLOOD_CITIES = ('Madrid', 'Lima', 'Quito', 'Bogotá', 'Caracas', 'Santiago', 'Montevideo', 'Asunción',
+                'La Paz', 'Roma', 'París', 'Londres')
+
+def flood_message(index):
+    """Mensaje largo con muchas oraciones y ciudades, distinto en cada envío para no aprovechar las cachés."""
+    cities = random.Random(index).sample(FLOOD_CITIES, len(FLOOD_CITIES))
+    return ' '.join(f'¿Cómo está el clima en {city}? ¿Y la temperatura en {city}?' for city in cities)
+
+def kill_one_worker(executor):
+    """Mata con SIGKILL un worker del pool en modo 'fork' y devuelve su pid."""
+    pid = executor.worker_pids()[0]
+    os.kill(pid, signal.SIGKILL)
+    return pid
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def shed_counts():
+    from admission import SHED_MESSAGES
+    return {reason: SHED_MESSAGES.value(reason) for reason in ('rate_limited', 'too_long', 'queue_full')}
+
+async def flood_chat(telegram, rate):
+    """Envía mensajes largos desde FLOOD_CHAT `rate` veces por segundo hasta que se cancela."""
+    start = time.perf_counter()
+    for index in itertools.count(1):
+        telegram.push_message(FLOOD_CHAT, flood_message(index))
+        await asyncio.sleep(max(0.0, start + index / rate - time.perf_counter()))
+
+def run_once(bot_main, transport, questions, args):
+    """
+    Levanta la aplicación con `transport`, le envía `questions` y espera todas las respuestas.
+    Con --flood-rate, FLOOD_CHAT envía a la vez mensajes largos; sus respuestas no se miden.
+    """
+    result = {}
+    chats = {1000 + index for index in range(args.chats)}
+    with FakeTelegramBotAPI() as telegram:
+        BotConfig.TELEGRAM_BASE_URL = telegram.base_url
+        BotConfig.TRANSPORT = transport
+        if transport == 'webhook':
+            BotConfig.WEBHOOK_LISTEN = '127.0.0.1'
+            BotConfig.WEBHOOK_PORT = free_port()
+            BotConfig.WEBHOOK_PATH = 'telegram'
+            BotConfig.WEBHOOK_URL = f'http://127.0.0.1:{BotConfig.WEBHOOK_PORT}/telegram'
+            BotConfig.WEBHOOK_SECRET = 'benchmark-secret'
+        application = bot_main.build_application()
+
+        async def drive(application):
+            loop = asyncio.get_running_loop()
+            while transport == 'webhook' and telegram.webhook_url is None:
+                await asyncio.sleep(0.01)
+            start = time.perf_counter()
+            shed_before = shed_counts()
+            if args.flood_rate:
+                flood = asyncio.create_task(flood_chat(telegram, args.flood_rate))
+            for index, question in enumerate(questions):
+                telegram.push_message(1000 + index % args.chats, question)
+                if args.kill_worker and index == len(questions) // 2:
+                    result['killed'] = kill_one_worker(bot_main.query_executor)
+                if args.rate:
+                    await asyncio.sleep(max(0.0, start + (index + 1) / args.rate - time.perf_counter()))
+            if args.flood_rate:
+                flood.cancel()
+            result['complete'] = await loop.run_in_executor(None, telegram.wait_for_replies, len(questions),
+                                                            args.timeout, chats)
+            result['elapsed'] = time.perf_counter() - start
+            result['shed'] = {reason: count - shed_before[reason] for reason, count in shed_counts().items()}
+            if args.mode == 'fork':
+                result.update(bot_main.query_executor.worker_stats())
+            application.stop_running()
+
+        async def post_init(application):
+            application.create_task(drive(application))
+
+        application.post_init = post_init
+        bot_main.run(application, stop_signals=None, close_loop=False)
+
+    replies = [text for chat_id, text, _ in telegram.replies if chat_id in chats]
+    result['replies'] = len(replies)
+    result['errors'] = sum('error' in text.lower() or 'muchas consultas' in text for text in replies)
+    result['summary'] = summarize(telegram.latencies(chats), result.get('elapsed'))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia de extremo a extremo del bot contra una Bot API local.')
+    parser.add_argument('--messages', type=int, default=200, help='cantidad de mensajes')
+    parser.add_argument('--chats', type=int, default=50, help='cantidad de chats distintos')
+    parser.add_argument('--rate', type=float, default=0, help='mensajes por segundo (0 = todos de golpe)')
+    parser.add_argument('--transport', nargs='+', default=['polling'], choices=('polling', 'webhook'),
+                        help='cómo recibe el bot los mensajes; con varios se comparan en la misma ejecución')
+    parser.add_argument('--mode', default='thread', choices=('thread', 'process', 'fork'), help='modo del pool de consultas')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='workers del pool')
+    parser.add_argument('--owm-latency', type=float, default=20, help='latencia simulada de OpenWeatherMap en ms')
+    parser.add_argument('--languagetool-latency', type=float, default=30, help='latencia simulada de LanguageTool en ms')
+    parser.add_argument('--flood-rate', type=float, default=0, help='mensajes por segundo de un chat que inunda al bot (0 = ninguno)')
+    parser.add_argument('--chat-rate', type=float, default=0, help='límite de mensajes por segundo por chat (0 = sin límite)')
+    parser.add_argument('--kill-worker', action='store_true', help="matar un worker a mitad de la prueba (modo 'fork')")
+    parser.add_argument('--timeout', type=float, default=120, help='segundos máximos esperando las respuestas')
+    parser.add_argument('--bundle', help='bundle de inferencia a usar en lugar de WeatherChatbot.BUNDLE_PATH')
+    args = parser.parse_args()
+
+    install_fake_language_tool(args.languagetool_latency / 1000)
+    # Cada transporte recibe preguntas distintas para que ninguno aproveche las cachés que llenó el anterior.
+    questions = load_questions(args.messages * len(args.transport))
+    results = {}
+    with FakeOpenWeatherMap(latency=args.owm_latency / 1000):
+        # main.py lee la configuración y crea el pool de consultas al importarse.
+        os.environ['TELEGRAM_TOKEN'] = '123456:benchmark'
+        BotConfig.EXECUTOR_MODE = args.mode
+        BotConfig.EXECUTOR_WORKERS = BotConfig.EXECUTOR_MAX_IN_FLIGHT = args.workers
+        BotConfig.WORKER_HEALTH_INTERVAL = 0.5
+        BotConfig.ADMISSION_CHAT_RATE = args.chat_rate
+        registry.enabled = True
+        from model.chatbot import WeatherChatbot
+        if args.bundle:
+            WeatherChatbot.BUNDLE_PATH = args.bundle
+        import main as bot_main
+
+        try:
+            for index, transport in enumerate(args.transport):
+                batch = questions[index * args.messages:(index + 1) * args.messages]
+                results[transport] = run_once(bot_main, transport, batch, args)
+        finally:
+            bot_main.query_executor.shutdown()
+
+    print_table({f'{transport} ({args.mode} x{args.workers})': result['summary'] for transport, result in results.items()},
+                f"Mensajes de Telegram ({args.messages} por transporte)")
+    for transport, result in results.items():
+        print(f"{transport}: {result['replies']} respuestas, {result['errors']} con error"
+              + ('' if result.get('complete') else f", no llegaron todas en {args.timeout:.0f} s"))
+        if any(result['shed'].values()):
+            print('  descartados: ' + ', '.join(f'{reason}={count:g}' for reason, count in result['shed'].items()))
+        if args.kill_worker:
+            print(f"  worker {result.get('killed')} terminado a mitad de la prueba; "
+                  f"reinicios: {result.get('restarts')}, workers vivos: {result.get('alive')}")
+
+if __name__ == "__main__":
+    main()
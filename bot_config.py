@@ -0,0 +1,85 @@
+# bot_config.py
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class BotConfig:
+    """
+    Clase BotConfig para almacenar la configuración de ejecución del bot de Telegram.
+
+    Los valores se leen de variables de entorno (o del archivo `.env`) y tienen
+    valores por defecto razonables para un único proceso.
+
+    Atributos:
+    - EXECUTOR_MODE (str): Tipo de pool para procesar consultas, 'thread', 'process' o 'fork' (por defecto: 'thread').
+    - EXECUTOR_WORKERS (int): Cantidad de workers del pool (por defecto: número de núcleos).
+    - EXECUTOR_MAX_IN_FLIGHT (int): Máximo de consultas procesándose a la vez (por defecto: EXECUTOR_WORKERS).
+    - EXECUTOR_MAX_QUEUE (int): Máximo de consultas esperando un worker libre antes de rechazarlas (por defecto: 100).
+    - WORKER_HEALTH_INTERVAL (float): Segundos entre comprobaciones de salud de los workers en modo 'fork' (por defecto: 5).
+    - WORKER_HEALTH_TIMEOUT (float): Segundos que un worker libre tiene para responder (por defecto: 10).
+    - WORKER_QUERY_TIMEOUT (float): Segundos máximos de una consulta antes de reiniciar su worker (por defecto: 60).
+    - ADMISSION_CHAT_RATE (float): Mensajes por segundo que se procesan de cada chat; los demás se descartan (por defecto: 0.5, 0 = sin límite).
+    - ADMISSION_CHAT_BURST (int): Mensajes seguidos que un chat puede enviar antes de aplicar ese límite (por defecto: 5).
+    - ADMISSION_MAX_MESSAGE_CHARS (int): Largo máximo de un mensaje; los más largos se rechazan sin procesarlos (por defecto: 1000).
+    - PARSE_CACHE_ENABLED (bool): Guarda el análisis (corrección, intención y ciudades) de cada mensaje por texto normalizado (por defecto: True).
+    - PARSE_CACHE_SIZE (int): Cantidad de mensajes analizados que se recuerdan en cada proceso (por defecto: 4096).
+    - TRANSPORT (str): Cómo se reciben los mensajes de Telegram, 'polling' o 'webhook' (por defecto: 'polling').
+    - WEBHOOK_LISTEN (str): Dirección en la que escucha el servidor del webhook (por defecto: '0.0.0.0').
+    - WEBHOOK_PORT (int): Puerto del servidor del webhook (por defecto: 8443).
+    - WEBHOOK_PATH (str): Ruta del webhook en ese servidor (por defecto: 'telegram').
+    - WEBHOOK_URL (str): URL pública (HTTPS) que se registra en Telegram, p. ej. 'https://bot.ejemplo.com/telegram'.
+    - WEBHOOK_SECRET (str): Secreto que Telegram envía en cada petición para validar su origen.
+    - WEBHOOK_MAX_CONNECTIONS (int): Conexiones simultáneas que Telegram puede abrir hacia el webhook (por defecto: 40).
+    - TELEGRAM_BASE_URL (str): URL de la Bot API de Telegram, para usar un servidor local de pruebas (por defecto: la oficial).
+    - METRICS_ENABLED (bool): Registra métricas de cada etapa y las expone en /metrics (por defecto: False).
+    - METRICS_HOST (str): Dirección en la que escucha el servidor de métricas (por defecto: '127.0.0.1').
+    - METRICS_PORT (int): Puerto del servidor de métricas (por defecto: 9100).
+    """
+
+    EXECUTOR_MODE = os.getenv('BOT_EXECUTOR_MODE', 'thread')
+
+    EXECUTOR_WORKERS = int(os.getenv('BOT_EXECUTOR_WORKERS', os.cpu_count() or 1))
+
+    EXECUTOR_MAX_IN_FLIGHT = int(os.getenv('BOT_EXECUTOR_MAX_IN_FLIGHT', EXECUTOR_WORKERS))
+
+    EXECUTOR_MAX_QUEUE = int(os.getenv('BOT_EXECUTOR_MAX_QUEUE', 100))
+
+    WORKER_HEALTH_INTERVAL = float(os.getenv('BOT_WORKER_HEALTH_INTERVAL', 5))
+
+    WORKER_HEALTH_TIMEOUT = float(os.getenv('BOT_WORKER_HEALTH_TIMEOUT', 10))
+
+    WORKER_QUERY_TIMEOUT = float(os.getenv('BOT_WORKER_QUERY_TIMEOUT', 60))
+
+    ADMISSION_CHAT_RATE = float(os.getenv('BOT_ADMISSION_CHAT_RATE', 0.5))
+
+    ADMISSION_CHAT_BURST = int(os.getenv('BOT_ADMISSION_CHAT_BURST', 5))
+
+    ADMISSION_MAX_MESSAGE_CHARS = int(os.getenv('BOT_ADMISSION_MAX_MESSAGE_CHARS', 1000))
+
+    PARSE_CACHE_ENABLED = os.getenv('BOT_PARSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    PARSE_CACHE_SIZE = int(os.getenv('BOT_PARSE_CACHE_SIZE', 4096))
+
+    TRANSPORT = os.getenv('BOT_TRANSPORT', 'polling')
+
+    WEBHOOK_LISTEN = os.getenv('BOT_WEBHOOK_LISTEN', '0.0.0.0')
+
+    WEBHOOK_PORT = int(os.getenv('BOT_WEBHOOK_PORT', 8443))
+
+    WEBHOOK_PATH = os.getenv('BOT_WEBHOOK_PATH', 'telegram')
+
+    WEBHOOK_URL = os.getenv('BOT_WEBHOOK_URL')
+
+    WEBHOOK_SECRET = os.getenv('BOT_WEBHOOK_SECRET')
+
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv('BOT_WEBHOOK_MAX_CONNECTIONS', 40))
+
+    TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL')
+
+    METRICS_ENABLED = os.getenv('BOT_METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+    METRICS_HOST = os.getenv('BOT_METRICS_HOST', '127.0.0.1')
+
+    METRICS_PORT = int(os.getenv('BOT_METRICS_PORT', 9100))
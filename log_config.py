@@ -22,6 +22,10 @@ LOGGING = {
             'handlers': ['default'],
             'level': 'INFO',
             'propagate': True
+        },
+        # httpx registra cada URL a nivel INFO, incluida la clave de la API.
+        'httpx': {
+            'level': 'WARNING'
         }
     }
 }
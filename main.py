@@ -5,6 +5,10 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackContext
 from model.chatbot import WeatherChatbot
 from dotenv import load_dotenv
+from bot_config import BotConfig
+from query_executor import QueryExecutor, ExecutorBusyError
+from admission import AdmissionController, AdmissionRejectedError, SHED_MESSAGES
+from metrics import start_metrics_server
 from log_config import get_logger
 
 logger = get_logger(__name__)
@@ -12,7 +16,22 @@ logger = get_logger(__name__)
 load_dotenv()
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 
-weather_bot = WeatherChatbot()
+query_executor = QueryExecutor(
+    WeatherChatbot,
+    mode=BotConfig.EXECUTOR_MODE,
+    workers=BotConfig.EXECUTOR_WORKERS,
+    max_in_flight=BotConfig.EXECUTOR_MAX_IN_FLIGHT,
+    max_queue=BotConfig.EXECUTOR_MAX_QUEUE,
+    health_interval=BotConfig.WORKER_HEALTH_INTERVAL,
+    health_timeout=BotConfig.WORKER_HEALTH_TIMEOUT,
+    query_timeout=BotConfig.WORKER_QUERY_TIMEOUT,
+)
+
+admission = AdmissionController(
+    rate=BotConfig.ADMISSION_CHAT_RATE,
+    burst=BotConfig.ADMISSION_CHAT_BURST,
+    max_message_chars=BotConfig.ADMISSION_MAX_MESSAGE_CHARS,
+)
 
 async def start_command(update: Update, context: CallbackContext) -> None:
     """Envía un mensaje cuando se emite el comando /start."""
@@ -31,21 +50,71 @@ async def help_command(update: Update, context: CallbackContext) -> None:
 async def process_message(update: Update, context: CallbackContext) -> None:
     """Procesa y responde a mensajes generales."""
     try:
-        response_message = weather_bot.process_query(update.message.text)
+        admission.admit(update.effective_chat.id, update.message.text)
+        response_message = await query_executor.submit(update.message.text)
         await update.message.reply_text(response_message)
+    except AdmissionRejectedError as e:
+        logger.warning(f"Consulta rechazada ({e.reason}): {e}")
+        if e.notify and e.reason == 'too_long':
+            await update.message.reply_text(f"Tu mensaje es demasiado largo, escríbeme preguntas de hasta {admission.max_message_chars} caracteres.")
+        elif e.notify:
+            wait = max(1, round(admission.retry_after(update.effective_chat.id)))
+            await update.message.reply_text(f"Estás enviando mensajes muy rápido, espera {wait} segundos antes de la próxima pregunta.")
+    except ExecutorBusyError as e:
+        SHED_MESSAGES.inc('queue_full')
+        logger.warning(f"Consulta rechazada, pool de consultas saturado: {e}")
+        await update.message.reply_text("Estoy recibiendo muchas consultas en este momento, vuelve a intentarlo en unos segundos.")
     except Exception as e:
         logger.error(f"Error al procesar la consulta: {e}")
         await update.message.reply_text("Lo siento, ocurrió un error al procesar tu mensaje.")
 
-def main() -> None:
-    """Inicia el bot."""
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+def build_application() -> Application:
+    """Crea la aplicación de Telegram con sus handlers."""
+    # Sin concurrent_updates PTB procesa las actualizaciones de a una y el pool nunca se aprovecha.
+    builder = Application.builder().token(TELEGRAM_TOKEN).concurrent_updates(True)
+    if BotConfig.TELEGRAM_BASE_URL:
+        builder = builder.base_url(BotConfig.TELEGRAM_BASE_URL)
+    application = builder.build()
 
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("ayuda", help_command))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, process_message))
+    return application
 
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+def run(application: Application, **kwargs) -> None:
+    """Recibe las actualizaciones por webhook o por long polling, según BotConfig.TRANSPORT."""
+    if BotConfig.TRANSPORT == 'webhook':
+        if not BotConfig.WEBHOOK_URL:
+            raise ValueError("BOT_WEBHOOK_URL es obligatorio con BOT_TRANSPORT=webhook.")
+        application.run_webhook(
+            listen=BotConfig.WEBHOOK_LISTEN,
+            port=BotConfig.WEBHOOK_PORT,
+            url_path=BotConfig.WEBHOOK_PATH,
+            webhook_url=BotConfig.WEBHOOK_URL,
+            secret_token=BotConfig.WEBHOOK_SECRET,
+            max_connections=BotConfig.WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES,
+            **kwargs,
+        )
+    elif BotConfig.TRANSPORT == 'polling':
+        application.run_polling(allowed_updates=Update.ALL_TYPES, **kwargs)
+    else:
+        raise ValueError(f"Transporte desconocido '{BotConfig.TRANSPORT}', se esperaba 'polling' o 'webhook'.")
+
+def main() -> None:
+    """Inicia el bot."""
+    application = build_application()
+
+    if BotConfig.METRICS_ENABLED:
+        start_metrics_server(BotConfig.METRICS_HOST, BotConfig.METRICS_PORT)
+        if BotConfig.EXECUTOR_MODE != 'thread':
+            logger.warning(f'En modo "{BotConfig.EXECUTOR_MODE}" las métricas de cada etapa y de las cachés quedan en los workers; '
+                           'el endpoint solo muestra las del pool de consultas.')
+
+    try:
+        run(application)
+    finally:
+        query_executor.shutdown()
 
 if __name__ == "__main__":
     main()
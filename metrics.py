@@ -0,0 +1,242 @@
+# metrics.py
+#
+# Métricas del bot (contadores, gauges e histogramas) en formato de texto de Prometheus.
+# Con las métricas desactivadas cada llamada solo comprueba un booleano.
+
+import math
+import threading
+import time
+from contextlib import nullcontext
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from bot_config import BotConfig
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_NULL_CONTEXT = nullcontext()
+
+class MetricsRegistry:
+    """
+    Clase MetricsRegistry que agrupa las métricas del proceso y las exporta en formato Prometheus.
+
+    Atributos:
+    - enabled (bool): Si es False las métricas no registran nada.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"La métrica '{metric.name}' ya está registrada.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Devuelve todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry(enabled=BotConfig.METRICS_ENABLED)
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class _Metric:
+    TYPE = 'untyped'
+
+    def __init__(self, name, documentation, labels=(), registry=registry):
+        """
+        Parámetros:
+        - name (str): Nombre de la métrica en Prometheus.
+        - documentation (str): Descripción que se exporta en la línea HELP.
+        - labels (tuple): Nombres de las etiquetas; sus valores se pasan en orden al registrar.
+        - registry (MetricsRegistry): Registro al que pertenece.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._registry = registry
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _check_labels(self, label_values):
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"La métrica '{self.name}' espera las etiquetas {self.label_names}.")
+        return label_values
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in sorted(self._values.items())]
+
+class Counter(_Metric):
+    """Contador que solo aumenta, por ejemplo aciertos de caché o errores."""
+    TYPE = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        if not self._registry.enabled:
+            return
+        key = self._check_labels(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """Valor que sube y baja, por ejemplo la cantidad de peticiones en curso."""
+    TYPE = 'gauge'
+
+    def inc(self, *label_values, amount=1):
+        if not self._registry.enabled:
+            return
+        key = self._check_labels(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[self._check_labels(label_values)] = value
+
+    def track_in_progress(self, *label_values):
+        """Context manager que suma 1 al entrar y resta 1 al salir."""
+        if not self._registry.enabled:
+            return _NULL_CONTEXT
+        return _InProgress(self, label_values)
+
+class _InProgress:
+    __slots__ = ('gauge', 'label_values')
+
+    def __init__(self, gauge, label_values):
+        self.gauge = gauge
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.gauge.inc(*self.label_values)
+
+    def __exit__(self, *exc_info):
+        self.gauge.dec(*self.label_values)
+
+class Histogram(_Metric):
+    """Histograma de duraciones en segundos con buckets acumulados, suma y cantidad."""
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS, registry=registry):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labels, registry)
+
+    def observe(self, value, *label_values):
+        if not self._registry.enabled:
+            return
+        key = self._check_labels(label_values)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *label_values):
+        """Context manager que registra la duración del bloque."""
+        if not self._registry.enabled:
+            return _NULL_CONTEXT
+        return _Timer(self, label_values)
+
+    def value(self, *label_values):
+        """Retorna (suma, cantidad) de las observaciones."""
+        state = self._values.get(label_values)
+        return (state[1], state[2]) if state else (0.0, 0)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            items = sorted((labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, [('le', _format_value(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'label_values', 'start')
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+def start_metrics_server(host=BotConfig.METRICS_HOST, port=BotConfig.METRICS_PORT, registry=registry):
+    """
+    Inicia en un hilo propio un servidor HTTP que responde las métricas en /metrics.
+
+    Solo exporta las métricas de este proceso. Con QueryExecutor en modo 'process' o
+    'fork' las etapas de process_query, las cachés y las peticiones a OpenWeatherMap se
+    registran en los workers y no aparecen aquí; solo el modo 'thread' las exporta.
+
+    Retorna:
+    - ThreadingHTTPServer: El servidor iniciado (usar `shutdown()` para detenerlo).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            payload = registry.render().encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f'Métricas disponibles en http://{host}:{server.server_address[1]}/metrics')
+    return server
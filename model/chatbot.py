@@ -1,141 +1,372 @@
 # chatbot.py
 
-import json
+import pickle
+import time
 import spacy
 import language_tool_python
-import joblib
-from model.preparation_data import preprocess_question, vectorizer
-from weather_package import Weather
+from model.preparation_data import preprocess_tokens, load_data, files_questions, keyword_files
+from model.inference_bundle import InferenceBundle, nlp_model_name
+from model.gazetteer import CityGazetteer
+import model.city_ruler  # registra el componente "city_ruler" de spaCy
+from model.text_correction import SpellingCorrector, build_vocabulary, normalize_text
+from weather_package import WeatherSnapshot, fetch_many_sync, warm_cache
+from weather_package.cache import TTLCache
+from weather_package.extra_data import warm_up as warm_up_extras
+from bot_config import BotConfig
 from log_config import get_logger
+from metrics import Counter, Gauge, Histogram
 
 logger = get_logger(__name__)
 
+QUERY_SECONDS = Histogram('bot_query_seconds', 'Duración total de process_query.')
+STAGE_SECONDS = Histogram('bot_stage_seconds', 'Duración de cada etapa de process_query '
+                          '(correction, nlp, intent, city_extraction, weather_fetch, rendering).', ('stage',))
+QUERIES_IN_FLIGHT = Gauge('bot_queries_in_flight', 'Consultas procesándose en este momento.')
+QUERY_ERRORS = Counter('bot_query_errors_total', 'Consultas que terminaron en error.')
+QUERY_TRUNCATED = Counter('bot_query_truncated_total', 'Mensajes recortados por superar MAX_SENTENCES o MAX_CITIES.', ('limit',))
+PARSE_CACHE_LOOKUPS = Counter('bot_parse_cache_lookups_total', 'Consultas a la caché de análisis por resultado (hit/miss).', ('result',))
+
+class ErrorResponse(str):
+    """
+    Clase ErrorResponse, respuesta de process_query cuando la consulta falló.
+
+    Se envía al usuario como cualquier otro texto, pero permite reconocer los errores por
+    su tipo y no por su contenido, también cuando la respuesta llega desde otro proceso.
+    """
+
 class WeatherChatbot:
-    MODEL_PATH = 'model/final_classification_model.pkl'
+    BUNDLE_PATH = 'model/inference_bundle.pkl'
     # NLP_MODEL = 'es_core_news_lg'
     # NLP_MODEL = 'es_core_news_md'
     NLP_MODEL = 'es_core_news_sm'
-    NLP_MODEL_CUSTOM = 'model/nlp_cargado'
     CITY_FILE = 'model/names_of_cities.json'
+    CITY_COMPILED_FILE = 'model/names_of_cities.bin'
+    CORRECTION_CACHE_SIZE = 1024
+    CORRECTION_TIME_BUDGET = 2.0  # segundos
+    PARSE_CACHE_ENABLED = BotConfig.PARSE_CACHE_ENABLED
+    PARSE_CACHE_SIZE = BotConfig.PARSE_CACHE_SIZE
+    # Un mensaje no puede convertirse en más consultas que estas, por largo que sea.
+    MAX_SENTENCES = 5
+    MAX_CITIES = 5
 
     def __init__(self):
+        start = time.perf_counter()
         self.tool = language_tool_python.LanguageTool('es')
         self.nlp = None
         self.ruler = None
-        self.modelo = None
-        self.city_data_list = []
+        self.bundle = None
+        self.gazetteer = CityGazetteer([])
+        self.parse_cache = TTLCache(maxsize=self.PARSE_CACHE_SIZE) if self.PARSE_CACHE_ENABLED else None
         self._initialize_tools()
+        self.startup_seconds = time.perf_counter() - start
+        logger.info(f'WeatherChatbot iniciado en {self.startup_seconds:.2f} s.')
 
     def _load_cities(self):
         try:
-            with open(self.CITY_FILE, 'r') as archivo:
-                city_data = json.load(archivo)
-
-            self.city_data_list = set()
-            for city_info in city_data:
-                main_name = city_info[0]
-                if isinstance(main_name, str):
-                    self.city_data_list.add(main_name.lower())
-                else:
-                    logger.error(f"Nombre principal de ciudad esperado como cadena, encontrado {type(main_name)}: {main_name}")
-
-                for alt_name in city_info[1]:
-                    if isinstance(alt_name, str):
-                        self.city_data_list.add(alt_name.lower())
-                    else:
-                        logger.error(f"Nombre alternativo de ciudad esperado como cadena, encontrado {type(alt_name)}: {alt_name}")
-
-            self.city_data_list = list(self.city_data_list)
-            logger.info(f'Carga de {len(self.city_data_list)} nombres de ciudades desde "{self.CITY_FILE}". Completada.')
+            self.gazetteer = CityGazetteer.load(self.CITY_FILE, self.CITY_COMPILED_FILE)
+            logger.info(f'Carga de {len(self.gazetteer)} nombres de ciudades desde "{self.CITY_COMPILED_FILE}". Completada.')
         except Exception as e:
             logger.error(f"Error al cargar ciudades: {e}")
 
-    def _load_model(self):
+    @property
+    def modelo(self):
+        return self.bundle.classifier
+
+    def _load_bundle(self):
+        start = time.perf_counter()
         try:
-            self.modelo = joblib.load(self.MODEL_PATH)
-            logger.info(f'Carga de "{self.MODEL_PATH}". Completada.')
-        except Exception as e:
-            logger.error(f"Error al cargar el modelo: {e}")
+            bundle = InferenceBundle.load(self.BUNDLE_PATH)
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError, ValueError) as e:
+            raise RuntimeError(f'No se pudo cargar "{self.BUNDLE_PATH}" ({e!r}). '
+                               f'Ejecuta python -m model.model_adjustment para generarlo.') from e
+        logger.info(f'Carga de "{self.BUNDLE_PATH}" en {time.perf_counter() - start:.2f} s. Completada.')
+        if bundle.nlp_model != nlp_model_name(self.nlp):
+            logger.warning(f'El bundle se entrenó con {bundle.nlp_model} pero se está usando {nlp_model_name(self.nlp)}; '
+                           f'los lemas pueden no coincidir. Vuelve a ejecutar python -m model.model_adjustment.')
+        return bundle
 
     def _initialize_nlp(self):
-        try:
-            self.nlp = spacy.load(self.NLP_MODEL_CUSTOM)
-            logger.info(f'{self.NLP_MODEL_CUSTOM} cargado exitosamente.')
-            self.ruler = self.nlp.get_pipe("entity_ruler")
-        except Exception:
-            logger.info(f'{self.NLP_MODEL_CUSTOM} no encontrado, usando {self.NLP_MODEL} por defecto.')
-            self.nlp = spacy.load(self.NLP_MODEL)
-            self.ruler = self.nlp.add_pipe("entity_ruler", config={"overwrite_ents": True})
-            self._load_city_patterns()
-            self.nlp.to_disk(self.NLP_MODEL_CUSTOM)
-            logger.info(f'{self.NLP_MODEL_CUSTOM} creado y guardado para uso futuro.')
+        self.nlp = spacy.load(self.NLP_MODEL)
+        self.ruler = self.nlp.add_pipe("city_ruler", after="ner")
+        self.ruler.gazetteer = self.gazetteer
+        logger.info(f'{self.NLP_MODEL} cargado con el reconocimiento de {len(self.gazetteer)} nombres de ciudades.')
+
+    def _initialize_corrector(self):
+        texts = []
+        for file_name in list(files_questions.values()) + list(keyword_files.values()):
+            texts.extend(load_data(file_name))
+        vocabulary = build_vocabulary(texts) | build_vocabulary(self.gazetteer)
+        self.corrector = SpellingCorrector(self.tool, self._is_city_name, vocabulary,
+                                           self.CORRECTION_CACHE_SIZE, self.CORRECTION_TIME_BUDGET)
+        logger.info(f'Vocabulario de corrección con {len(vocabulary)} palabras conocidas.')
 
     def _initialize_tools(self):
-        self._load_model()
         self._load_cities()
         self._initialize_nlp()
+        self.bundle = self._load_bundle()
+        self._initialize_corrector()
 
-    def _load_city_patterns(self):
-        patterns = [{"label": "GPE", "pattern": city} for city in self.city_data_list]
-        self.ruler.add_patterns(patterns)
-        logger.info(f'Carga de {len(patterns)} patrones de ciudades completada.')
+    def warm_up(self):
+        """
+        Carga de antemano todo lo que se inicializa en la primera consulta (modelos de spaCy,
+        autómata de ciudades, tabla lunar) y el clima de Config.WARM_CITIES, para que los
+        procesos creados con fork lo hereden listo.
+        """
+        start = time.perf_counter()
+        self.analyze_doc(self.nlp('¿Qué temperatura hace en Madrid?'))
+        self.gazetteer.contains_any('')
+        warm_up_extras()
+        logger.info(f'Modelos precargados en {time.perf_counter() - start:.2f} s.')
+        try:
+            warm_cache()
+        except Exception as e:
+            logger.error(f"Error al precargar la caché del clima: {e}")
 
     def _is_city_name(self, rule):
-        return any(city in rule.context.lower() for city in self.city_data_list)
+        return self.gazetteer.contains_any(rule.context.lower())
 
     def correct_text(self, text, max_iterations=10):
-        for _ in range(max_iterations):
-            matches = self.tool.check(text)
-            matches = [rule for rule in matches if not self._is_city_name(rule)]
-            if not matches:
-                break
-            text = language_tool_python.utils.correct(text, matches)
-        return text
+        return self.corrector.correct(text, max_iterations)
 
     def split_into_sentences(self, corrected_text):
         doc = self.nlp(corrected_text)
         return [sent.text.strip() for sent in doc.sents]
 
     def classify_intent(self, text):
-        processed_text = preprocess_question(text, '', self.nlp)
-        vector = vectorizer.transform([processed_text])
-        probability = self.modelo.predict_proba(vector)[0]
-        max_probability = max(probability)
-        intent_index = probability.argmax()
-        intent = self.modelo.classes_[intent_index]
-        return max_probability, intent
+        """Clasifica la intención de un texto, o de un Doc/Span ya analizado sin volver a pasarlo por spaCy."""
+        return self.classify_intents([text])[0]
+
+    def classify_intents(self, texts, batch_size=64):
+        """
+        Clasifica la intención de varios textos o Doc/Span de una sola vez.
+
+        Los textos sin analizar pasan juntos por `nlp.pipe`, y todos se vectorizan en
+        una única matriz que se clasifica con una sola llamada a `predict_proba`.
+
+        Retorna:
+        - list: Tuplas (probabilidad, intención) en el mismo orden que `texts`.
+        """
+        texts = list(texts)
+        pending = [index for index, text in enumerate(texts) if isinstance(text, str)]
+        if pending:
+            for index, doc in zip(pending, self.nlp.pipe((texts[index] for index in pending), batch_size=batch_size)):
+                texts[index] = doc
+        return self.bundle.classify([preprocess_tokens(tokens, '') for tokens in texts])
 
     def classify_city(self, input_text):
-        starts_with_how = input_text.lower().strip().startswith(('como ', '¿como '))
-        doc = self.nlp(input_text)
-        cities = [ent.text.lower() for ent in doc.ents if ent.label_ == 'GPE' and ent.text.lower() not in ['como', 'sale'] and not (starts_with_how and ent.text.lower() == 'como') and ent.text.lower() in self.city_data_list]
+        """Extrae las ciudades de un texto, o de un Doc/Span ya analizado sin volver a pasarlo por spaCy."""
+        tokens = self.nlp(input_text) if isinstance(input_text, str) else input_text
+        starts_with_how = tokens.text.lower().strip().startswith(('como ', '¿como '))
+        cities = [ent.text.lower() for ent in tokens.ents if ent.label_ == 'GPE' and ent.text.lower() not in ['como', 'sale'] and not (starts_with_how and ent.text.lower() == 'como') and ent.text.lower() in self.gazetteer]
         return cities
-    
+
+    def analyze_doc(self, doc):
+        """
+        Analiza un mensaje ya procesado por spaCy: oraciones, intención y ciudades salen del mismo Doc.
+
+        Retorna:
+        - list: Tuplas (oración, probabilidad, intención, ciudades) por cada oración.
+        """
+        return self._analyze_sentences([list(doc.sents)])[0]
+
+    def _analyze_sentences(self, sentences_by_doc):
+        # Las intenciones de todas las oraciones de todos los Doc se clasifican en un solo lote.
+        with STAGE_SECONDS.time('intent'):
+            intents = iter(self.classify_intents([sent for sentences in sentences_by_doc for sent in sentences]))
+        with STAGE_SECONDS.time('city_extraction'):
+            return [[(sent.text.strip(), *next(intents), self.classify_city(sent)) for sent in sentences]
+                    for sentences in sentences_by_doc]
+
+    def analyze_texts(self, texts, batch_size=64):
+        """
+        Analiza varios textos ya corregidos pasándolos juntos por `nlp.pipe` y clasificando
+        las intenciones de cada lote de `batch_size` textos con una sola llamada al modelo.
+        Sirve para evaluar corpus grandes sin conexión.
+        """
+        analyzed = []
+        batch = []
+        for doc in self.nlp.pipe(texts, batch_size=batch_size):
+            batch.append(list(doc.sents))
+            if len(batch) >= batch_size:
+                analyzed.extend(self._analyze_sentences(batch))
+                batch = []
+        if batch:
+            analyzed.extend(self._analyze_sentences(batch))
+        return analyzed
+
+    def parse_query(self, texto):
+        """
+        Parte de NLP de process_query: corrección, oraciones, intención y ciudades.
+
+        Solo depende del texto, así que el resultado se guarda en `parse_cache` por texto
+        normalizado y los mensajes repetidos pasan directo a consultar el clima. Si la
+        corrección se cortó por tiempo no se guarda, para no fijar un análisis degradado.
+
+        Retorna:
+        - tuple: Tuplas (oración, probabilidad, intención, ciudades) por cada oración.
+        """
+        key = normalize_text(texto)
+        if self.parse_cache is not None:
+            analyzed = self.parse_cache.get(key)
+            if analyzed is not None:
+                PARSE_CACHE_LOOKUPS.inc('hit')
+                return analyzed
+            PARSE_CACHE_LOOKUPS.inc('miss')
+
+        with STAGE_SECONDS.time('correction'):
+            corrected_text, complete = self.corrector.correct_with_status(texto, 100)
+        with STAGE_SECONDS.time('nlp'):
+            doc = self.nlp(corrected_text)
+        analyzed = self._freeze_analysis(self.analyze_doc(doc))
+        if self.parse_cache is not None and complete:
+            self.parse_cache.set(key, analyzed)
+        return analyzed
+
+    def parse_queries(self, texts, batch_size=64):
+        """
+        Versión por lotes de parse_query para muchos mensajes.
+
+        Los mensajes que no están en `parse_cache` se corrigen y se analizan juntos con
+        `analyze_texts`; los repetidos se analizan una sola vez. Los resultados quedan en
+        la caché, de modo que sirve también para precargarla.
+
+        Retorna:
+        - list: El resultado de parse_query de cada mensaje, en el mismo orden.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        pending = {}
+        for index, texto in enumerate(texts):
+            key = normalize_text(texto)
+            analyzed = self.parse_cache.get(key) if self.parse_cache is not None else None
+            if analyzed is not None:
+                PARSE_CACHE_LOOKUPS.inc('hit')
+                results[index] = analyzed
+            else:
+                PARSE_CACHE_LOOKUPS.inc('miss')
+                pending.setdefault(key, []).append(index)
+
+        if pending:
+            with STAGE_SECONDS.time('correction'):
+                corrections = [self.corrector.correct_with_status(texts[indexes[0]], 100) for indexes in pending.values()]
+            corrected_texts = [corrected for corrected, _ in corrections]
+            analyzed_texts = self.analyze_texts(corrected_texts, batch_size)
+            for (key, indexes), analyzed, (_, complete) in zip(pending.items(), analyzed_texts, corrections):
+                analyzed = self._freeze_analysis(analyzed)
+                if self.parse_cache is not None and complete:
+                    self.parse_cache.set(key, analyzed)
+                for index in indexes:
+                    results[index] = analyzed
+        return results
+
+    @staticmethod
+    def _freeze_analysis(analyzed):
+        return tuple((sentence, max_probabilidad, intent, tuple(cities))
+                     for sentence, max_probabilidad, intent, cities in analyzed)
+
+    def parse_cache_stats(self):
+        if self.parse_cache is None:
+            return {'enabled': False}
+        stats = self.parse_cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['enabled'] = True
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def limit_analysis(self, analyzed):
+        """
+        Recorta el análisis de un mensaje a sus primeras MAX_SENTENCES oraciones y MAX_CITIES
+        ciudades distintas, antes de consultar el clima. Las oraciones que solo mencionaban
+        ciudades descartadas se omiten.
+
+        Retorna:
+        - tuple: El análisis recortado y True si se descartó algo.
+        """
+        allowed = []
+        limited = []
+        cities_dropped = False
+        for sentence, max_probabilidad, intent, cities in analyzed[:self.MAX_SENTENCES]:
+            if cities and max_probabilidad >= .5:
+                kept = []
+                for city in cities:
+                    if city not in allowed and len(allowed) < self.MAX_CITIES:
+                        allowed.append(city)
+                    if city in allowed:
+                        kept.append(city)
+                cities_dropped = cities_dropped or len(kept) < len(cities)
+                if not kept:
+                    continue
+                cities = tuple(kept)
+            limited.append((sentence, max_probabilidad, intent, cities))
+
+        sentences_dropped = len(analyzed) > self.MAX_SENTENCES
+        if sentences_dropped:
+            QUERY_TRUNCATED.inc('sentences')
+        if cities_dropped:
+            QUERY_TRUNCATED.inc('cities')
+        return tuple(limited), sentences_dropped or cities_dropped
+
     def process_query(self, texto):
+        with QUERIES_IN_FLIGHT.track_in_progress(), QUERY_SECONDS.time():
+            return self._process_query(texto)
+
+    def process_queries(self, texts, parse_only=False, batch_size=64):
+        """
+        Procesa muchos mensajes: el análisis se hace por lotes con parse_queries y
+        luego se arma la respuesta de cada uno como en process_query.
+
+        Parámetros:
+        - texts (list): Mensajes a procesar.
+        - parse_only (bool): Si es True no se consulta el clima y se devuelve el análisis de cada mensaje.
+        - batch_size (int): Cantidad de textos por lote de spaCy y del clasificador.
+
+        Retorna:
+        - list: Respuesta (o análisis, con parse_only) de cada mensaje, en el mismo orden.
+        """
+        texts = list(texts)
+        analyzed_texts = self.parse_queries(texts, batch_size)
+        if parse_only:
+            return analyzed_texts
+        return [self._process_query(texto, analyzed) for texto, analyzed in zip(texts, analyzed_texts)]
+
+    def _process_query(self, texto, analyzed=None):
         try:
-            corrected_text = self.correct_text(texto, 100)
-            sentences = self.split_into_sentences(corrected_text)
-            responses = []
-            seen_combinations = set()
-            for sentence in sentences:
-                max_probabilidad, intent = self.classify_intent(sentence)
-                cities = self.classify_city(sentence.lower())
-                if cities:
-                    if max_probabilidad < .5:
-                        responses.append(f'No entiendo la pregunta "{sentence}".')
+            if analyzed is None:
+                analyzed = self.parse_query(texto)
+            analyzed, truncated = self.limit_analysis(analyzed)
+
+            # Todas las ciudades del mensaje se piden a la API en paralelo antes de armar las respuestas.
+            requested_cities = [city for _, max_probabilidad, _, cities in analyzed if max_probabilidad >= .5 for city in cities]
+            with STAGE_SECONDS.time('weather_fetch'):
+                weather_by_city = fetch_many_sync(requested_cities) if requested_cities else {}
+            # fetch_many_sync ya reintentó lo que podía; pedirla de nuevo solo volvería a esperar el timeout.
+            failed_cities = [city for city in requested_cities if weather_by_city.get(city) is None]
+            if failed_cities:
+                raise LookupError(f"No se obtuvo el clima de {', '.join(failed_cities)}.")
+
+            with STAGE_SECONDS.time('rendering'):
+                responses = []
+                seen_combinations = set()
+                for sentence, max_probabilidad, intent, cities in analyzed:
+                    if cities:
+                        if max_probabilidad < .5:
+                            responses.append(f'No entiendo la pregunta "{sentence}".')
+                        else:
+                            for city in cities:
+                                combinacion = (city, intent)
+                                if combinacion not in seen_combinations:
+                                    weather_data = getattr(WeatherSnapshot(weather_by_city[city]), intent, lambda: 'Información no disponible')
+                                    responses.append(weather_data)
+                                    seen_combinations.add(combinacion)
                     else:
-                        for city in cities:
-                            combinacion = (city, intent)
-                            if combinacion not in seen_combinations:
-                                weather_data = getattr(Weather(city), intent, lambda: 'Información no disponible')
-                                responses.append(weather_data)
-                                seen_combinations.add(combinacion)
-                else:
-                    responses.append(f'¿A qué ciudad te refieres en "{sentence}"?')
+                        responses.append(f'¿A qué ciudad te refieres en "{sentence}"?')
+            if truncated:
+                responses.append(f'Solo respondo hasta {self.MAX_SENTENCES} preguntas y {self.MAX_CITIES} ciudades por mensaje.')
             return '\n\n'.join(set(responses))
         except Exception as e:
+            QUERY_ERRORS.inc()
             logger.error(f"Error al analizar el texto: {e}")
-            return 'Hubo un error al procesar tu solicitud, vuelve a intentarlo.'
+            return ErrorResponse('Hubo un error al procesar tu solicitud, vuelve a intentarlo.')
 
 if __name__ == "__main__":
     weather_bot = WeatherChatbot()
@@ -0,0 +1,47 @@
+# model/city_ruler.py
+
+from spacy.language import Language
+from spacy.tokens import Span
+from spacy.util import filter_spans
+
+@Language.factory("city_ruler", default_config={"label": "GPE"})
+def create_city_ruler(nlp, name, label):
+    return CityRuler(label)
+
+class CityRuler:
+    """
+    Componente de spaCy que marca como entidades los nombres de ciudades del gazetteer.
+
+    Equivale a un EntityRuler con patrones de frase en minúsculas y `overwrite_ents`,
+    pero busca cada secuencia de tokens directamente en el gazetteer en lugar de
+    compilar miles de patrones, por lo que agregarlo al pipeline no tiene costo.
+    El gazetteer se asigna después de crear el componente (`ruler.gazetteer = ...`).
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.gazetteer = None
+
+    def __call__(self, doc):
+        if self.gazetteer is None:
+            return doc
+        lowers = [token.lower_ for token in doc]
+        spaces = [token.whitespace_ for token in doc]
+        max_tokens = self.gazetteer.max_tokens
+        matches = []
+        for start in range(len(doc)):
+            text = lowers[start]
+            end = None
+            for position in range(start + 1, min(len(doc), start + max_tokens) + 1):
+                if text in self.gazetteer:
+                    end = position
+                if position < len(doc):
+                    text += spaces[position - 1] + lowers[position]
+            if end is not None:
+                matches.append(Span(doc, start, end, label=self.label))
+        if matches:
+            matches = filter_spans(matches)
+            covered = {index for span in matches for index in range(span.start, span.end)}
+            kept = [ent for ent in doc.ents if not covered.intersection(range(ent.start, ent.end))]
+            doc.ents = sorted(kept + matches, key=lambda span: span.start)
+        return doc
@@ -0,0 +1,335 @@
+# model/gazetteer.py
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import deque
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class CityGazetteer:
+    """
+    Clase CityGazetteer, índice de nombres de ciudades en minúsculas.
+
+    Responde en tiempo constante si un texto es exactamente un nombre de ciudad
+    (`nombre in gazetteer`) y, con un autómata Aho-Corasick, si un texto contiene
+    algún nombre de ciudad en una sola pasada (`contains_any`), sin recorrer la
+    lista de nombres. El autómata se construye la primera vez que se usa.
+    """
+
+    def __init__(self, names):
+        """
+        Inicializa una instancia de CityGazetteer.
+
+        Parámetros:
+        - names (iterable): Nombres de ciudades; se pasan a minúsculas y se descartan los vacíos.
+        """
+        self.names = frozenset(name.lower() for name in names if name)
+        self.max_tokens = max((len(TOKEN_PATTERN.findall(name)) for name in self.names), default=0) + 1
+        self._goto = None
+        self._fail = None
+        self._output = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, file_name):
+        """Crea el índice a partir de un JSON con elementos [nombre principal, [nombres alternativos]]."""
+        return cls(name for city in read_cities(file_name) for name in city)
+
+    @classmethod
+    def load(cls, source_file, compiled_file=None):
+        """
+        Carga el gazetteer compilado de `source_file`, compilándolo antes si no existe
+        o si el JSON de origen cambió desde la última compilación.
+
+        Retorna:
+        - CompiledGazetteer: Índice respaldado por el archivo binario mapeado en memoria.
+        """
+        compiled_file = compiled_file or os.path.splitext(source_file)[0] + '.bin'
+        source_hash = file_sha256(source_file)
+        try:
+            gazetteer = CompiledGazetteer(compiled_file)
+            if gazetteer.source_hash == source_hash:
+                return gazetteer
+            gazetteer.close()
+            logger.info(f'"{source_file}" cambió desde la última compilación, se vuelve a compilar "{compiled_file}".')
+        except (OSError, ValueError) as e:
+            logger.info(f'No se pudo abrir "{compiled_file}" ({e}), se compila desde "{source_file}".')
+        compile_gazetteer(source_file, compiled_file)
+        return CompiledGazetteer(compiled_file)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build_automaton(self):
+        goto = [{}]
+        output = [False]
+        # Basta con saber si aparece alguna ciudad: un nombre que empieza con otro ya indexado no agrega nada.
+        for name in sorted(self.names, key=len):
+            state = 0
+            for char in name:
+                if output[state]:
+                    break
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(False)
+                state = next_state
+            output[state] = True
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                output[next_state] = output[next_state] or output[fail[next_state]]
+                queue.append(next_state)
+
+        self._fail = fail
+        self._output = output
+        self._goto = goto
+        logger.info(f'Autómata de {len(goto)} estados para {len(self.names)} nombres de ciudades construido.')
+
+    def contains_any(self, text):
+        """Indica si `text` (en minúsculas) contiene como subcadena algún nombre de ciudad."""
+        if self._goto is None:
+            with self._lock:
+                if self._goto is None:
+                    self._build_automaton()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+
+def file_sha256(file_name):
+    with open(file_name, 'rb') as file:
+        return hashlib.sha256(file.read()).digest()
+
+def read_cities(file_name):
+    """
+    Lee el JSON de ciudades y devuelve, por cada ciudad, la lista [nombre principal, *alternativos]
+    en minúsculas, sin vacíos ni repetidos.
+    """
+    with open(file_name, 'r') as archivo:
+        city_data = json.load(archivo)
+
+    cities = []
+    for city_info in city_data:
+        names = []
+        main_name = city_info[0]
+        if isinstance(main_name, str):
+            names.append(main_name.lower())
+        else:
+            logger.error(f"Nombre principal de ciudad esperado como cadena, encontrado {type(main_name)}: {main_name}")
+
+        for alt_name in city_info[1]:
+            if isinstance(alt_name, str):
+                names.append(alt_name.lower())
+            else:
+                logger.error(f"Nombre alternativo de ciudad esperado como cadena, encontrado {type(alt_name)}: {alt_name}")
+        cities.append(list(dict.fromkeys(name for name in names if name)))
+    return cities
+
+# Formato binario del gazetteer compilado (enteros little-endian sin signo de 32 bits):
+#   cabecera   HEADER
+#   nombres    n_names x (offset, longitud, id de ciudad), offset dentro del bloque de texto
+#   ciudades   n_cities x (nombre principal, primer enlace, cantidad de enlaces)
+#   enlaces    índices de nombres de cada ciudad, incluido el principal
+#   hash       n_slots índices de nombre + 1 (0 = libre), direccionamiento abierto por crc32
+#   texto      nombres normalizados en UTF-8, uno tras otro
+MAGIC = b'CGAZ'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sI32sIIIII')
+NAME = struct.Struct('<III')
+CITY = struct.Struct('<III')
+UINT = struct.Struct('<I')
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+def compile_gazetteer(source_file, compiled_file):
+    """Compila el JSON de ciudades al formato binario y lo reemplaza de forma atómica."""
+    cities = read_cities(source_file)
+    names = []
+    name_index = {}
+    name_city = []
+    links = []
+    city_rows = []
+    for city_id, city_names in enumerate(cities):
+        first_link = len(links)
+        for name in city_names:
+            if name not in name_index:
+                name_index[name] = len(names)
+                names.append(name)
+                name_city.append(city_id)
+            links.append(name_index[name])
+        main = name_index[city_names[0]] if city_names else 0xFFFFFFFF
+        city_rows.append((main, first_link, len(links) - first_link))
+
+    encoded = [name.encode('utf8') for name in names]
+    n_slots = 1
+    while n_slots < 2 * len(names):
+        n_slots *= 2
+    slots = [0] * n_slots
+    for index, data in enumerate(encoded):
+        slot = zlib.crc32(data) & (n_slots - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (n_slots - 1)
+        slots[slot] = index + 1
+    max_tokens = max((len(TOKEN_PATTERN.findall(name)) for name in names), default=0) + 1
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, file_sha256(source_file), len(cities), len(names), n_slots, max_tokens, 0)]
+    offset = 0
+    for data, city_id in zip(encoded, name_city):
+        parts.append(NAME.pack(offset, len(data), city_id))
+        offset += len(data)
+    parts.extend(CITY.pack(*row) for row in city_rows)
+    parts.append(struct.pack(f'<{len(links)}I', *links))
+    parts.append(struct.pack(f'<{n_slots}I', *slots))
+    parts.extend(encoded)
+
+    temporary_file = f'{compiled_file}.{os.getpid()}.tmp'
+    with open(temporary_file, 'wb') as file:
+        file.write(b''.join(parts))
+    os.replace(temporary_file, compiled_file)
+    logger.info(f'Gazetteer compilado en "{compiled_file}": {len(cities)} ciudades, {len(names)} nombres.')
+
+class _CompiledNames:
+    """Conjunto de nombres de solo lectura sobre el archivo compilado."""
+
+    def __init__(self, buffer, header_size, n_names, n_cities, n_links, n_slots):
+        self._buffer = buffer
+        self._n_names = n_names
+        self._names_offset = header_size
+        self._cities_offset = self._names_offset + n_names * NAME.size
+        self._links_offset = self._cities_offset + n_cities * CITY.size
+        self._slots_offset = self._links_offset + n_links * UINT.size
+        self._text_offset = self._slots_offset + n_slots * UINT.size
+        self._mask = n_slots - 1
+
+    def name_at(self, index):
+        offset, length, _ = NAME.unpack_from(self._buffer, self._names_offset + index * NAME.size)
+        start = self._text_offset + offset
+        return self._buffer[start:start + length].decode('utf8')
+
+    def city_of(self, index):
+        return NAME.unpack_from(self._buffer, self._names_offset + index * NAME.size)[2]
+
+    def city_row(self, city_id):
+        return CITY.unpack_from(self._buffer, self._cities_offset + city_id * CITY.size)
+
+    def link_at(self, position):
+        return UINT.unpack_from(self._buffer, self._links_offset + position * UINT.size)[0]
+
+    def index_of(self, name):
+        data = name.encode('utf8')
+        slot = zlib.crc32(data) & self._mask
+        while True:
+            entry = UINT.unpack_from(self._buffer, self._slots_offset + slot * UINT.size)[0]
+            if not entry:
+                return None
+            offset, length, _ = NAME.unpack_from(self._buffer, self._names_offset + (entry - 1) * NAME.size)
+            start = self._text_offset + offset
+            if length == len(data) and self._buffer[start:start + length] == data:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.index_of(name) is not None
+
+    def __iter__(self):
+        return (self.name_at(index) for index in range(self._n_names))
+
+    def __len__(self):
+        return self._n_names
+
+class CompiledGazetteer(CityGazetteer):
+    """
+    Clase CompiledGazetteer, CityGazetteer respaldado por el archivo binario de compile_gazetteer.
+
+    El archivo se mapea en memoria: abrirlo no lee ni procesa los nombres, y
+    varios procesos que lo usan comparten las mismas páginas. Además de las
+    búsquedas de CityGazetteer permite obtener el id de ciudad de un nombre y
+    su nombre principal y nombres alternativos.
+    """
+
+    def __init__(self, compiled_file):
+        """
+        Inicializa una instancia de CompiledGazetteer.
+
+        Parámetros:
+        - compiled_file (str): Archivo generado por compile_gazetteer.
+        """
+        with open(compiled_file, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError('archivo incompleto')
+        magic, version, self.source_hash, n_cities, n_names, n_slots, self.max_tokens, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f'formato {magic!r} v{version} no soportado')
+        n_links = self._count_links(n_cities, n_names)
+        self.names = _CompiledNames(self._mmap, HEADER.size, n_names, n_cities, n_links, n_slots)
+        self.n_cities = n_cities
+        self._goto = None
+        self._fail = None
+        self._output = None
+        self._lock = threading.Lock()
+
+    def _count_links(self, n_cities, n_names):
+        if not n_cities:
+            return 0
+        last = HEADER.size + n_names * NAME.size + (n_cities - 1) * CITY.size
+        _, first_link, count = CITY.unpack_from(self._mmap, last)
+        return first_link + count
+
+    def city_id(self, name):
+        """Id de la ciudad a la que pertenece `name`, o None si no es un nombre conocido."""
+        index = self.names.index_of(name)
+        return None if index is None else self.names.city_of(index)
+
+    def main_name(self, name):
+        city_id = self.city_id(name)
+        if city_id is None:
+            return None
+        main, _, _ = self.names.city_row(city_id)
+        return self.names.name_at(main)
+
+    def alternate_names(self, name):
+        """Todos los nombres (principal y alternativos) de la ciudad a la que pertenece `name`."""
+        city_id = self.city_id(name)
+        if city_id is None:
+            return []
+        _, first_link, count = self.names.city_row(city_id)
+        return [self.names.name_at(self.names.link_at(position)) for position in range(first_link, first_link + count)]
+
+    def close(self):
+        self._mmap.close()
+
+if __name__ == "__main__":
+    import sys
+    source = sys.argv[1] if len(sys.argv) > 1 else 'model/names_of_cities.json'
+    compile_gazetteer(source, sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.bin')
@@ -0,0 +1,87 @@
+# model/inference_bundle.py
+
+import joblib
+import numpy as np
+import spacy
+from datetime import datetime
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLE_FILE = 'model/inference_bundle.pkl'
+
+def nlp_model_name(nlp):
+    """Nombre y versión de un pipeline de spaCy, p. ej. 'es_core_news_sm-3.7.0'."""
+    return _meta_model_name(nlp.meta)
+
+def installed_nlp_model_name(package):
+    """Como nlp_model_name, pero para un modelo instalado como paquete y sin cargarlo."""
+    return _meta_model_name(spacy.util.load_meta(spacy.util.get_package_path(package) / 'meta.json'))
+
+def _meta_model_name(meta):
+    return f"{meta['lang']}_{meta['name']}-{meta['version']}"
+
+class InferenceBundle:
+    """
+    Clase InferenceBundle que agrupa todo lo necesario para clasificar intenciones:
+    el CountVectorizer ajustado, el clasificador y sus etiquetas.
+
+    Se genera al entrenar (model/model_adjustment.py) y el chatbot solo lo carga, sin
+    volver a lematizar ni ajustar nada al iniciar. Guarda además el modelo de spaCy
+    con el que se lematizaron las preguntas, porque otro modelo produce lemas distintos.
+    """
+    VERSION = 1
+
+    def __init__(self, vectorizer, classifier, nlp_model=None, created_at=None, version=VERSION):
+        """
+        Inicializa una instancia de InferenceBundle.
+
+        Parámetros:
+        - vectorizer (CountVectorizer): Vectorizador ajustado con las preguntas de entrenamiento.
+        - classifier: Clasificador entrenado con `predict_proba` y `classes_`.
+        - nlp_model (str): Nombre y versión del modelo de spaCy usado al entrenar, p. ej. 'es_core_news_sm-3.7.0'.
+        - created_at (str): Fecha de creación en formato ISO.
+        - version (int): Versión del formato del archivo.
+        """
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.labels = list(classifier.classes_)
+        self.nlp_model = nlp_model
+        self.created_at = created_at or datetime.now().isoformat(timespec='seconds')
+        self.version = version
+
+    def classify(self, processed_texts):
+        """
+        Clasifica varios textos ya lematizados con una sola matriz y una sola llamada a `predict_proba`.
+
+        Parámetros:
+        - processed_texts (list): Textos lematizados con `preprocess_tokens`.
+
+        Retorna:
+        - list: Tuplas (probabilidad, intención) en el mismo orden que los textos.
+        """
+        if not processed_texts:
+            return []
+        probabilities = self.classifier.predict_proba(self.vectorizer.transform(processed_texts))
+        indexes = probabilities.argmax(axis=1)
+        max_probabilities = probabilities[np.arange(len(indexes)), indexes]
+        intents = np.asarray(self.classifier.classes_)[indexes]
+        return list(zip(max_probabilities.tolist(), intents.tolist()))
+
+    def save(self, file_name=BUNDLE_FILE):
+        joblib.dump({
+            'version': self.version,
+            'created_at': self.created_at,
+            'nlp_model': self.nlp_model,
+            'vectorizer': self.vectorizer,
+            'classifier': self.classifier,
+        }, file_name)
+
+    @classmethod
+    def load(cls, file_name=BUNDLE_FILE):
+        content = joblib.load(file_name)
+        if not isinstance(content, dict):
+            raise ValueError(f'"{file_name}" no es un bundle de inferencia.')
+        if content.get('version') != cls.VERSION:
+            raise ValueError(f"Versión de bundle {content.get('version')} no soportada, se esperaba {cls.VERSION}.")
+        return cls(content['vectorizer'], content['classifier'], content['nlp_model'], content['created_at'], content['version'])
@@ -1,35 +1,106 @@
 # model/model_adjustment.py
+#
+# Entrena el clasificador de intenciones con una búsqueda de hiperparámetros en paralelo
+# y guarda el modelo ganador. Uso (desde la raíz del proyecto):
+#     python -m model.model_adjustment [--cv 5] [--jobs -1]
 
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.metrics import accuracy_score
-import joblib
+import argparse
+import os
+import time
 import numpy as np
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from model.preparation_data import build_corpus, MODEL_NLP
+from model.inference_bundle import InferenceBundle, BUNDLE_FILE, nlp_model_name, installed_nlp_model_name
+
+# alpha=0 deja sin suavizar las palabras que no aparecen en una intención (sklearn lo
+# reemplaza por 1e-10 y avisa), por eso la búsqueda empieza en 0.1.
+PARAM_GRID = {
+    'vectorizer__ngram_range': [(1, 1), (1, 2)],
+    'vectorizer__binary': [False, True],
+    'vectorizer__min_df': [1, 2],
+    'classifier__alpha': [round(alpha, 1) for alpha in np.arange(0.1, 1.1, 0.1)],
+    'classifier__fit_prior': [True, False],
+}
+
+def model_adjustment(texts, labels, param_grid=PARAM_GRID, cv=5, n_jobs=-1, test_size=0.2):
+    """
+    Busca la mejor combinación de vectorizador y clasificador con validación cruzada.
+
+    Cada combinación de `param_grid` se evalúa con `cv` particiones estratificadas del
+    80% de entrenamiento, repartiendo los ajustes entre `n_jobs` procesos (-1 = todos
+    los núcleos). El 20% restante solo se usa para informar la precisión final; después
+    el ganador se vuelve a ajustar con todas las preguntas.
+
+    Parámetros:
+    - texts (list): Preguntas lematizadas.
+    - labels (array): Intención de cada pregunta.
+    - param_grid (dict): Parámetros del Pipeline ('vectorizer__*', 'classifier__*') a probar.
+    - cv (int): Cantidad de particiones de la validación cruzada.
+    - n_jobs (int): Procesos a usar.
+    - test_size (float): Proporción de preguntas reservadas para la evaluación final.
 
-from preparation_data import X_train, X_test, y_train, y_test
+    Retorna:
+    - Pipeline: Vectorizador y clasificador ganadores, ajustados con todas las preguntas.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=test_size, random_state=42)
+    pipeline = Pipeline([('vectorizer', CountVectorizer()), ('classifier', MultinomialNB())])
+    search = GridSearchCV(pipeline, param_grid, scoring='accuracy', n_jobs=n_jobs,
+                          cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=42))
 
-OPTIMIZED_MODEL_FILE = 'model/optimized_classification_model.pkl'
+    start = time.perf_counter()
+    search.fit(X_train, y_train)
+    elapsed = time.perf_counter() - start
 
-def model_adjustment(X_train, y_train, X_test, y_test):
-    better_alpha = 0
-    better_precision = 0
-    better_model = None
+    candidates = len(search.cv_results_['params'])
+    print(f"{candidates} combinaciones x {cv} particiones = {candidates * cv} ajustes en {elapsed:.1f} s "
+          f"({search.cv_results_['mean_fit_time'].mean() * 1000:.1f} ms por ajuste)")
+    for rank, index in enumerate(np.argsort(search.cv_results_['rank_test_score'], kind='stable')[:5], 1):
+        print(f"  {rank}. {search.cv_results_['params'][index]}: "
+              f"precisión = {search.cv_results_['mean_test_score'][index]:.4f} ± {search.cv_results_['std_test_score'][index]:.4f}")
+    print(f"\nMejores parámetros: {search.best_params_}")
+    print(f"Precisión en validación cruzada: {search.best_score_:.4f}; en test: {search.score(X_test, y_test):.4f}")
+    return clone(search.best_estimator_).fit(texts, labels)
 
-    for alpha in np.arange(0.0, 1.1, 0.1):
-        model = MultinomialNB(alpha=alpha)
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        precision = accuracy_score(y_test, y_pred)
+def train(nlp=None, cv=5, n_jobs=-1, n_process=1):
+    """
+    Lematiza el corpus (solo lo que cambió desde la última vez), busca el mejor modelo
+    y lo devuelve listo para guardar.
 
-        print(f"Probando alpha={alpha}: Precisión = {precision}")
+    Retorna:
+    - InferenceBundle: Vectorizador y clasificador ganadores.
+    """
+    start = time.perf_counter()
+    texts, labels = build_corpus(nlp, n_process)
+    print(f"{len(texts)} preguntas lematizadas en {time.perf_counter() - start:.1f} s")
+    best_model = model_adjustment(texts, labels, cv=cv, n_jobs=n_jobs)
+    nlp_model = nlp_model_name(nlp) if nlp is not None else installed_nlp_model_name(MODEL_NLP)
+    return InferenceBundle(best_model.named_steps['vectorizer'], best_model.named_steps['classifier'], nlp_model)
 
-        if precision > better_precision:
-            better_alpha = alpha
-            better_precision = precision
-            better_model = model
+def save_trained(bundle, bundle_file=BUNDLE_FILE):
+    """
+    Guarda el bundle de inferencia en `bundle_file`. El vectorizador y el clasificador se
+    guardan siempre juntos: el clasificador solo sirve con el vectorizador con el que se ajustó.
+    """
+    bundle.save(bundle_file)
+    print(f"Bundle de inferencia guardado como '{bundle_file}'")
 
-    print(f"\nMejor alpha: {better_alpha} con una precisión de: {better_precision}")
-    return better_model
+def main():
+    parser = argparse.ArgumentParser(description='Entrena el clasificador de intenciones y guarda el mejor modelo.')
+    parser.add_argument('--cv', type=int, default=5, help='particiones de la validación cruzada')
+    parser.add_argument('--jobs', type=int, default=-1, help='procesos a usar (-1 = todos los núcleos)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='procesos de spaCy para lematizar las preguntas que cambiaron')
+    parser.add_argument('--bundle-file', default=BUNDLE_FILE, help='archivo del bundle de inferencia')
+    args = parser.parse_args()
 
-optimized_model = model_adjustment(X_train, y_train, X_test, y_test)
+    start = time.perf_counter()
+    save_trained(train(cv=args.cv, n_jobs=args.jobs, n_process=args.processes), args.bundle_file)
+    print(f"Entrenamiento completo en {time.perf_counter() - start:.1f} s")
 
-joblib.dump(optimized_model, OPTIMIZED_MODEL_FILE)
+if __name__ == "__main__":
+    main()
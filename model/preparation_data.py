@@ -1,10 +1,12 @@
 # model/preparacion_datos.py
 
+import hashlib
 import json
+import os
+import time
 import spacy
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.model_selection import train_test_split
 import numpy as np
+from model.inference_bundle import nlp_model_name, installed_nlp_model_name
 from log_config import get_logger
 
 logger = get_logger(__name__)
@@ -12,12 +14,15 @@ logger = get_logger(__name__)
 # nlp = spacy.load('es_core_news_md')
 # nlp = spacy.load('es_core_news_lg')
 MODEL_NLP = 'es_core_news_sm'
-MODEL_NLP_LOADED = 'model/nlp_cargado'
-try:
-    nlp = spacy.load(MODEL_NLP_LOADED)
-except:
+
+PREPROCESS_CACHE_DIR = 'model/preprocess_cache'
+# Aumentar si cambia preprocess_tokens, para descartar lo guardado en la caché.
+PREPROCESS_VERSION = 1
+
+def load_nlp():
     nlp = spacy.load(MODEL_NLP)
     logger.info(f"{MODEL_NLP}")
+    return nlp
 
 
 keyword_files = {
@@ -40,27 +45,91 @@ def load_data(file_name):
         datos = json.load(file)
     return datos
 
-def preprocess_question(question, keywords_intention, nlp):
-    doc = nlp(question)
+def preprocess_tokens(tokens, keywords_intention):
+    """Lematiza un Doc o Span ya analizado por spaCy, sin volver a pasarlo por el pipeline."""
     processed_words = []
-    for token in doc:
+    for token in tokens:
         if not token.is_stop and token.is_alpha:
             processed_words.append(token.lemma_)
             if token.text in keywords_intention:
                 processed_words.append(token.lemma_)
     return ' '.join(processed_words)
 
-vectorizer = CountVectorizer()
-X = []
-y = []
+def preprocess_cache_key(intention, nlp_model):
+    """Hash del contenido de los archivos de preguntas y palabras clave, del modelo de spaCy y del preprocesamiento."""
+    digest = hashlib.sha256(f"{PREPROCESS_VERSION}:{nlp_model}".encode('utf8'))
+    for file_name in (files_questions[intention], keyword_files[intention]):
+        with open(file_name, 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+def _cache_file(cache_dir, intention):
+    return os.path.join(cache_dir, f'{intention}.json')
+
+def _read_cached(cache_dir, intention, key):
+    try:
+        with open(_cache_file(cache_dir, intention), 'r', encoding="utf8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return cached['texts'] if cached.get('key') == key else None
+
+def _write_cached(cache_dir, intention, key, texts):
+    os.makedirs(cache_dir, exist_ok=True)
+    file_name = _cache_file(cache_dir, intention)
+    temporary_file = f'{file_name}.{os.getpid()}.tmp'
+    with open(temporary_file, 'w', encoding="utf8") as file:
+        json.dump({'key': key, 'texts': texts}, file, ensure_ascii=False)
+    os.replace(temporary_file, file_name)
+
+def build_corpus(nlp=None, n_process=1, cache_dir=PREPROCESS_CACHE_DIR):
+    """
+    Lematiza las preguntas de entrenamiento de todas las intenciones.
+
+    Las preguntas lematizadas de cada intención se guardan en `cache_dir` junto con un hash
+    del contenido de sus archivos y del modelo de spaCy; en las siguientes ejecuciones solo
+    se vuelven a lematizar las intenciones cuyos archivos cambiaron, todas juntas con
+    `nlp.pipe`. Si no cambió ninguna, ni siquiera se carga spaCy.
+
+    Parámetros:
+    - nlp (Language): Pipeline de spaCy; si es None se carga solo si hace falta lematizar.
+    - n_process (int): Procesos que usa `nlp.pipe` para lematizar.
+    - cache_dir (str): Carpeta de la caché, o None para no usarla.
+
+    Retorna:
+    - tuple: (textos lematizados, np.array con la intención de cada texto).
+    """
+    nlp_model = nlp_model_name(nlp) if nlp is not None else installed_nlp_model_name(MODEL_NLP)
+    texts_by_intention = {}
+    pending = {}
+    for intention in files_questions:
+        key = preprocess_cache_key(intention, nlp_model)
+        cached = _read_cached(cache_dir, intention, key) if cache_dir else None
+        if cached is None:
+            pending[intention] = key
+        else:
+            texts_by_intention[intention] = cached
 
-for intention, file_questions in files_questions.items():
-    preguntas = load_data(file_questions)
-    keywords_intention = load_data(keyword_files[intention])
-    for question in preguntas:
-        processed_question = preprocess_question(question, keywords_intention, nlp)
-        X.append(processed_question)
-        y.append(intention)
+    if pending:
+        start = time.perf_counter()
+        if nlp is None:
+            nlp = load_nlp()
+        # Todas las preguntas pendientes van en un solo nlp.pipe para repartirlas entre los procesos.
+        questions = {intention: load_data(files_questions[intention]) for intention in pending}
+        docs = nlp.pipe((question for intention in pending for question in questions[intention]),
+                        n_process=n_process, batch_size=256)
+        for intention, key in pending.items():
+            keywords_intention = load_data(keyword_files[intention])
+            texts = [preprocess_tokens(next(docs), keywords_intention) for _ in questions[intention]]
+            texts_by_intention[intention] = texts
+            if cache_dir:
+                _write_cached(cache_dir, intention, key, texts)
+        logger.info(f"{sum(len(texts_by_intention[intention]) for intention in pending)} preguntas de "
+                    f"{len(pending)} intenciones lematizadas en {time.perf_counter() - start:.1f} s.")
 
-vectores = vectorizer.fit_transform(X)
-X_train, X_test, y_train, y_test = train_test_split(vectores, np.array(y), test_size=0.2, random_state=42)
+    X = []
+    y = []
+    for intention in files_questions:
+        X.extend(texts_by_intention[intention])
+        y.extend([intention] * len(texts_by_intention[intention]))
+    return X, np.array(y)
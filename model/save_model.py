@@ -1,13 +1,9 @@
 # model/save_model.py
+#
+# Se mantiene por compatibilidad: entrena y guarda el modelo igual que model_adjustment.
+# Uso (desde la raíz del proyecto): python -m model.save_model
 
-import joblib
+from model.model_adjustment import main
 
-from model_adjustment import optimized_model
-
-FINAL_MODEL_FILE = 'model/final_classification_model.pkl'
-
-def save_model(modelo, file_name):
-    joblib.dump(modelo, file_name)
-    print(f"Modelo guardado como '{file_name}'")
-
-save_model(optimized_model, FINAL_MODEL_FILE)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# model/text_correction.py
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import language_tool_python
+from weather_package.cache import TTLCache
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+def normalize_text(text):
+    """Normaliza un mensaje para usarlo como clave: sin espacios sobrantes."""
+    return ' '.join(text.split())
+
+def build_vocabulary(texts):
+    """Conjunto de palabras en minúsculas que aparecen en `texts`."""
+    vocabulary = set()
+    for text in texts:
+        vocabulary.update(WORD_PATTERN.findall(text.lower()))
+    return frozenset(vocabulary)
+
+class SpellingCorrector:
+    """
+    Clase SpellingCorrector, corrección ortográfica con LanguageTool acotada y cacheada.
+
+    - Los mensajes ya corregidos se recuerdan en una caché LRU por texto normalizado.
+    - Si todas las palabras del mensaje están en el vocabulario conocido, no se consulta LanguageTool.
+    - Cada corrección tiene un tiempo máximo, que incluye la espera de cada llamada a LanguageTool
+      (se hace en un hilo aparte y se deja de esperar al agotarse el tiempo); al agotarlo se
+      devuelve el texto corregido hasta ese momento.
+    Lleva contadores de uso y de iteraciones de LanguageTool.
+    """
+    CHECK_THREADS = 4
+
+    def __init__(self, tool, ignore_match=None, vocabulary=frozenset(), cache_size=1024, time_budget=2.0):
+        """
+        Inicializa una instancia de SpellingCorrector.
+
+        Parámetros:
+        - tool (LanguageTool): Corrector de LanguageTool.
+        - ignore_match (callable): Recibe una coincidencia de LanguageTool y devuelve True si no debe corregirse.
+        - vocabulary (set): Palabras en minúsculas que se consideran correctas.
+        - cache_size (int): Cantidad de mensajes corregidos que se recuerdan.
+        - time_budget (float): Segundos máximos por corrección, o None para no limitar.
+        """
+        self.tool = tool
+        self.ignore_match = ignore_match or (lambda match: False)
+        self.vocabulary = vocabulary
+        self.time_budget = time_budget
+        self._cache = TTLCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self.corrections = 0
+        self.fast_path = 0
+        self.iterations = 0
+        self.max_iterations_used = 0
+        self.budget_exceeded = 0
+
+    def is_known(self, text):
+        return all(word in self.vocabulary for word in WORD_PATTERN.findall(text.lower()))
+
+    def correct(self, text, max_iterations=10):
+        return self.correct_with_status(text, max_iterations)[0]
+
+    def correct_with_status(self, text, max_iterations=10):
+        """
+        Como correct, pero indica además si la corrección terminó.
+
+        Retorna:
+        - tuple: (texto corregido, False si se cortó por superar `time_budget`).
+        """
+        key = normalize_text(text)
+        corrected = self._cache.get(key)
+        if corrected is not None:
+            return corrected, True
+
+        if self.is_known(key):
+            with self._lock:
+                self.fast_path += 1
+            self._cache.set(key, key)
+            return key, True
+
+        corrected, iterations, exhausted = self._correct_with_tool(key, max_iterations)
+        with self._lock:
+            self.corrections += 1
+            self.iterations += iterations
+            self.max_iterations_used = max(self.max_iterations_used, iterations)
+            self.budget_exceeded += exhausted
+        if not exhausted:
+            self._cache.set(key, corrected)
+        return corrected, not exhausted
+
+    def _get_executor(self):
+        # Los hilos no sobreviven a un fork: cada proceso crea su propio pool.
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.CHECK_THREADS, thread_name_prefix='languagetool')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _check(self, text, timeout):
+        """Llama a LanguageTool esperando como mucho `timeout` segundos (None = sin límite)."""
+        if timeout is None:
+            return self.tool.check(text)
+        future = self._get_executor().submit(self.tool.check, text)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _correct_with_tool(self, text, max_iterations):
+        start = time.perf_counter()
+        iterations = 0
+        for _ in range(max_iterations):
+            remaining = None if self.time_budget is None else self.time_budget - (time.perf_counter() - start)
+            if remaining is not None and remaining <= 0:
+                return self._cut(text, iterations)
+            iterations += 1
+            try:
+                matches = self._check(text, remaining)
+            except FutureTimeoutError:
+                return self._cut(text, iterations)
+            matches = [rule for rule in matches if not self.ignore_match(rule) and rule.replacements]
+            if not matches:
+                break
+            corrected = language_tool_python.utils.correct(text, matches)
+            # Si nada cambió, volver a consultar LanguageTool daría las mismas coincidencias.
+            if corrected == text:
+                break
+            text = corrected
+        return text, iterations, False
+
+    def _cut(self, text, iterations):
+        logger.warning(f'Corrección cortada tras {iterations} iteraciones por superar {self.time_budget} s.')
+        return text, iterations, True
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'corrections': self.corrections,
+                'fast_path': self.fast_path,
+                'iterations': self.iterations,
+                'max_iterations_used': self.max_iterations_used,
+                'budget_exceeded': self.budget_exceeded,
+            }
+        cache_stats = self._cache.stats()
+        stats['cache_hits'] = cache_stats['hits']
+        stats['cache_size'] = cache_stats['size']
+        return stats
@@ -0,0 +1,123 @@
+# query_executor.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from log_config import get_logger
+from metrics import Counter, Gauge
+from worker_pool import ForkedWorkerPool
+
+logger = get_logger(__name__)
+
+EXECUTOR_WAITING = Gauge('bot_executor_waiting', 'Consultas esperando un lugar en el pool.')
+EXECUTOR_IN_FLIGHT = Gauge('bot_executor_in_flight', 'Consultas ejecutándose en el pool.')
+EXECUTOR_REJECTED = Counter('bot_executor_rejected_total', 'Consultas rechazadas por tener la cola llena.')
+
+_worker_bot = None
+
+def _init_worker(bot_factory):
+    """Crea el chatbot de cada proceso worker una única vez."""
+    global _worker_bot
+    _worker_bot = bot_factory()
+
+def _run_query(texto):
+    return _worker_bot.process_query(texto)
+
+class ExecutorBusyError(Exception):
+    """Se lanza cuando la cola de espera del QueryExecutor está llena."""
+
+class QueryExecutor:
+    """
+    Clase QueryExecutor para ejecutar `process_query` fuera del event loop.
+
+    Las consultas se envían a un pool de hilos o de procesos y se esperan con
+    `await`, de modo que una consulta lenta no bloquea al resto de los chats.
+    Se limita la cantidad de consultas en ejecución y la cantidad de consultas
+    esperando turno; al superar esta última se lanza ExecutorBusyError.
+    """
+    MODES = ('thread', 'process', 'fork')
+
+    def __init__(self, bot_factory, mode='thread', workers=1, max_in_flight=None, max_queue=100,
+                 health_interval=5.0, health_timeout=10.0, query_timeout=60.0):
+        """
+        Inicializa una instancia de QueryExecutor.
+
+        Parámetros:
+        - bot_factory (callable): Construye un chatbot con método `process_query`.
+        - mode (str): 'thread' comparte un chatbot entre hilos; 'process' crea uno por proceso;
+          'fork' carga uno en este proceso y lo comparte copy-on-write con procesos hijos (ver ForkedWorkerPool).
+        - workers (int): Tamaño del pool.
+        - max_in_flight (int): Máximo de consultas ejecutándose a la vez (por defecto: workers).
+        - max_queue (int): Máximo de consultas esperando un lugar libre.
+        - health_interval, health_timeout, query_timeout (float): Comprobaciones de salud de los workers en modo 'fork'.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de ejecución desconocido '{mode}', se esperaba uno de {self.MODES}.")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_in_flight = max(1, max_in_flight or self.workers)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = None
+
+        if mode == 'thread':
+            self._bot = bot_factory()
+            self._bot.warm_up()
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='query')
+        elif mode == 'fork':
+            self._bot = None
+            bot = bot_factory()
+            bot.warm_up()
+            self._pool = ForkedWorkerPool(bot, self.workers, health_interval, health_timeout, query_timeout)
+        else:
+            self._bot = None
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(bot_factory,))
+        logger.info(f'Pool de consultas en modo "{mode}" con {self.workers} workers, '
+                    f'{self.max_in_flight} en ejecución y {self.max_queue} en espera como máximo.')
+
+    def _call(self, texto):
+        if self._bot is not None:
+            return self._bot.process_query, texto
+        return _run_query, texto
+
+    async def submit(self, texto):
+        """Procesa `texto` en el pool y devuelve la respuesta del chatbot."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            EXECUTOR_REJECTED.inc()
+            raise ExecutorBusyError(f'{self.waiting} consultas en espera.')
+
+        self.waiting += 1
+        try:
+            with EXECUTOR_WAITING.track_in_progress():
+                await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            with EXECUTOR_IN_FLIGHT.track_in_progress():
+                if self.mode == 'fork':
+                    return await self._pool.submit(texto)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, *self._call(texto))
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    @property
+    def bot(self):
+        """Bot que atiende las consultas en modo 'thread'; en los demás modos corre en otros procesos y es None."""
+        return self._bot
+
+    def worker_pids(self):
+        """Pids de los workers en modo 'fork'; en los demás modos, una lista vacía."""
+        return self._pool.worker_pids() if self.mode == 'fork' else []
+
+    def worker_stats(self):
+        """Workers vivos y reinicios en modo 'fork'; en los demás modos, None."""
+        return self._pool.worker_stats() if self.mode == 'fork' else None
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,84 @@
+# tests/test_admission.py
+
+import pytest
+from admission import AdmissionController, AdmissionRejectedError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def rejection(controller, chat_id, texto='¿Qué temperatura hace en Madrid?'):
+    with pytest.raises(AdmissionRejectedError) as excinfo:
+        controller.admit(chat_id, texto)
+    return excinfo.value
+
+def test_burst_then_rate_limited():
+    clock = FakeClock()
+    controller = AdmissionController(rate=0.5, burst=3, clock=clock)
+    for _ in range(3):
+        controller.admit(1, 'hola')
+    error = rejection(controller, 1)
+    assert error.reason == 'rate_limited'
+    assert error.notify
+    assert controller.retry_after(1) == pytest.approx(2.0)
+
+def test_tokens_refill_with_time():
+    clock = FakeClock()
+    controller = AdmissionController(rate=0.5, burst=1, clock=clock)
+    controller.admit(1, 'hola')
+    rejection(controller, 1)
+    clock.now += 2.0
+    controller.admit(1, 'hola')
+
+def test_only_first_rejection_of_a_burst_notifies():
+    clock = FakeClock()
+    controller = AdmissionController(rate=1, burst=1, clock=clock)
+    controller.admit(1, 'hola')
+    assert rejection(controller, 1).notify
+    assert not rejection(controller, 1).notify
+    assert not rejection(controller, 1).notify
+    clock.now += 1.0
+    controller.admit(1, 'hola')
+    assert rejection(controller, 1).notify
+
+def test_chats_are_limited_independently():
+    clock = FakeClock()
+    controller = AdmissionController(rate=1, burst=1, clock=clock)
+    controller.admit(1, 'hola')
+    rejection(controller, 1)
+    controller.admit(2, 'hola')
+
+def test_long_messages_consume_tokens_and_notify_once():
+    clock = FakeClock()
+    controller = AdmissionController(rate=1, burst=3, max_message_chars=10, clock=clock)
+    long_text = 'x' * 11
+    results = [rejection(controller, 1, long_text) for _ in range(5)]
+    assert [error.reason for error in results] == ['too_long'] * 3 + ['rate_limited'] * 2
+    assert [error.notify for error in results] == [True, False, False, True, False]
+
+def test_long_message_after_admitted_one_notifies_again():
+    clock = FakeClock()
+    controller = AdmissionController(rate=1, burst=5, max_message_chars=10, clock=clock)
+    assert rejection(controller, 1, 'x' * 11).notify
+    controller.admit(1, 'hola')
+    assert rejection(controller, 1, 'x' * 11).notify
+
+def test_without_rate_only_length_is_checked():
+    controller = AdmissionController(rate=0, max_message_chars=10, clock=FakeClock())
+    for _ in range(100):
+        controller.admit(1, 'hola')
+    assert rejection(controller, 1, 'x' * 11).reason == 'too_long'
+    assert controller.retry_after(1) == 0.0
+
+def test_inactive_chats_are_forgotten_first():
+    clock = FakeClock()
+    controller = AdmissionController(rate=1, burst=1, max_chats=2, clock=clock)
+    controller.admit(1, 'hola')
+    controller.admit(2, 'hola')
+    rejection(controller, 1)  # el chat 1 pasa a ser el más reciente
+    controller.admit(3, 'hola')  # se olvida el chat 2
+    controller.admit(2, 'hola')
+    rejection(controller, 3)
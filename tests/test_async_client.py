@@ -0,0 +1,83 @@
+# tests/test_async_client.py
+
+import asyncio
+import pytest
+from benchmarks.stubs import FakeOpenWeatherMap
+from weather_package.async_client import AsyncWeatherClient
+from weather_package.cache import TTLCache
+from weather_package.city_ids import city_ids
+from weather_package.config import Config
+from weather_package.weather_api import WeatherData
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(WeatherData, '_cache', TTLCache(maxsize=1000, ttl=3600))
+    with FakeOpenWeatherMap() as server:
+        yield server
+    city_ids.clear()
+
+def fetch_many(cities):
+    async def run():
+        async with AsyncWeatherClient() as client:
+            return await client.fetch_many(cities)
+    return asyncio.run(run())
+
+def learn_ids(server, cities):
+    """Pide cada ciudad por nombre para que se aprenda su id y vacía la caché."""
+    fetch_many(cities)
+    WeatherData._cache.clear()
+    server.requests = server.group_requests = 0
+
+def test_unknown_cities_are_fetched_by_name(server):
+    cities = [f'ciudad {index}' for index in range(5)]
+    results = fetch_many(cities)
+    assert all(results[city]['name'] == city.title() for city in cities)
+    assert server.requests == 5
+    assert server.group_requests == 0
+    assert all(city in city_ids for city in cities)
+
+def test_cached_cities_are_not_requested(server):
+    fetch_many(['madrid', 'lima'])
+    server.requests = 0
+    fetch_many(['Madrid', 'lima', 'quito'])
+    assert server.requests == 1
+
+def test_known_ids_are_fetched_in_chunks(server, monkeypatch):
+    monkeypatch.setattr(Config, 'GROUP_CHUNK_SIZE', 20)
+    cities = [f'ciudad {index}' for index in range(45)]
+    learn_ids(server, cities)
+    results = fetch_many(cities)
+    assert server.group_requests == 3
+    assert server.requests == 3
+    assert all(results[city]['name'] == city.title() for city in cities)
+    # Las respuestas de `group` se adaptan al formato de /weather.
+    assert all('timezone' in results[city] for city in cities)
+    assert WeatherData._cache.get(('ciudad 0', Config.UNITS, Config.LANGUAGE)) is not None
+
+def test_cities_missing_from_the_group_answer_are_fetched_by_name(server):
+    cities = [f'ciudad {index}' for index in range(6)]
+    learn_ids(server, cities)
+    for city in cities[:2]:
+        del server.cities_by_id[city_ids.get(city)]
+    results = fetch_many(cities)
+    assert server.group_requests == 1
+    assert server.requests == 3
+    assert all(results[city] is not None for city in cities)
+
+@pytest.mark.parametrize('body', [{'cnt': 0}, {'list': 'x'}, {'list': [{'name': 'sin id'}]}, ['no es un objeto']])
+def test_invalid_group_answers_fall_back_to_names(server, monkeypatch, body):
+    cities = [f'ciudad {index}' for index in range(4)]
+    learn_ids(server, cities)
+    monkeypatch.setattr(server, 'handle_group', lambda query: (200, body))
+    results = fetch_many(cities)
+    assert server.group_requests == 1
+    assert server.requests == 5
+    assert all(results[city] is not None for city in cities)
+
+def test_failed_group_request_falls_back_to_names(server, monkeypatch):
+    cities = [f'ciudad {index}' for index in range(4)]
+    learn_ids(server, cities)
+    monkeypatch.setattr(server, 'handle_group', lambda query: (500, {'cod': 500}))
+    results = fetch_many(cities)
+    assert server.requests == 5
+    assert all(results[city] is not None for city in cities)
@@ -0,0 +1,25 @@
+# tests/test_batch_queries.py
+
+import io
+import json
+from batch_queries import process_stream, read_messages
+from model.chatbot import ErrorResponse
+
+class FakeBot:
+    """Responde en mayúsculas; los mensajes 'fallar' terminan como en process_query cuando algo falla."""
+
+    def process_queries(self, texts, parse_only=False):
+        return [ErrorResponse('Hubo un error') if texto == 'fallar' else texto.upper() for texto in texts]
+
+def run(lines):
+    output = io.StringIO()
+    count = process_stream(read_messages(lines), output, workers=1, bot_factory=FakeBot)
+    return count, [json.loads(line) for line in output.getvalue().splitlines()]
+
+def test_error_responses_are_written_as_errors():
+    count, results = run(['{"text": "hola", "id": 1}', '{"text": "fallar", "id": 2}'])
+    assert count == 2
+    assert results == [
+        {'text': 'hola', 'id': 1, 'response': 'HOLA'},
+        {'text': 'fallar', 'id': 2, 'error': 'Hubo un error'},
+    ]
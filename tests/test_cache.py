@@ -0,0 +1,132 @@
+# tests/test_cache.py
+
+import os
+import time
+import pytest
+from weather_package.cache import SqliteCache, TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, timer=clock)
+    cache.set('madrid', 1)
+    clock.now = 9.9
+    assert cache.get('madrid') == 1
+    assert cache.age('madrid') == 9.9
+    clock.now = 10
+    assert cache.get('madrid') is None
+    assert cache.age('madrid') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_explicit_storage_time_keeps_original_age():
+    clock = FakeClock()
+    clock.now = 100
+    cache = TTLCache(maxsize=4, ttl=10, timer=clock)
+    cache.set('madrid', 1, storage_time=95)
+    assert cache.age('madrid') == 5
+    clock.now = 105
+    assert cache.get('madrid') is None
+
+def test_without_ttl_entries_do_not_expire():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, timer=clock)
+    cache.set('madrid', 1)
+    clock.now = 1e9
+    assert cache.get('madrid') == 1
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set('madrid', 1)
+    cache.set('lima', 2)
+    assert cache.get('madrid') == 1  # lima queda como la menos usada
+    cache.set('quito', 3)
+    assert cache.get('lima') is None
+    assert cache.get('madrid') == 1
+    assert cache.get('quito') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_overwriting_refreshes_recency_without_evicting():
+    cache = TTLCache(maxsize=2)
+    cache.set('madrid', 1)
+    cache.set('lima', 2)
+    cache.set('madrid', 3)
+    cache.set('quito', 4)
+    assert cache.get('lima') is None
+    assert cache.get('madrid') == 3
+    assert len(cache) == 2
+
+def test_age_does_not_count_as_lookup():
+    cache = TTLCache(maxsize=2)
+    cache.set('madrid', 1)
+    cache.age('madrid')
+    cache.age('lima')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (0, 0)
+    cache.get('madrid')
+    cache.get('lima')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+@pytest.fixture
+def clock(monkeypatch):
+    # SqliteCache guarda time.time() en el archivo, así que se reemplaza el reloj del módulo time.
+    clock = FakeClock()
+    clock.now = 1000.0
+    monkeypatch.setattr(time, 'time', clock)
+    return clock
+
+def test_sqlite_age_and_expiry(tmp_path, clock):
+    cache = SqliteCache(str(tmp_path / 'cache.sqlite'), maxsize=8, ttl=10)
+    cache.set(('madrid', 'metric'), {'temp': 20})
+    clock.now += 4
+    assert cache.age(('madrid', 'metric')) == 4
+    assert cache.get(('madrid', 'metric')) == {'temp': 20}
+    clock.now += 6
+    assert cache.get(('madrid', 'metric')) is None
+    assert cache.age(('lima', 'metric')) is None
+
+def test_sqlite_age_survives_reopening(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    SqliteCache(path, ttl=10).set('madrid', 1)
+    clock.now += 3
+    reopened = SqliteCache(path, ttl=10)
+    assert reopened.age('madrid') == 3
+    clock.now += 7
+    assert reopened.get('madrid') is None
+
+def test_sqlite_prune_removes_expired_and_oldest(tmp_path, clock):
+    cache = SqliteCache(str(tmp_path / 'cache.sqlite'), maxsize=2, ttl=10)
+    for name in ('madrid', 'lima', 'quito', 'bogotá'):
+        cache.set(name, name)
+        clock.now += 1
+    cache.prune()
+    assert len(cache) == 2
+    assert cache.stats()['evictions'] == 2
+    fresh = SqliteCache(cache.path, maxsize=2, ttl=10)
+    assert [fresh.get(name) for name in ('madrid', 'lima', 'quito', 'bogotá')] == [None, None, 'quito', 'bogotá']
+
+    clock.now += 10
+    cache.prune()
+    assert len(cache) == 0
+
+def test_sqlite_reconnects_after_fork(tmp_path, clock):
+    cache = SqliteCache(str(tmp_path / 'cache.sqlite'), ttl=100)
+    cache.set('madrid', 1)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            # El hijo no puede usar la conexión heredada: debe abrir la suya y ver lo que escribió el padre.
+            ok = len(cache) == 1
+            cache.set('lima', 2)
+        except Exception:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert cache.get('lima') == 2
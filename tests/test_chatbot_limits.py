@@ -0,0 +1,69 @@
+# tests/test_chatbot_limits.py
+
+from model.chatbot import ErrorResponse, WeatherChatbot
+
+def make_bot(max_sentences=5, max_cities=5):
+    # limit_analysis no usa los modelos, así que no hace falta inicializar el bot.
+    bot = WeatherChatbot.__new__(WeatherChatbot)
+    bot.MAX_SENTENCES = max_sentences
+    bot.MAX_CITIES = max_cities
+    return bot
+
+def sentence(cities, probability=0.9, intent='get_temperature_response'):
+    return (f"¿Qué temperatura hace en {' y '.join(cities)}?", probability, intent, tuple(cities))
+
+def test_within_limits_is_unchanged():
+    analyzed = (sentence(['madrid']), sentence(['lima', 'quito']))
+    assert make_bot().limit_analysis(analyzed) == (analyzed, False)
+
+def test_sentences_over_the_limit_are_dropped():
+    analyzed = tuple(sentence([f'ciudad {index}']) for index in range(7))
+    limited, truncated = make_bot(max_sentences=5, max_cities=10).limit_analysis(analyzed)
+    assert truncated
+    assert limited == analyzed[:5]
+
+def test_cities_over_the_limit_are_dropped():
+    analyzed = (sentence(['madrid', 'lima', 'quito']), sentence(['bogotá', 'quito', 'caracas']))
+    limited, truncated = make_bot(max_cities=4).limit_analysis(analyzed)
+    assert truncated
+    assert [cities for _, _, _, cities in limited] == [('madrid', 'lima', 'quito'), ('bogotá', 'quito')]
+
+def test_sentences_left_without_cities_are_omitted():
+    analyzed = (sentence(['madrid', 'lima']), sentence(['quito']), sentence(['lima']))
+    limited, truncated = make_bot(max_cities=2).limit_analysis(analyzed)
+    assert truncated
+    assert [cities for _, _, _, cities in limited] == [('madrid', 'lima'), ('lima',)]
+
+def test_repeated_cities_count_once():
+    analyzed = tuple(sentence(['madrid']) for _ in range(3))
+    limited, truncated = make_bot(max_cities=1).limit_analysis(analyzed)
+    assert not truncated
+    assert limited == analyzed
+
+def test_unclear_sentences_do_not_use_the_city_limit():
+    analyzed = (sentence(['madrid', 'lima'], probability=0.2), sentence(['quito']))
+    limited, truncated = make_bot(max_cities=1).limit_analysis(analyzed)
+    assert not truncated
+    assert limited == analyzed
+
+def test_failed_query_returns_error_response():
+    bot = make_bot()
+    bot.parse_query = lambda texto: 1 / 0
+    response = bot.process_query('¿Qué temperatura hace en Madrid?')
+    assert isinstance(response, ErrorResponse)
+    assert response == 'Hubo un error al procesar tu solicitud, vuelve a intentarlo.'
+
+def test_failed_weather_fetch_returns_error_response(monkeypatch):
+    import model.chatbot
+    from weather_package.weather_api import WeatherData
+    fetched = []
+    def fetch_many_sync(cities):
+        fetched.append(list(cities))
+        return {'madrid': {'name': 'Madrid'}, 'lima': None}
+    monkeypatch.setattr(model.chatbot, 'fetch_many_sync', fetch_many_sync)
+    monkeypatch.setattr(WeatherData, 'get_climate', lambda self: fetched.append(self.city))
+    analyzed = (sentence(['lima', 'madrid']),)
+    response = make_bot()._process_query('¿Qué temperatura hace en Lima y Madrid?', analyzed)
+    assert isinstance(response, ErrorResponse)
+    # La ciudad que falló no se vuelve a pedir por otro camino.
+    assert fetched == [['lima', 'madrid']]
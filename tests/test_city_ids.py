@@ -0,0 +1,73 @@
+# tests/test_city_ids.py
+
+import gzip
+import json
+from weather_package.city_ids import CityIdIndex
+
+def test_learn_is_normalized_and_persisted(tmp_path):
+    path = tmp_path / 'ids.jsonl'
+    index = CityIdIndex(str(path))
+    index.learn('  Buenos   Aires ', 3435910)
+    assert index.get('buenos aires') == 3435910
+    assert 'BUENOS AIRES' in index
+
+    reloaded = CityIdIndex(str(path))
+    assert reloaded.get('Buenos Aires') == 3435910
+    assert len(reloaded) == 1
+
+def test_learning_the_same_id_again_does_not_write(tmp_path):
+    path = tmp_path / 'ids.jsonl'
+    index = CityIdIndex(str(path))
+    index.learn('Madrid', 3117735)
+    index.learn('madrid', '3117735')
+    index.learn('Lima', None)
+    assert path.read_text(encoding='utf8').count('\n') == 1
+
+def test_a_later_id_replaces_the_earlier_one_on_reload(tmp_path):
+    path = tmp_path / 'ids.jsonl'
+    index = CityIdIndex(str(path))
+    index.learn('Córdoba', 3860259)
+    index.learn('Córdoba', 2519240)
+    assert CityIdIndex(str(path)).get('córdoba') == 2519240
+
+def test_truncated_lines_are_skipped(tmp_path):
+    path = tmp_path / 'ids.jsonl'
+    path.write_text('["madrid", 3117735]\n["lima", 39', encoding='utf8')
+    index = CityIdIndex(str(path))
+    assert index.get('madrid') == 3117735
+    assert index.get('lima') is None
+
+def test_without_path_nothing_is_written(tmp_path):
+    index = CityIdIndex(None)
+    index.learn('Madrid', 3117735)
+    assert index.get('madrid') == 3117735
+    assert list(tmp_path.iterdir()) == []
+
+def write_city_list(path, cities):
+    with gzip.open(path, 'wt', encoding='utf8') as file:
+        json.dump([{'id': city_id, 'name': name, 'country': country} for city_id, name, country in cities], file)
+
+def test_city_list_skips_ambiguous_names_and_maps_alternatives(tmp_path):
+    city_list = tmp_path / 'city.list.json.gz'
+    write_city_list(city_list, [
+        (3117735, 'Madrid', 'ES'),
+        (3860259, 'Córdoba', 'AR'),
+        (2519240, 'Córdoba', 'ES'),
+        (3936456, 'Lima', 'PE'),
+    ])
+    index = CityIdIndex(None)
+    added = index.load_city_list(str(city_list), [['Madrid', ['Madrí']], ['Córdoba', []], ['Quito', ['San Francisco de Quito']]])
+    assert added == 2
+    assert index.get('madrí') == 3117735
+    assert index.get('córdoba') is None
+    assert index.get('quito') is None
+    assert index.get('lima') is None  # no está en la lista de nombres del bot
+
+def test_city_list_does_not_replace_learned_ids(tmp_path):
+    city_list = tmp_path / 'city.list.json'
+    city_list.write_text(json.dumps([{'id': 1, 'name': 'Madrid'}, {'id': 2, 'name': 'Lima'}]), encoding='utf8')
+    index = CityIdIndex(None)
+    index.learn('Madrid', 3117735)
+    assert index.load_city_list(str(city_list)) == 1
+    assert index.get('madrid') == 3117735
+    assert index.get('lima') == 2
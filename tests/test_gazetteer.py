@@ -0,0 +1,115 @@
+# tests/test_gazetteer.py
+
+import json
+import os
+import pytest
+from model.gazetteer import CityGazetteer, CompiledGazetteer, compile_gazetteer, read_cities
+
+CITY_FILE = os.path.join('model', 'names_of_cities.json')
+
+CITIES = [
+    ['Madrid', ['Madrid', 'Мадрид', '']],
+    ['San José', ['San Jose']],
+    ['Lima', []],
+    ['Santiago', ['Santiago de Chile']],
+    ['Santiago de Compostela', ['Santiago']],
+    ['', ['Sin nombre principal']],
+]
+
+def write_cities(path, cities):
+    with open(path, 'w') as file:
+        json.dump(cities, file, ensure_ascii=False)
+    return str(path)
+
+@pytest.fixture
+def compiled(tmp_path):
+    source = write_cities(tmp_path / 'cities.json', CITIES)
+    gazetteer = CityGazetteer.load(source, str(tmp_path / 'cities.bin'))
+    yield source, gazetteer
+    gazetteer.close()
+
+def test_compiled_lookups_match_json(compiled):
+    source, gazetteer = compiled
+    reference = CityGazetteer.from_json(source)
+    assert isinstance(gazetteer, CompiledGazetteer)
+    assert set(gazetteer.names) == set(reference.names)
+    assert len(gazetteer) == len(reference)
+    for name in reference.names:
+        assert name in gazetteer
+    for name in ('', 'madri', 'madrid ', 'santiago de', 'paris'):
+        assert (name in gazetteer) == (name in reference)
+    for text in ('clima en san josé', 'quiero ir a lima', 'hola', 'me voy a santiago de compostela', ''):
+        assert gazetteer.contains_any(text) == reference.contains_any(text)
+    assert gazetteer.max_tokens == reference.max_tokens
+
+def test_compiled_city_ids_and_names(compiled):
+    _, gazetteer = compiled
+    assert gazetteer.n_cities == len(CITIES)
+    assert gazetteer.main_name('мадрид') == 'madrid'
+    assert gazetteer.alternate_names('madrid') == ['madrid', 'мадрид']
+    assert gazetteer.city_id('san jose') == gazetteer.city_id('san josé') == 1
+    # Un nombre repetido pertenece a la primera ciudad que lo declara.
+    assert gazetteer.city_id('santiago') == 3
+    assert gazetteer.alternate_names('santiago de compostela') == ['santiago de compostela', 'santiago']
+    assert gazetteer.main_name('sin nombre principal') == 'sin nombre principal'
+    assert gazetteer.city_id('paris') is None
+    assert gazetteer.alternate_names('paris') == []
+
+def test_recompiles_when_source_changes(compiled, tmp_path):
+    source, gazetteer = compiled
+    compiled_file = str(tmp_path / 'cities.bin')
+    same = CityGazetteer.load(source, compiled_file)
+    assert same.source_hash == gazetteer.source_hash
+    same.close()
+
+    write_cities(source, CITIES + [['Quito', ['San Francisco de Quito']]])
+    updated = CityGazetteer.load(source, compiled_file)
+    try:
+        assert updated.source_hash != gazetteer.source_hash
+        assert 'san francisco de quito' in updated
+        assert updated.main_name('san francisco de quito') == 'quito'
+        # La instancia abierta antes sigue leyendo su propia copia del archivo reemplazado.
+        assert 'quito' not in gazetteer
+    finally:
+        updated.close()
+
+def test_recompiles_invalid_file(tmp_path):
+    source = write_cities(tmp_path / 'cities.json', CITIES)
+    compiled_file = tmp_path / 'cities.bin'
+    compiled_file.write_bytes(b'no es un gazetteer')
+    gazetteer = CityGazetteer.load(source, str(compiled_file))
+    try:
+        assert 'lima' in gazetteer
+    finally:
+        gazetteer.close()
+
+def test_full_city_file_round_trip(tmp_path):
+    compiled_file = str(tmp_path / 'cities.bin')
+    compile_gazetteer(CITY_FILE, compiled_file)
+    gazetteer = CompiledGazetteer(compiled_file)
+    try:
+        reference = CityGazetteer.from_json(CITY_FILE)
+        assert len(gazetteer) == len(reference)
+        # Con miles de nombres en la tabla hay colisiones de crc32; todos deben encontrarse igual.
+        assert all(name in gazetteer for name in reference.names)
+        assert set(gazetteer.names) == set(reference.names)
+        for city_names in read_cities(CITY_FILE)[:500]:
+            if city_names:
+                assert city_names[0] in gazetteer.alternate_names(city_names[-1])
+    finally:
+        gazetteer.close()
+
+@pytest.fixture(scope='module')
+def full_gazetteer():
+    return CityGazetteer.from_json(CITY_FILE)
+
+def test_contains_any_matches_short_names_inside_words(full_gazetteer):
+    # Como la búsqueda lineal original, cuenta cualquier subcadena: 'un' está en 'mundo'.
+    assert {'un', 'ba', 'po'} <= full_gazetteer.names
+    assert full_gazetteer.contains_any('qué tenperatura hace en el mundo')
+    assert not full_gazetteer.contains_any('¿qué tan fresca está la mañana en úbeda?')
+
+def test_contains_any_matches_linear_search(full_gazetteer):
+    names = list(full_gazetteer.names)
+    for text in ('¿qué temperatura hace en madrid?', '¿qué tan fresca está la mañana en úbeda?', 'hola', ''):
+        assert full_gazetteer.contains_any(text) == any(name in text for name in names), text
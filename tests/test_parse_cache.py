@@ -0,0 +1,38 @@
+# tests/test_parse_cache.py
+
+import time
+from model.chatbot import WeatherChatbot
+from model.text_correction import SpellingCorrector
+from weather_package.cache import TTLCache
+
+class SlowTool:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def check(self, text):
+        time.sleep(self.latency)
+        return []
+
+def make_bot(latency, time_budget):
+    # parse_query solo necesita el corrector, spaCy y el análisis; se reemplazan por sustitutos.
+    bot = WeatherChatbot.__new__(WeatherChatbot)
+    bot.parse_cache = TTLCache(maxsize=16)
+    bot.corrector = SpellingCorrector(SlowTool(latency), time_budget=time_budget)
+    bot.nlp = lambda text: text
+    bot.analyze_doc = lambda doc: [(doc, 0.9, 'get_temperature_response', ['madrid'])]
+    bot.analyze_texts = lambda texts, batch_size: [bot.analyze_doc(text) for text in texts]
+    return bot
+
+def test_parse_is_cached_by_normalized_text():
+    bot = make_bot(latency=0, time_budget=1)
+    first = bot.parse_query('¿Qué  temperatura hace en Madrid?')
+    assert bot.parse_query(' ¿Qué temperatura hace en Madrid?') is first
+    assert bot.parse_cache_stats()['hits'] == 1
+
+def test_parse_with_a_cut_correction_is_not_cached():
+    bot = make_bot(latency=0.5, time_budget=0.05)
+    assert bot.parse_query('¿Qué temperatura hace en Madrid?') == (
+        ('¿Qué temperatura hace en Madrid?', 0.9, 'get_temperature_response', ('madrid',)),)
+    assert len(bot.parse_cache) == 0
+    assert bot.parse_queries(['¿Y en Lima?'])
+    assert len(bot.parse_cache) == 0
@@ -0,0 +1,88 @@
+# tests/test_refresh.py
+
+import asyncio
+from weather_package.cache import TTLCache
+from weather_package.refresh import CityPopularity, RefreshAheadScheduler, RefreshLeaderLock
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeClient:
+    def __init__(self):
+        self.refreshed = []
+
+    async def refresh_many(self, keys):
+        self.refreshed.extend(keys)
+        return [{} for _ in keys]
+
+def test_scores_decay_with_half_life():
+    clock = FakeClock()
+    popularity = CityPopularity(half_life=10, timer=clock)
+    for _ in range(4):
+        popularity.record('madrid')
+    popularity.record('lima')
+    clock.now = 10
+    assert popularity.top(5, min_score=1.5) == ['madrid']
+    clock.now = 100
+    assert popularity.top(5, min_score=0.1) == []
+
+def test_zero_half_life_uses_the_minimum():
+    clock = FakeClock()
+    popularity = CityPopularity(half_life=0, timer=clock)
+    popularity.record('madrid')
+    clock.now = 0.5
+    popularity.record('madrid')
+    assert popularity.half_life == CityPopularity.MIN_HALF_LIFE
+    assert popularity.top(1) == ['madrid']
+
+def test_disabled_popularity_records_nothing():
+    popularity = CityPopularity(enabled=False)
+    popularity.record('madrid')
+    assert popularity.top(5) == []
+
+def test_only_popular_entries_about_to_expire_are_refreshed():
+    clock = FakeClock()
+    cache = TTLCache(ttl=100, timer=clock)
+    popularity = CityPopularity(half_life=1000, timer=clock)
+    for key, times in (('madrid', 3), ('lima', 3), ('quito', 1)):
+        cache.set(key, {})
+        for _ in range(times):
+            popularity.record(key)
+    cache.set('lima', {}, storage_time=50)
+    clock.now = 85
+    client = FakeClient()
+    scheduler = RefreshAheadScheduler(client, cache, popularity, top_n=10, margin=20, budget=60)
+    scheduler._allowance = 60
+    assert scheduler.due() == ['madrid']
+    assert asyncio.run(scheduler.refresh_due()) == 1
+    assert client.refreshed == ['madrid']
+
+def test_leader_lock_is_held_by_one_holder(tmp_path):
+    path = str(tmp_path / 'cache.refresh.lock')
+    first, second = RefreshLeaderLock(path), RefreshLeaderLock(path)
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+def test_scheduler_without_the_lock_does_not_refresh(tmp_path):
+    path = str(tmp_path / 'cache.refresh.lock')
+    holder = RefreshLeaderLock(path)
+    holder.acquire()
+    cache = TTLCache(ttl=100)
+    popularity = CityPopularity()
+    for _ in range(3):
+        popularity.record('madrid')
+    client = FakeClient()
+    scheduler = RefreshAheadScheduler(client, cache, popularity, budget=60, leader_lock=RefreshLeaderLock(path))
+    scheduler._allowance = 60
+    assert asyncio.run(scheduler.refresh_due()) == 0
+    assert client.refreshed == []
+    holder.release()
+    assert asyncio.run(scheduler.refresh_due()) == 1
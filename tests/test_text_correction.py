@@ -0,0 +1,111 @@
+# tests/test_text_correction.py
+
+import time
+from types import SimpleNamespace
+from model.text_correction import SpellingCorrector
+
+class FakeTool:
+    """Corrige 'tenperatura' por 'temperatura', tardando `latency` segundos por llamada."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def check(self, text):
+        self.calls += 1
+        time.sleep(self.latency)
+        offset = text.find('tenperatura')
+        if offset < 0:
+            return []
+        return [SimpleNamespace(offset=offset, errorLength=len('tenperatura'), replacements=['temperatura'])]
+
+def test_corrections_are_cached():
+    tool = FakeTool()
+    corrector = SpellingCorrector(tool)
+    assert corrector.correct('¿Qué  tenperatura hace?') == '¿Qué temperatura hace?'
+    assert corrector.correct('¿Qué tenperatura hace? ') == '¿Qué temperatura hace?'
+    assert tool.calls == 2  # una corrección y una comprobación del resultado
+    assert corrector.stats()['cache_hits'] == 1
+
+def test_known_words_skip_languagetool():
+    tool = FakeTool()
+    corrector = SpellingCorrector(tool, vocabulary=frozenset({'qué', 'temperatura', 'hace'}))
+    assert corrector.correct('¿Qué temperatura hace?') == '¿Qué temperatura hace?'
+    assert tool.calls == 0
+    assert corrector.stats()['fast_path'] == 1
+
+def test_ignored_matches_are_not_applied():
+    corrector = SpellingCorrector(FakeTool(), ignore_match=lambda match: True)
+    assert corrector.correct('tenperatura') == 'tenperatura'
+
+def test_a_slow_check_is_cut_at_the_budget():
+    tool = FakeTool(latency=1.0)
+    corrector = SpellingCorrector(tool, time_budget=0.1)
+    start = time.perf_counter()
+    assert corrector.correct('¿Qué tenperatura hace?') == '¿Qué tenperatura hace?'
+    assert time.perf_counter() - start < 0.5
+    assert corrector.stats()['budget_exceeded'] == 1
+    # Lo cortado no se guarda en caché.
+    assert corrector.stats()['cache_size'] == 0
+
+class StubbornTool:
+    """Marca siempre todo el texto con las sugerencias `replacements`, como LanguageTool ante un error sin arreglo."""
+
+    def __init__(self, replacements):
+        self.replacements = replacements
+        self.calls = 0
+
+    def check(self, text):
+        self.calls += 1
+        return [SimpleNamespace(offset=0, errorLength=len(text), replacements=self.replacements)]
+
+def test_matches_without_replacements_stop_after_one_check():
+    tool = StubbornTool([])
+    corrector = SpellingCorrector(tool)
+    assert corrector.correct_with_status('tenperatura') == ('tenperatura', True)
+    assert tool.calls == 1
+
+def test_unchanged_text_stops_after_one_check():
+    tool = StubbornTool(['tenperatura'])
+    corrector = SpellingCorrector(tool)
+    assert corrector.correct_with_status('tenperatura') == ('tenperatura', True)
+    assert tool.calls == 1
+    # El resultado completo se guarda, así que repetir el mensaje no vuelve a consultar.
+    corrector.correct('tenperatura')
+    assert tool.calls == 1
+
+def test_without_budget_slow_checks_finish():
+    corrector = SpellingCorrector(FakeTool(latency=0.05), time_budget=None)
+    assert corrector.correct('tenperatura') == 'temperatura'
+
+class SpellingTool:
+    """Marca las palabras de `corrections` como LanguageTool, con su contexto."""
+
+    def __init__(self, corrections):
+        self.corrections = corrections
+
+    def check(self, text):
+        matches = []
+        for wrong, right in self.corrections.items():
+            offset = text.find(wrong)
+            if offset >= 0:
+                matches.append(SimpleNamespace(offset=offset, errorLength=len(wrong), replacements=[right],
+                                               context=text, offsetInContext=offset))
+        return matches
+
+def city_aware_corrector(corrections):
+    from model.chatbot import WeatherChatbot
+    from model.gazetteer import CityGazetteer
+    bot = WeatherChatbot.__new__(WeatherChatbot)
+    bot.gazetteer = CityGazetteer(['un', 'ba', 'po', 'san carlos de bariloche'])
+    return SpellingCorrector(SpellingTool(corrections), ignore_match=bot._is_city_name)
+
+def test_matches_in_a_context_with_a_city_are_ignored():
+    corrector = city_aware_corrector({'tenperatura': 'temperatura'})
+    # Como en la búsqueda lineal original, basta con que el contexto contenga un nombre ('un' en 'mundo').
+    assert corrector.correct('qué tenperatura hace en el mundo') == 'qué tenperatura hace en el mundo'
+    assert corrector.correct('tenperatura en San Carlos de Bariloche') == 'tenperatura en San Carlos de Bariloche'
+
+def test_matches_in_a_context_without_cities_are_applied():
+    corrector = city_aware_corrector({'tenperatura': 'temperatura'})
+    assert corrector.correct('qué tenperatura hace hoy') == 'qué temperatura hace hoy'
@@ -0,0 +1,72 @@
+# tests/test_worker_pool.py
+
+import asyncio
+import os
+import signal
+import time
+import pytest
+from model.chatbot import ErrorResponse
+from worker_pool import ForkedWorkerPool, WorkerCrashedError
+
+class EchoBot:
+    def process_query(self, texto):
+        if texto == 'colgarse':
+            time.sleep(60)
+        if texto == 'fallar':
+            return ErrorResponse('error')
+        return texto.upper()
+
+@pytest.fixture
+def pool():
+    pool = ForkedWorkerPool(EchoBot(), workers=2, health_interval=0.1, health_timeout=1, query_timeout=0.5)
+    yield pool
+    pool.shutdown()
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+def test_queries_are_answered_by_the_workers(pool):
+    async def run():
+        return await asyncio.gather(*(pool.submit(f'consulta {index}') for index in range(10)))
+    assert asyncio.run(run()) == [f'CONSULTA {index}' for index in range(10)]
+    assert os.getpid() not in pool.worker_pids()
+
+def test_error_responses_keep_their_type(pool):
+    async def run():
+        return await asyncio.gather(pool.submit('fallar'), pool.submit('error'))
+    failed, answered = asyncio.run(run())
+    assert isinstance(failed, ErrorResponse)
+    assert answered == 'ERROR' and not isinstance(answered, ErrorResponse)
+
+def test_killed_worker_is_replaced(pool):
+    pid = pool.worker_pids()[0]
+    os.kill(pid, signal.SIGKILL)
+    assert wait_for(lambda: pool.worker_stats() == {'alive': 2, 'restarts': 1})
+    assert pid not in pool.worker_pids()
+
+    async def run():
+        return await asyncio.gather(*(pool.submit('hola') for _ in range(4)))
+    assert asyncio.run(run()) == ['HOLA'] * 4
+
+def test_query_over_the_timeout_fails_and_restarts_the_worker(pool):
+    async def run():
+        with pytest.raises(WorkerCrashedError):
+            await pool.submit('colgarse')
+        return await pool.submit('hola')
+    assert asyncio.run(run()) == 'HOLA'
+    assert pool.worker_stats()['restarts'] == 1
+
+def test_shutdown_stops_every_process(pool):
+    pids = pool.worker_pids()
+    pool.shutdown()
+    assert wait_for(lambda: not any(is_running(pid) for pid in pids))
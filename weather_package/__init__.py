@@ -1,3 +1,5 @@
 # weather_package/__init__.py
 
 from .weather import Weather
+from .async_client import AsyncWeatherClient, fetch_many_sync, warm_cache
+from .snapshot import WeatherSnapshot
@@ -0,0 +1,68 @@
+# weather_package/astronomy.py
+
+import threading
+import ephem
+import numpy as np
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class MoonAgeTable:
+    """
+    Clase MoonAgeTable, tabla precalculada de lunas nuevas para obtener la edad lunar sin ephem.
+
+    Guarda las lunas nuevas de una ventana de años y, por cada día, el índice de la
+    última luna nueva anterior a ese día, de modo que cada consulta es O(1). Las
+    fechas fuera de la ventana se calculan con `ephem.previous_new_moon`, igual que antes.
+    Las fechas se expresan como `ephem.Date` (días desde 1899/12/31 12:00 UTC).
+    """
+
+    def __init__(self, start_year=2000, end_year=2050):
+        """
+        Inicializa una instancia de MoonAgeTable. La tabla se construye al primer uso.
+
+        Parámetros:
+        - start_year (int): Primer año cubierto por la tabla.
+        - end_year (int): Año (excluido) en que termina la tabla.
+        """
+        self.start = float(ephem.Date(f'{start_year}/1/1'))
+        self.end = float(ephem.Date(f'{end_year}/1/1'))
+        self._new_moons = None
+        self._day_index = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        new_moons = [float(ephem.previous_new_moon(self.start))]
+        while new_moons[-1] < self.end:
+            new_moons.append(float(ephem.next_new_moon(new_moons[-1])))
+        new_moons = np.array(new_moons)
+        days = self.start + np.arange(int(np.ceil(self.end - self.start)) + 1)
+        self._day_index = np.searchsorted(new_moons, days, side='right') - 1
+        self._new_moons = new_moons
+        logger.info(f'Tabla de {len(new_moons)} lunas nuevas precalculada.')
+
+    def moon_age(self, date):
+        """Días transcurridos desde la luna nueva anterior a `date` (ephem.Date o float)."""
+        date = float(date)
+        if not self.start <= date < self.end:
+            return date - ephem.previous_new_moon(date)
+        if self._new_moons is None:
+            with self._lock:
+                if self._new_moons is None:
+                    self._build()
+        index = self._day_index[int(date - self.start)]
+        if self._new_moons[index + 1] <= date:
+            index += 1
+        return date - self._new_moons[index]
+
+    def moon_ages(self, dates):
+        """Versión vectorizada de moon_age para un arreglo de fechas dentro de la ventana."""
+        if self._new_moons is None:
+            with self._lock:
+                if self._new_moons is None:
+                    self._build()
+        dates = np.asarray(dates, dtype=float)
+        indexes = np.searchsorted(self._new_moons, dates, side='right') - 1
+        return dates - self._new_moons[indexes]
+
+moon_age_table = MoonAgeTable()
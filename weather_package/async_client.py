@@ -0,0 +1,306 @@
+# weather_package/async_client.py
+
+import asyncio
+import os
+import threading
+import time
+import httpx
+from .weather_api import WeatherData, CACHE_LOOKUPS, UPSTREAM_SECONDS, UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT
+from .cache import normalize_city, weather_cache_key
+from .config import Config
+from .refresh import popularity, RefreshAheadScheduler, RefreshLeaderLock
+from .city_ids import city_ids
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+def group_item_as_weather(item):
+    """
+    Adapta una ciudad de la respuesta del endpoint `group` al formato de `/weather`,
+    que trae la diferencia horaria en `timezone` y no dentro de `sys`.
+    """
+    if 'timezone' not in item and 'timezone' in item.get('sys', {}):
+        item = dict(item, timezone=item['sys']['timezone'])
+    return item
+
+class AsyncWeatherClient:
+    """
+    Clase AsyncWeatherClient para consultar OpenWeatherMap con asyncio.
+
+    Usa un único pool de conexiones (httpx.AsyncClient) con timeout por petición,
+    comparte la caché de WeatherData y agrupa las peticiones simultáneas por la
+    misma ciudad en una sola llamada a la API (singleflight).
+
+    Una instancia debe usarse siempre desde el mismo event loop.
+    """
+
+    def __init__(self, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE,
+                 timeout=Config.OW_TIMEOUT, max_connections=Config.OW_MAX_CONNECTIONS):
+        """
+        Inicializa una instancia de AsyncWeatherClient.
+
+        Parámetros:
+        - api_key (str): Clave API para OpenWeatherMap.
+        - units (str): Unidades de medida para los datos del clima ('metric' o 'imperial').
+        - language (str): Idioma para las respuestas de la API.
+        - timeout (float): Tiempo máximo en segundos de cada petición.
+        - max_connections (int): Conexiones simultáneas del pool.
+        """
+        self.api_key = api_key
+        self.units = units
+        self.language = language
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._in_flight = {}
+
+    async def fetch(self, city):
+        """
+        Obtiene los datos del clima de una ciudad.
+
+        Retorna:
+        - dict: Respuesta JSON de la API, o None si la petición falla.
+        """
+        city = normalize_city(city)
+        key = weather_cache_key(city, self.units, self.language)
+
+        storage_data = WeatherData._cache.get(key)
+        if storage_data is not None:
+            CACHE_LOOKUPS.inc('hit')
+            popularity.record(key)
+            return storage_data
+        CACHE_LOOKUPS.inc('miss')
+
+        data = await self._fetch_upstream(key)
+        if data is not None:
+            popularity.record(key)
+        return data
+
+    async def refresh_many(self, keys):
+        """
+        Versión de refresh para varias entradas: las ciudades con id conocido se piden juntas al endpoint `group`.
+
+        Retorna:
+        - list: Respuesta JSON de la API de cada clave (None si falló), en el mismo orden.
+        """
+        fetched = await self._fetch_keys(keys)
+        return [fetched[key] for key in keys]
+
+    async def refresh(self, key):
+        """
+        Vuelve a pedir a la API la entrada `key` = (ciudad, unidades, idioma) sin mirar la caché
+        y la guarda. Lo usa RefreshAheadScheduler.
+
+        Retorna:
+        - dict: Respuesta JSON de la API, o None si la petición falla.
+        """
+        return await self._fetch_upstream(key)
+
+    def _fetch_upstream(self, key):
+        future = self._in_flight.get(key)
+        if future is None:
+            city, units, language = key
+            url = WeatherData.url_for(city, self.api_key, units, language)
+            future = asyncio.ensure_future(self._request(key, url))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return asyncio.shield(future)
+
+    async def _request(self, key, url):
+        try:
+            with UPSTREAM_IN_FLIGHT.track_in_progress('async'), UPSTREAM_SECONDS.time('async'):
+                answer = await self._client.get(url)
+                answer.raise_for_status()
+                data = answer.json()
+            WeatherData._cache.set(key, data)
+            city_ids.learn(key[0], data.get('id'))
+            return data
+        except (httpx.HTTPError, ValueError) as e:
+            UPSTREAM_ERRORS.inc('async')
+            logger.error(f"Error al realizar la petición a la API: {e}")
+            return None
+
+    async def _fetch_keys(self, keys):
+        """
+        Pide a la API las claves `keys` sin mirar la caché. Las que ya están en curso se
+        comparten; las ciudades con id conocido se agrupan de a Config.GROUP_CHUNK_SIZE en
+        peticiones al endpoint `group` y el resto se pide por nombre.
+
+        Retorna:
+        - dict: Clave -> respuesta JSON de la API (None si falló).
+        """
+        futures = {}
+        groups = {}
+        for key in dict.fromkeys(keys):
+            city_id = city_ids.get(key[0]) if key not in self._in_flight else None
+            if city_id is None:
+                futures[key] = self._fetch_upstream(key)
+            else:
+                groups.setdefault(key[1:], []).append((key, city_id))
+
+        for group in groups.values():
+            if len(group) == 1:
+                key, _ = group[0]
+                futures[key] = self._fetch_upstream(key)
+                continue
+            for start in range(0, len(group), Config.GROUP_CHUNK_SIZE):
+                futures.update(self._start_group(group[start:start + Config.GROUP_CHUNK_SIZE]))
+
+        results = await asyncio.gather(*futures.values())
+        return dict(zip(futures, results))
+
+    def _start_group(self, chunk):
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for key, _ in chunk:
+            future = loop.create_future()
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+            futures[key] = future
+        asyncio.ensure_future(self._request_group(chunk, futures))
+        return {key: asyncio.shield(future) for key, future in futures.items()}
+
+    async def _request_group(self, chunk, futures):
+        """Pide las ciudades de `chunk` = [(clave, id)] en una sola petición y resuelve el future de cada una."""
+        units, language = chunk[0][0][1:]
+        url = WeatherData.group_url_for([city_id for _, city_id in chunk], self.api_key, units, language)
+        try:
+            try:
+                with UPSTREAM_IN_FLIGHT.track_in_progress('async'), UPSTREAM_SECONDS.time('async'):
+                    answer = await self._client.get(url)
+                    answer.raise_for_status()
+                    items = {item['id']: group_item_as_weather(item) for item in answer.json()['list']}
+            # Con una respuesta inválida todas las ciudades del grupo se piden por nombre.
+            except (httpx.HTTPError, ValueError, KeyError, TypeError, AttributeError) as e:
+                UPSTREAM_ERRORS.inc('async')
+                logger.error(f"Error al realizar la petición agrupada a la API: {e!r}")
+                items = {}
+
+            missing = []
+            for key, city_id in chunk:
+                data = items.get(city_id)
+                if data is None:
+                    missing.append(key)
+                    continue
+                WeatherData._cache.set(key, data)
+                futures[key].set_result(data)
+
+            # Las ciudades que la respuesta agrupada no trajo se piden por nombre.
+            if missing:
+                results = await asyncio.gather(*(self._request(key, WeatherData.url_for(key[0], self.api_key, *key[1:]))
+                                                 for key in missing))
+                for key, data in zip(missing, results):
+                    futures[key].set_result(data)
+        finally:
+            for future in futures.values():
+                if not future.done():
+                    future.set_result(None)
+
+    async def fetch_many(self, cities):
+        """
+        Obtiene los datos del clima de varias ciudades: las que no están en caché se piden
+        juntas al endpoint `group` si se conoce su id, y en paralelo por nombre si no.
+
+        Retorna:
+        - dict: Ciudad -> respuesta JSON de la API (None si la petición falló).
+        """
+        unique_cities = list(dict.fromkeys(cities))
+        results = {}
+        pending = {}
+        for city in unique_cities:
+            key = weather_cache_key(city, self.units, self.language)
+            storage_data = WeatherData._cache.get(key)
+            if storage_data is not None:
+                CACHE_LOOKUPS.inc('hit')
+                popularity.record(key)
+                results[city] = storage_data
+            else:
+                CACHE_LOOKUPS.inc('miss')
+                pending[city] = key
+
+        if pending:
+            fetched = await self._fetch_keys(list(pending.values()))
+            for city, key in pending.items():
+                results[city] = fetched[key]
+                if fetched[key] is not None:
+                    popularity.record(key)
+        return {city: results[city] for city in unique_cities}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+_loop = None
+_shared_client = None
+_scheduler = None
+_lock = threading.Lock()
+
+def _reset_after_fork():
+    # El hilo del event loop no existe en un proceso creado con fork: el hijo crea el suyo.
+    global _loop, _shared_client, _scheduler, _lock
+    _loop = None
+    _shared_client = None
+    _scheduler = None
+    _lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _get_background_client():
+    """
+    Crea (una sola vez) un event loop en un hilo propio con un AsyncWeatherClient compartido y,
+    si Config.REFRESH_AHEAD está activo, la renovación anticipada de la caché en ese mismo loop.
+    """
+    global _loop, _shared_client, _scheduler
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='weather-client', daemon=True).start()
+            _shared_client = asyncio.run_coroutine_threadsafe(_create_client(), _loop).result()
+            if Config.REFRESH_AHEAD and Config.CACHE_TTL > 0:
+                # Con la caché SQLite compartida renueva un solo proceso.
+                leader_lock = RefreshLeaderLock(f'{Config.CACHE_PATH}.refresh.lock') if Config.CACHE_BACKEND == 'sqlite' else None
+                _scheduler = RefreshAheadScheduler(_shared_client, WeatherData._cache, leader_lock=leader_lock)
+                _loop.call_soon_threadsafe(_scheduler.start)
+    return _loop, _shared_client
+
+def warm_cache(cities=None, timeout=None):
+    """
+    Carga en la caché las ciudades `cities` (por defecto Config.WARM_CITIES) que aún no están,
+    agrupadas en peticiones al endpoint `group` cuando se conoce su id.
+
+    Usa un cliente propio en un event loop temporal, en el hilo que llama, así que no inicia
+    el hilo del cliente compartido ni la renovación anticipada: se puede llamar en el proceso
+    padre antes de crear los workers con fork.
+
+    Retorna:
+    - int: Cantidad de ciudades con datos en caché.
+    """
+    cities = Config.WARM_CITIES if cities is None else cities
+    if not cities:
+        return 0
+    start = time.perf_counter()
+    results = asyncio.run(asyncio.wait_for(_fetch_with_own_client(cities), timeout))
+    loaded = sum(data is not None for data in results.values())
+    logger.info(f'Caché del clima precargada con {loaded} de {len(results)} ciudades en {time.perf_counter() - start:.2f} s.')
+    return loaded
+
+async def _fetch_with_own_client(cities):
+    async with AsyncWeatherClient() as client:
+        return await client.fetch_many(cities)
+
+async def _create_client():
+    return AsyncWeatherClient()
+
+def fetch_many_sync(cities):
+    """
+    Versión síncrona de AsyncWeatherClient.fetch_many para código que no corre en un event loop,
+    como WeatherChatbot.process_query. Todas las llamadas comparten el mismo pool de conexiones.
+    """
+    loop, client = _get_background_client()
+    return asyncio.run_coroutine_threadsafe(client.fetch_many(cities), loop).result()
@@ -0,0 +1,241 @@
+# weather_package/cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .config import Config
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_city(city):
+    """Normaliza el nombre de una ciudad: sin espacios sobrantes y en minúsculas."""
+    return ' '.join(city.split()).lower()
+
+def weather_cache_key(city, units=Config.UNITS, language=Config.LANGUAGE):
+    """Clave de caché de una consulta al clima. No incluye la clave de la API."""
+    return (normalize_city(city), units, language)
+
+class TTLCache:
+    """
+    Clase TTLCache, caché en memoria con tamaño máximo, expiración y acceso seguro entre hilos.
+
+    Al superar `maxsize` se descarta la entrada usada hace más tiempo (LRU). Las
+    entradas con más de `ttl` segundos se consideran vencidas; con `ttl=None` no vencen.
+    Lleva contadores de aciertos, fallos, expulsiones y vencimientos.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, timer=time.monotonic):
+        """
+        Inicializa una instancia de TTLCache.
+
+        Parámetros:
+        - maxsize (int): Cantidad máxima de entradas.
+        - ttl (float): Segundos de validez de cada entrada, o None para que no venzan.
+        - timer (callable): Reloj usado para medir la antigüedad de las entradas.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            storage_time, value = item
+            if self.ttl is not None and self._timer() - storage_time >= self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, storage_time=None):
+        with self._lock:
+            self._data[key] = (self._timer() if storage_time is None else storage_time, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def age(self, key):
+        """Segundos desde que se guardó `key`, o None si no está. No cuenta como acierto ni fallo."""
+        with self._lock:
+            item = self._data.get(key)
+            return None if item is None else self._timer() - item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+class SqliteCache:
+    """
+    Clase SqliteCache, caché persistente en un archivo SQLite en modo WAL.
+
+    Tiene la misma interfaz y semántica de expiración que TTLCache, pero sobrevive
+    a reinicios y la comparten todos los procesos locales que usen el mismo archivo.
+    Las lecturas pasan primero por una pequeña caché en memoria del proceso que
+    conserva la antigüedad original de cada entrada, por lo que el TTL no se alarga.
+    """
+    PRUNE_EVERY = 64
+
+    def __init__(self, path, maxsize=1024, ttl=None, memory_maxsize=256):
+        """
+        Inicializa una instancia de SqliteCache.
+
+        Parámetros:
+        - path (str): Ruta del archivo SQLite.
+        - maxsize (int): Cantidad máxima de entradas en disco.
+        - ttl (float): Segundos de validez de cada entrada, o None para que no venzan.
+        - memory_maxsize (int): Entradas de la caché en memoria del proceso.
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=memory_maxsize, ttl=ttl, timer=time.time)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS weather_cache '
+                '(key TEXT PRIMARY KEY, storage_time REAL NOT NULL, value TEXT NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS weather_cache_time ON weather_cache (storage_time)')
+        logger.info(f'Caché del clima persistente en "{path}".')
+
+    def _connection(self):
+        # Las conexiones SQLite no se pueden compartir entre hilos ni heredar en un fork.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _serialize_key(key):
+        return json.dumps(key, ensure_ascii=False)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key, default=None):
+        value = self._memory.get(key)
+        if value is not None:
+            self._count('hits')
+            return value
+
+        row = self._connection().execute(
+            'SELECT storage_time, value FROM weather_cache WHERE key = ?', (self._serialize_key(key),)
+        ).fetchone()
+        if row is None:
+            self._count('misses')
+            return default
+        storage_time, raw_value = row
+        if self.ttl is not None and time.time() - storage_time >= self.ttl:
+            self._count('expirations')
+            self._count('misses')
+            return default
+        value = json.loads(raw_value)
+        self._memory.set(key, value, storage_time)
+        self._count('hits')
+        return value
+
+    def set(self, key, value):
+        storage_time = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO weather_cache (key, storage_time, value) VALUES (?, ?, ?)',
+                (self._serialize_key(key), storage_time, json.dumps(value, ensure_ascii=False))
+            )
+        self._memory.set(key, value, storage_time)
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def age(self, key):
+        """Segundos desde que se guardó `key`, o None si no está. No cuenta como acierto ni fallo."""
+        age = self._memory.age(key)
+        if age is not None:
+            return age
+        row = self._connection().execute(
+            'SELECT storage_time FROM weather_cache WHERE key = ?', (self._serialize_key(key),)
+        ).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def prune(self):
+        """Borra del archivo las entradas vencidas y las más antiguas que excedan `maxsize`."""
+        with self._connection() as connection:
+            if self.ttl is not None:
+                connection.execute('DELETE FROM weather_cache WHERE storage_time < ?', (time.time() - self.ttl,))
+            removed = connection.execute(
+                'DELETE FROM weather_cache WHERE key IN '
+                '(SELECT key FROM weather_cache ORDER BY storage_time DESC LIMIT -1 OFFSET ?)', (self.maxsize,)
+            ).rowcount
+        with self._lock:
+            self.evictions += max(removed, 0)
+
+    def clear(self):
+        self._memory.clear()
+        with self._connection() as connection:
+            connection.execute('DELETE FROM weather_cache')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM weather_cache').fetchone()[0]
+
+    def stats(self):
+        size = len(self)
+        with self._lock:
+            return {
+                'size': size,
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+def create_weather_cache(backend=Config.CACHE_BACKEND):
+    """Crea la caché de datos del clima según `Config.CACHE_BACKEND` ('memory' o 'sqlite')."""
+    if backend == 'memory':
+        return TTLCache(maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL)
+    if backend == 'sqlite':
+        return SqliteCache(Config.CACHE_PATH, maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL)
+    raise ValueError(f"Backend de caché desconocido '{backend}', se esperaba 'memory' o 'sqlite'.")
@@ -0,0 +1,129 @@
+# weather_package/city_ids.py
+
+import gzip
+import json
+import os
+import threading
+from .cache import normalize_city
+from .config import Config
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class CityIdIndex:
+    """
+    Clase CityIdIndex que asocia nombres de ciudades con su id de OpenWeatherMap.
+
+    Con el id se pueden pedir muchas ciudades juntas al endpoint `group` de la API, sin que
+    OpenWeatherMap tenga que buscar cada nombre. Los ids salen de dos lugares:
+    - la lista de ciudades que publica OpenWeatherMap (`city.list.json.gz`), limitada a los
+      nombres de `model/names_of_cities.json`; los nombres repetidos en varios países se
+      omiten, porque no se sabe cuál elegiría la API;
+    - cada respuesta de una búsqueda por nombre (`q=`), que trae el id de la ciudad elegida.
+      Estos se agregan al archivo `path` (una línea JSON por ciudad) y valen para los
+      próximos arranques y para los demás procesos.
+    """
+
+    def __init__(self, path=Config.CITY_IDS_PATH):
+        """
+        Inicializa una instancia de CityIdIndex y carga los ids ya aprendidos de `path`.
+
+        Parámetros:
+        - path (str): Archivo JSONL con los ids aprendidos, o None para no guardarlos.
+        """
+        self.path = path
+        self._ids = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load_learned(path)
+
+    def _load_learned(self, path):
+        with open(path, encoding='utf8') as file:
+            for line in file:
+                try:
+                    name, city_id = json.loads(line)
+                except ValueError:
+                    continue  # una línea cortada por un proceso que terminó mientras escribía
+                self._ids[name] = int(city_id)
+        logger.info(f'{len(self._ids)} ids de ciudades cargados de "{path}".')
+
+    def load_city_list(self, city_list_file, cities=None):
+        """
+        Agrega los ids de la lista de ciudades de OpenWeatherMap (JSON, opcionalmente comprimido con gzip).
+
+        Parámetros:
+        - city_list_file (str): Ruta de `city.list.json` o `city.list.json.gz`.
+        - cities (list): Elementos [nombre principal, [nombres alternativos]] como los de
+          `model/names_of_cities.json`; los alternativos reciben el id del principal. Por defecto
+          se indexan todos los nombres de la lista.
+
+        Retorna:
+        - int: Cantidad de nombres agregados.
+        """
+        opener = gzip.open if city_list_file.endswith('.gz') else open
+        with opener(city_list_file, 'rt', encoding='utf8') as file:
+            listed = json.load(file)
+        ids_by_name = {}
+        for city in listed:
+            ids_by_name.setdefault(normalize_city(city['name']), set()).add(city['id'])
+        if cities is None:
+            cities = [(name, []) for name in ids_by_name]
+
+        added = 0
+        with self._lock:
+            for main_name, alternatives in cities:
+                found = ids_by_name.get(normalize_city(main_name), ())
+                if len(found) != 1:
+                    continue
+                city_id = next(iter(found))
+                for name in (main_name, *alternatives):
+                    name = normalize_city(name)
+                    if name not in self._ids:
+                        self._ids[name] = city_id
+                        added += 1
+        logger.info(f'{added} ids de ciudades agregados de "{city_list_file}".')
+        return added
+
+    def get(self, city):
+        return self._ids.get(normalize_city(city))
+
+    def learn(self, city, city_id):
+        """Guarda el id que devolvió la API para `city`, si no se conocía."""
+        if city_id is None:
+            return
+        name = normalize_city(city)
+        city_id = int(city_id)
+        with self._lock:
+            if self._ids.get(name) == city_id:
+                return
+            self._ids[name] = city_id
+            if self.path:
+                try:
+                    # Cada línea se escribe con una sola llamada en modo append, así que varios procesos pueden compartir el archivo.
+                    with open(self.path, 'a', encoding='utf8') as file:
+                        file.write(json.dumps([name, city_id], ensure_ascii=False) + '\n')
+                except OSError as e:
+                    logger.error(f'No se pudo guardar el id de "{name}" en "{self.path}": {e}')
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def __contains__(self, city):
+        return normalize_city(city) in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+def create_city_ids():
+    """Crea el índice de ids con los aprendidos y, si Config.CITY_LIST_PATH existe, con la lista de OpenWeatherMap."""
+    index = CityIdIndex(Config.CITY_IDS_PATH)
+    if Config.CITY_LIST_PATH and os.path.exists(Config.CITY_LIST_PATH):
+        cities = None
+        if os.path.exists(Config.CITY_NAMES_PATH):
+            with open(Config.CITY_NAMES_PATH, encoding='utf8') as file:
+                cities = json.load(file)
+        index.load_city_list(Config.CITY_LIST_PATH, cities)
+    return index
+
+city_ids = create_city_ids()
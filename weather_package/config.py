@@ -21,12 +21,63 @@ class Config:
     - OW_URL (str): URL base para las solicitudes a la API de OpenWeatherMap.
     - UNITS (str): Unidades de medida para los datos del clima (por defecto: 'metric').
     - LANGUAGE (str): Idioma para las respuestas de la API (por defecto: 'es').
+    - OW_TIMEOUT (float): Tiempo máximo en segundos de cada petición a la API (por defecto: 10).
+    - OW_MAX_CONNECTIONS (int): Conexiones simultáneas del pool HTTP hacia la API (por defecto: 20).
+    - CACHE_TTL (float): Segundos de validez de los datos del clima en caché (por defecto: 3600, el refresco de la API).
+    - CACHE_MAX_ENTRIES (int): Cantidad máxima de consultas guardadas en caché (por defecto: 1024).
+    - CACHE_BACKEND (str): 'memory' para una caché por proceso o 'sqlite' para una persistente y compartida (por defecto: 'memory').
+    - CACHE_PATH (str): Archivo de la caché cuando CACHE_BACKEND es 'sqlite' (por defecto: 'weather_cache.sqlite3').
+    - OW_GROUP_URL (str): URL del endpoint que devuelve varias ciudades por id en una sola petición.
+    - GROUP_CHUNK_SIZE (int): Ciudades por petición al endpoint `group` (por defecto: 20, el máximo de la API).
+    - CITY_IDS_PATH (str): Archivo donde se guardan los ids de ciudad que devuelve la API (por defecto: 'weather_city_ids.jsonl').
+    - CITY_LIST_PATH (str): Lista de ciudades de OpenWeatherMap (`city.list.json.gz`) de la que tomar ids, opcional.
+    - CITY_NAMES_PATH (str): Ciudades que reconoce el bot, para limitar los ids tomados de CITY_LIST_PATH.
+    - WARM_CITIES (list): Ciudades que se piden a la API al iniciar, separadas por coma en OW_WARM_CITIES.
+    - REFRESH_AHEAD (bool): Renueva en segundo plano las ciudades más consultadas antes de que venzan en caché (por defecto: True).
+    - REFRESH_TOP_N (int): Cantidad de ciudades más consultadas que se mantienen renovadas (por defecto: 20).
+    - REFRESH_MARGIN (float): Segundos antes del vencimiento en que se renueva una entrada (por defecto: 300).
+    - REFRESH_BUDGET (int): Peticiones por minuto a la API que puede usar la renovación (por defecto: 10).
+    - REFRESH_INTERVAL (float): Segundos entre revisiones de las entradas por vencer (por defecto: 30).
     """
 
     OW_API_KEY = os.getenv('OW_API_KEY')
 
     OW_URL = "http://api.openweathermap.org/data/2.5/weather?"
 
+    OW_GROUP_URL = "http://api.openweathermap.org/data/2.5/group?"
+
+    GROUP_CHUNK_SIZE = int(os.getenv('OW_GROUP_CHUNK_SIZE', 20))
+
+    CITY_IDS_PATH = os.getenv('OW_CITY_IDS_PATH', 'weather_city_ids.jsonl')
+
+    CITY_LIST_PATH = os.getenv('OW_CITY_LIST_PATH', 'city.list.json.gz')
+
+    CITY_NAMES_PATH = 'model/names_of_cities.json'
+
+    WARM_CITIES = [city.strip() for city in os.getenv('OW_WARM_CITIES', '').split(',') if city.strip()]
+
     UNITS = 'metric'
 
     LANGUAGE = 'es'
+
+    OW_TIMEOUT = float(os.getenv('OW_TIMEOUT', 10))
+
+    OW_MAX_CONNECTIONS = int(os.getenv('OW_MAX_CONNECTIONS', 20))
+
+    CACHE_TTL = float(os.getenv('OW_CACHE_TTL', 3600))
+
+    CACHE_MAX_ENTRIES = int(os.getenv('OW_CACHE_MAX_ENTRIES', 1024))
+
+    CACHE_BACKEND = os.getenv('OW_CACHE_BACKEND', 'memory')
+
+    CACHE_PATH = os.getenv('OW_CACHE_PATH', 'weather_cache.sqlite3')
+
+    REFRESH_AHEAD = os.getenv('OW_REFRESH_AHEAD', 'true').lower() in ('1', 'true', 'yes')
+
+    REFRESH_TOP_N = int(os.getenv('OW_REFRESH_TOP_N', 20))
+
+    REFRESH_MARGIN = float(os.getenv('OW_REFRESH_MARGIN', 300))
+
+    REFRESH_BUDGET = int(os.getenv('OW_REFRESH_BUDGET', 10))
+
+    REFRESH_INTERVAL = float(os.getenv('OW_REFRESH_INTERVAL', 30))
@@ -1,14 +1,63 @@
 # weather_package/extras_data.py
 
+import os
+import threading
+from functools import lru_cache
 import pycountry
 import ephem
 import pytz
 from datetime import datetime, timedelta
 from timezonefinder import TimezoneFinder
+from .cache import TTLCache
+from .astronomy import moon_age_table
 from log_config import get_logger
 
 logger = get_logger(__name__)
 
+_time_zone_finder = None
+_time_zone_lock = threading.Lock()
+_time_zone_cache = TTLCache(maxsize=4096)
+
+def find_time_zone_name(latitude, longitude):
+    """
+    Nombre de la zona horaria de unas coordenadas.
+
+    El TimezoneFinder (que carga los polígonos de las zonas al crearse) se crea una
+    sola vez por proceso y los resultados se recuerdan por coordenada, ya que las
+    coordenadas de una ciudad no cambian.
+    """
+    global _time_zone_finder
+    key = (latitude, longitude)
+    name = _time_zone_cache.get(key)
+    if name is not None:
+        return name
+    # TimezoneFinder lee sus archivos de datos bajo demanda y no es seguro entre hilos.
+    with _time_zone_lock:
+        if _time_zone_finder is None:
+            _time_zone_finder = TimezoneFinder()
+        name = _time_zone_finder.timezone_at(lat=latitude, lng=longitude)
+    if name is not None:
+        _time_zone_cache.set(key, name)
+    return name
+
+def _reset_after_fork():
+    # TimezoneFinder lee sus archivos con seek/read: un proceso creado con fork compartiría
+    # la posición de esos archivos con el padre, así que cada hijo crea el suyo.
+    global _time_zone_finder, _time_zone_lock
+    _time_zone_finder = None
+    _time_zone_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def warm_up():
+    """Precalcula la tabla de lunas nuevas, que los procesos creados con fork comparten."""
+    moon_age_table.moon_age(ephem.now())
+
+@lru_cache(maxsize=512)
+def country_name(country_code):
+    country = pycountry.countries.get(alpha_2=country_code)
+    return f'{country.name if country else "Desconocido"}'
+
 class TimeZone:
     def __init__(self, latitude, longitude):
         self.latitude = latitude
@@ -16,8 +65,7 @@ class TimeZone:
         self.time_zone_info = self.get_time_zone()
 
     def get_time_zone(self):
-        tf = TimezoneFinder()
-        name = tf.timezone_at(lat=self.latitude, lng=self.longitude)
+        name = find_time_zone_name(self.latitude, self.longitude)
         icon = self.determine_time_zone_icon()
         return {"name": name, "icon": icon}
 
@@ -44,9 +92,8 @@ class MoonPhase:
         self.moon_phase_info = self.get_moon_phase()
 
     def get_moon_phase(self):
-        observer = ephem.Observer()
-        observer.date = self.date.astimezone(pytz.timezone(self.time_zone))
-        moon_age = observer.date - ephem.previous_new_moon(observer.date)
+        date = ephem.Date(self.date.astimezone(pytz.timezone(self.time_zone)))
+        moon_age = moon_age_table.moon_age(date)
         return self.determine_moon_phase(moon_age)
 
     def determine_moon_phase(self, moon_age):
@@ -87,6 +134,7 @@ class ExtrasData:
         self.sunset = data['sys']['sunset']
         self.country = data['sys']['country']
         self.dt = data['dt']
+        self._season = None
 
     @property
     def get_daylight_hours(self):
@@ -125,21 +173,25 @@ class ExtrasData:
             else:
                 return {"hemisphere": "Sur", "name": "Verano", "icon": "☀️"}
 
+    @property
+    def season(self):
+        if self._season is None:
+            self._season = self.determine_season()
+        return self._season
+
     @property
     def get_hemisphere(self):
-        return f"{self.determine_season()['hemisphere']}"
+        return f"{self.season['hemisphere']}"
     @property
     def get_season_name(self):
-        return f"{self.determine_season()['name']}"
+        return f"{self.season['name']}"
     @property
     def get_season_icon(self):
-        return self.determine_season()['icon']
+        return self.season['icon']
 
     @property
     def get_country_name(self):
-        country_code = self.country
-        country = pycountry.countries.get(alpha_2=country_code)
-        return f'{country.name if country else "Desconocido"}'
+        return country_name(self.country)
 
     @property
     def get_temperature_range(self):
@@ -0,0 +1,211 @@
+# weather_package/refresh.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from .config import Config
+from log_config import get_logger
+from metrics import Counter
+
+logger = get_logger(__name__)
+
+REFRESH_AHEAD = Counter('weather_refresh_ahead_total', 'Renovaciones anticipadas de la caché del clima por resultado '
+                        '(refreshed, failed, over_budget).', ('result',))
+
+class CityPopularity:
+    """
+    Clase CityPopularity que cuenta cuántas veces se pide cada ciudad.
+
+    Cada pedido suma 1 a la ciudad y los puntajes se reducen a la mitad cada `half_life`
+    segundos (como mínimo MIN_HALF_LIFE), así que una ciudad deja de ser popular cuando ya
+    nadie la pide. Con `enabled=False` no se registra nada. Se puede usar desde varios hilos.
+    """
+    MIN_HALF_LIFE = 1.0
+
+    def __init__(self, half_life=Config.CACHE_TTL, timer=time.monotonic, enabled=True):
+        self.half_life = max(half_life, self.MIN_HALF_LIFE)
+        self.enabled = enabled
+        self._timer = timer
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score, updated, now):
+        return score * math.pow(0.5, (now - updated) / self.half_life)
+
+    def record(self, key):
+        """Registra un pedido de `key` (clave de caché del clima)."""
+        if not self.enabled:
+            return
+        now = self._timer()
+        with self._lock:
+            score, updated = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated, now) + 1, now)
+
+    def top(self, n, min_score=0.0):
+        """
+        Retorna:
+        - list: Las `n` claves con mayor puntaje (de mayor a menor), solo las que llegan a `min_score`.
+        """
+        now = self._timer()
+        with self._lock:
+            scores = {key: self._decayed(score, updated, now) for key, (score, updated) in self._scores.items()}
+            # Las claves que ya casi no suman se olvidan, para que el diccionario no crezca sin límite.
+            for key in [key for key, score in scores.items() if score < 0.05]:
+                del self._scores[key]
+        ranked = sorted((key for key, score in scores.items() if score >= min_score), key=scores.get, reverse=True)
+        return ranked[:n]
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+# Sin caché (OW_CACHE_TTL=0) o sin renovación anticipada no hay nada que renovar ni que contar.
+popularity = CityPopularity(enabled=Config.REFRESH_AHEAD and Config.CACHE_TTL > 0)
+
+class RefreshLeaderLock:
+    """
+    Clase RefreshLeaderLock, cerrojo de archivo (flock) para que un solo proceso renueve
+    una caché compartida.
+
+    Con OW_CACHE_BACKEND=sqlite todos los procesos ven las mismas entradas; si cada uno las
+    renovara gastaría su propio presupuesto en las mismas claves. El primero que toma el
+    cerrojo lo conserva mientras viva y, si termina, lo toma otro en la siguiente revisión.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._pid = None
+
+    def acquire(self):
+        """Toma el cerrojo si está libre. Retorna True si este proceso lo tiene."""
+        if self._file is not None and self._pid == os.getpid():
+            return True
+        import fcntl
+        file = open(self.path, 'a')
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+        self._file = file
+        self._pid = os.getpid()
+        return True
+
+    def release(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._pid = None
+
+class RefreshAheadScheduler:
+    """
+    Clase RefreshAheadScheduler que mantiene renovadas en caché las ciudades más pedidas.
+
+    Cada `interval` segundos toma las `top_n` ciudades de `popularity` y vuelve a pedir a la
+    API las que vencen en menos de `margin` segundos (o ya no están en caché), de modo que
+    quien las consulta nunca espera a OpenWeatherMap. Las renovaciones no superan `budget`
+    peticiones por minuto; las que no entran se dejan para la próxima revisión. Cada ciudad
+    cuenta como una petición, aunque varias viajen juntas al endpoint `group`.
+
+    El presupuesto es de cada proceso. Con una caché compartida entre procesos se indica un
+    `leader_lock` y solo renueva el proceso que lo tiene, con las ciudades populares que él
+    mismo recibió.
+
+    Corre como una tarea en el event loop de `client` (ver async_client.fetch_many_sync).
+    """
+    MIN_SCORE = 2.0  # una ciudad pedida una sola vez no se renueva
+
+    def __init__(self, client, cache, popularity=popularity, top_n=Config.REFRESH_TOP_N, margin=Config.REFRESH_MARGIN,
+                 budget=Config.REFRESH_BUDGET, interval=Config.REFRESH_INTERVAL, leader_lock=None):
+        """
+        Inicializa una instancia de RefreshAheadScheduler.
+
+        Parámetros:
+        - client (AsyncWeatherClient): Cliente con el que se renuevan las entradas.
+        - cache (TTLCache | SqliteCache): Caché del clima; su `ttl` define cuándo vence cada entrada.
+        - popularity (CityPopularity): Pedidos por ciudad.
+        - top_n (int): Cantidad de ciudades populares a mantener.
+        - margin (float): Segundos antes del vencimiento en que se renueva una entrada.
+        - budget (int): Peticiones por minuto como máximo.
+        - interval (float): Segundos entre revisiones.
+        - leader_lock (RefreshLeaderLock): Si se indica, solo se renueva mientras este proceso lo tenga.
+        """
+        self.client = client
+        self.cache = cache
+        self.popularity = popularity
+        self.top_n = top_n
+        self.margin = margin
+        self.budget = budget
+        self.interval = interval
+        self.leader_lock = leader_lock
+        self._allowance = 0.0
+        self._allowance_updated = time.monotonic()
+        self._task = None
+
+    def due(self):
+        """Claves populares que vencen en menos de `margin` segundos, de la más a la menos pedida."""
+        if self.cache.ttl is None:
+            return []
+        due = []
+        for key in self.popularity.top(self.top_n, self.MIN_SCORE):
+            age = self.cache.age(key)
+            if age is None or age >= self.cache.ttl - self.margin:
+                due.append(key)
+        return due
+
+    def _take_allowance(self, wanted):
+        now = time.monotonic()
+        # Como mucho se acumula el presupuesto de un minuto.
+        self._allowance = min(float(self.budget), self._allowance + (now - self._allowance_updated) * self.budget / 60)
+        self._allowance_updated = now
+        granted = min(wanted, int(self._allowance))
+        self._allowance -= granted
+        return granted
+
+    async def refresh_due(self):
+        """
+        Renueva las entradas por vencer que permite el presupuesto.
+
+        Retorna:
+        - int: Cantidad de entradas renovadas.
+        """
+        if self.leader_lock is not None and not self.leader_lock.acquire():
+            return 0
+        due = self.due()
+        if not due:
+            return 0
+        granted = self._take_allowance(len(due))
+        if granted < len(due):
+            REFRESH_AHEAD.inc('over_budget', amount=len(due) - granted)
+            logger.warning(f'Renovación anticipada: {len(due) - granted} ciudades quedan fuera del presupuesto de {self.budget} peticiones por minuto.')
+        results = await self.client.refresh_many(due[:granted])
+        refreshed = sum(data is not None for data in results)
+        REFRESH_AHEAD.inc('refreshed', amount=refreshed)
+        REFRESH_AHEAD.inc('failed', amount=len(results) - refreshed)
+        return refreshed
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                logger.error(f'Error en la renovación anticipada de la caché del clima: {e}')
+
+    def start(self):
+        """Inicia la tarea de renovación en el event loop actual."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+            logger.info(f'Renovación anticipada de la caché del clima: {self.top_n} ciudades, '
+                        f'{self.margin:g} s antes de vencer, {self.budget} peticiones por minuto como máximo.')
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.leader_lock is not None:
+            self.leader_lock.release()
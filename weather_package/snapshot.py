@@ -0,0 +1,226 @@
+# weather_package/snapshot.py
+
+import datetime
+from .weather_api import format_weather_icon, format_wind_direction
+from .extra_data import ExtrasData, TimeZone, MoonPhase
+
+_MISSING = object()
+
+def _dig(data, *path):
+    try:
+        for key in path:
+            data = data[key]
+        return data
+    except (KeyError, IndexError):
+        return _MISSING
+
+class WeatherSnapshot:
+    """
+    Clase WeatherSnapshot, vista inmutable y compacta de una respuesta de OpenWeatherMap.
+
+    Lee una sola vez los campos que usan las respuestas y comparte el diccionario
+    original (normalmente el de la caché) sin copiarlo. La zona horaria, la fase
+    lunar y los datos extra solo se calculan si la respuesta pedida los necesita.
+    Las respuestas `get_*_response` son idénticas a las de Weather.
+    """
+    __slots__ = (
+        'data', 'name', 'lon', 'lat', 'description', 'icon', 'temperature', 'feels_like',
+        'temperature_min', 'temperature_max', 'pressure', 'humidity', 'visibility',
+        'wind_speed', 'wind_deg', 'cloudiness', 'sunrise', 'sunset', 'time_zone_offset',
+        '_extras', '_time_zone', '_moon_phase',
+    )
+
+    def __init__(self, data):
+        """
+        Inicializa una instancia de WeatherSnapshot.
+
+        Parámetros:
+        - data (dict): Respuesta JSON de la API de OpenWeatherMap.
+        """
+        weather = _dig(data, 'weather', 0)
+        main = data.get('main', {})
+        wind = data.get('wind', {})
+        system = data.get('sys', {})
+        coord = data.get('coord', {})
+        fields = {
+            'data': data,
+            'name': data.get('name', _MISSING),
+            'lon': coord.get('lon', _MISSING),
+            'lat': coord.get('lat', _MISSING),
+            'description': _dig(weather, 'description') if weather is not _MISSING else _MISSING,
+            'icon': _dig(weather, 'icon') if weather is not _MISSING else _MISSING,
+            'temperature': main.get('temp', _MISSING),
+            'feels_like': main.get('feels_like', _MISSING),
+            'temperature_min': main.get('temp_min', _MISSING),
+            'temperature_max': main.get('temp_max', _MISSING),
+            'pressure': main.get('pressure', _MISSING),
+            'humidity': main.get('humidity', _MISSING),
+            'visibility': data.get('visibility', 0),
+            'wind_speed': wind.get('speed', _MISSING),
+            'wind_deg': wind.get('deg', _MISSING),
+            'cloudiness': data.get('clouds', {}).get('all', _MISSING),
+            'sunrise': system.get('sunrise', _MISSING),
+            'sunset': system.get('sunset', _MISSING),
+            'time_zone_offset': data.get('timezone', _MISSING),
+            '_extras': None,
+            '_time_zone': None,
+            '_moon_phase': None,
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"WeatherSnapshot es inmutable, no se puede asignar '{name}'.")
+
+    @property
+    def extras_data(self):
+        if self._extras is None:
+            object.__setattr__(self, '_extras', ExtrasData(self.data))
+        return self._extras
+
+    @property
+    def time_zone(self):
+        if self._time_zone is None:
+            object.__setattr__(self, '_time_zone', TimeZone(self.data['coord']['lat'], self.data['coord']['lon']))
+        return self._time_zone
+
+    @property
+    def moon_phase(self):
+        if self._moon_phase is None:
+            dt = datetime.datetime.fromtimestamp(self.data['dt'])
+            object.__setattr__(self, '_moon_phase', MoonPhase(dt, self.time_zone.get_time_zone_name))
+        return self._moon_phase
+
+    @staticmethod
+    def _format(value, template, error):
+        return error if value is _MISSING else template.format(value)
+
+    @property
+    def get_city_name(self):
+        return self._format(self.name, "{}", "Error: Nombre no encontrado en el objeto JSON.")
+
+    @property
+    def get_coordinates(self):
+        if self.lon is _MISSING or self.lat is _MISSING:
+            return "Error: Coordenadas no encontradas en el objeto JSON."
+        return f"Longitud {self.lon}, Latitud {self.lat}"
+
+    @property
+    def get_weather_description(self):
+        return self._format(self.description, "{}", "Error: Descripción del clima no encontrada en el objeto JSON.")
+
+    @property
+    def get_weather_icon(self):
+        if self.icon is _MISSING:
+            return "Error: Icono del clima no encontrada en el objeto JSON."
+        return format_weather_icon(self.icon)
+
+    @property
+    def get_temperature(self):
+        return self._format(self.temperature, "{}°C", "Error: Temperatura no encontrada en el objeto JSON.")
+
+    @property
+    def get_feels_like(self):
+        return self._format(self.feels_like, "{}°C", "Error: Sensación térmica no encontrada en el objeto JSON.")
+
+    @property
+    def get_temperature_min(self):
+        return self._format(self.temperature_min, "{}°C", "Error: Temperatura mínima no encontrada en el objeto JSON.")
+
+    @property
+    def get_temperature_max(self):
+        return self._format(self.temperature_max, "{}°C", "Error: Temperatura máxima no encontrada en el objeto JSON.")
+
+    @property
+    def get_pressure(self):
+        return self._format(self.pressure, "{} hPa", "Error: Presión no encontrada en el objeto JSON.")
+
+    @property
+    def get_humidity(self):
+        return self._format(self.humidity, "{}%", "Error: Humedad no encontrada en el objeto JSON.")
+
+    @property
+    def get_visibility(self):
+        return f"{self.visibility} metros"
+
+    @property
+    def get_wind_speed(self):
+        return self._format(self.wind_speed, "{} metros/seg", "Error: Velocidad del viento no encontrada en el objeto JSON.")
+
+    @property
+    def get_wind_direction(self):
+        if self.wind_deg is _MISSING:
+            return "Error: Dirección del viento no encontrada en el objeto JSON."
+        return format_wind_direction(self.wind_deg)
+
+    @property
+    def get_cloudiness(self):
+        return self._format(self.cloudiness, "{}%", "Error: Nubosidad no encontrada en el objeto JSON.")
+
+    @property
+    def get_sunrise_time(self):
+        if self.sunrise is _MISSING:
+            return "Error: Hora de salida del sol no encontrada en el objeto JSON."
+        return datetime.datetime.fromtimestamp(self.sunrise).strftime('%H:%M:%S')
+
+    @property
+    def get_sunset_time(self):
+        if self.sunset is _MISSING:
+            return "Error: Hora de puesta del sol no encontrada en el objeto JSON."
+        return datetime.datetime.fromtimestamp(self.sunset).strftime('%H:%M:%S')
+
+    @property
+    def get_time_zone(self):
+        return self._format(self.time_zone_offset, "{} UTC", "Error: Zona horaria no encontrada en el objeto JSON.")
+
+    @property
+    def get_temperature_response(self):
+        return (
+            f"Estado Actual en {self.get_city_name}, {self.extras_data.get_country_name}:\n"
+            f" - Temperatura: {self.get_temperature} (Min: {self.get_temperature_min}, Max: {self.get_temperature_max})\n"
+            f" - Sensación Térmica: {self.get_feels_like}\n"
+            f" - Amplitud Térmica: {self.extras_data.get_temperature_range}"
+        )
+
+    @property
+    def get_weather_condition_response(self):
+        return (
+            f"{self.get_weather_icon}\n"
+            f"Clima Actual en {self.get_city_name}, {self.extras_data.get_country_name}:\n"
+            f" - Estado: {self.get_weather_description}\n"
+            f" - Presión Atmosférica: {self.get_pressure}\n"
+            f" - Humedad: {self.get_humidity}\n"
+            f" - Visibilidad: {self.get_visibility}\n"
+            f" - Viento: {self.get_wind_speed} en dirección {self.get_wind_direction}\n"
+            f" - Nubosidad: {self.get_cloudiness}"
+        )
+
+    @property
+    def get_day_night_response(self):
+        return (
+            f"{self.get_weather_icon}\n"
+            f"Horario Solar en {self.get_city_name}, {self.extras_data.get_country_name}:\n"
+            f" - Salida del Sol: {self.get_sunrise_time} Hs\n"
+            f" - Puesta del Sol: {self.get_sunset_time} Hs\n"
+            f" - Horas de Luz: {self.extras_data.get_daylight_hours} Hs\n"
+            f" - Horas de Oscuridad: {self.extras_data.get_night_hours} Hs"
+        )
+
+    @property
+    def get_moon_seasons_response(self):
+        return (
+            f"{self.extras_data.get_season_icon} | {self.moon_phase.get_moon_phase_icon}\n"
+            f"Detalles Astronómicos en {self.get_city_name}, {self.extras_data.get_country_name}:\n"
+            f" - Hemisferio: {self.extras_data.get_hemisphere}\n"
+            f" - Estación del Año: {self.extras_data.get_season_name}\n"
+            f" - Fase Lunar: {self.moon_phase.get_moon_phase_name}"
+        )
+
+    @property
+    def get_geolocation_response(self):
+        return (
+            f"{self.time_zone.get_time_zone_icon}\n"
+            f"Geolocalización de {self.get_city_name}, {self.extras_data.get_country_name}:\n"
+            f" - Coordenadas: {self.get_coordinates}\n"
+            f" - Zona Horaria: {self.time_zone.get_time_zone_name}, {self.get_time_zone}"
+        )
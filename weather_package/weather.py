@@ -9,8 +9,8 @@ from log_config import get_logger
 logger = get_logger(__name__)
 
 class Weather(WeatherData):
-    def __init__(self, city, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE):
-        super().__init__(city, api_key, units, language)
+    def __init__(self, city, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE, data=None):
+        super().__init__(city, api_key, units, language, data)
         
         latitude = self.data['coord']['lat']
         longitude = self.data['coord']['lon']
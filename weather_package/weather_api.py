@@ -1,20 +1,58 @@
 # weather_package/weather_api.py
 
+import os
 import requests
 from .config import Config
+from .cache import create_weather_cache, normalize_city, weather_cache_key
+from .refresh import popularity
+from .city_ids import city_ids
 from datetime import datetime
-import time
 from log_config import get_logger
+from metrics import Counter, Gauge, Histogram
 
 logger = get_logger(__name__)
 
+CACHE_LOOKUPS = Counter('weather_cache_lookups_total', 'Consultas a la caché del clima por resultado (hit/miss).', ('result',))
+UPSTREAM_SECONDS = Histogram('weather_upstream_request_seconds', 'Duración de las peticiones a OpenWeatherMap.', ('client',))
+UPSTREAM_ERRORS = Counter('weather_upstream_errors_total', 'Peticiones a OpenWeatherMap fallidas.', ('client',))
+UPSTREAM_IN_FLIGHT = Gauge('weather_upstream_in_flight', 'Peticiones a OpenWeatherMap en curso.', ('client',))
+
+WEATHER_ICONS = {
+    "01d": "☀️🌞", "01n": "🌕✨", "02d": "⛅🌤️", "02n": "🌑☁️", "03d": "☁️🌥️",
+    "03n": "☁️🌙", "04d": "☁️🌧️", "04n": "☁️☁️", "09d": "🌧️💧", "09n": "🌧️🌒",
+    "10d": "🌦️☔", "10n": "🌧️🌜", "11d": "⛈️🌩️", "11n": "⛈️🌌", "13d": "❄️🌨️",
+    "13n": "❄️🌛", "50d": "🌫️🌁", "50n": "🌫️🌒"
+}
+
+WIND_DIRECTIONS = {
+    "N": "⬆️", "NNE": "⬆️↗️", "NE": "↗️", "ENE": "➡️↗️",
+    "E": "➡️", "ESE": "➡️↘️", "SE": "↘️", "SSE": "⬇️↘️",
+    "S": "⬇️", "SSW": "⬇️↙️", "SW": "↙️", "WSW": "⬅️↙️",
+    "W": "⬅️", "WNW": "⬅️↖️", "NW": "↖️", "NNW": "⬆️↖️"
+}
+WIND_CARDINALS = tuple(WIND_DIRECTIONS)
+
+def format_weather_icon(icon_code):
+    if icon_code in WEATHER_ICONS:
+        icons = WEATHER_ICONS[icon_code]
+        return f"{icons[0]} {icons[1]}"
+    return "Icono del clima no encontrado."
+
+def format_wind_direction(grados):
+    indice = int((grados + 11.25) / 22.5) % 16
+    direccion_cardinal = WIND_CARDINALS[indice]
+    emoji = WIND_DIRECTIONS[direccion_cardinal]
+    return f"{grados}° {direccion_cardinal} {emoji}"
+
 class WeatherData:
     """
     Clase WeatherData para interactuar con la API de OpenWeatherMap.
     Permite obtener y procesar datos del clima para una ciudad específica.
     """
-    _cache = {}    
-    def __init__(self, city, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE):
+    _cache = create_weather_cache()
+    _session = None
+
+    def __init__(self, city, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE, data=None):
         """
         Inicializa una instancia de WeatherData.
 
@@ -23,12 +61,13 @@ class WeatherData:
         - api_key (str): Clave API para OpenWeatherMap.
         - units (str): Unidades de medida para los datos del clima ('metric' o 'imperial').
         - language (str): Idioma para las respuestas de la API.
-        """        
-        self.city = city
+        - data (dict): Respuesta de la API ya obtenida (por ejemplo con AsyncWeatherClient); si se indica no se hace la petición.
+        """
+        self.city = normalize_city(city)
         self.api_key = api_key
         self.units = units
         self.language = language
-        self.data = self.get_climate()
+        self.data = data if data is not None else self.get_climate()
 
     def build_url(self):
         """
@@ -37,22 +76,57 @@ class WeatherData:
         Retorna:
         - str: URL construida para realizar la solicitud a la API.
         """
-        return f"{Config.OW_URL}appid={self.api_key}&q={self.city}&units={self.units}&lang={self.language}"
+        return self.url_for(self.city, self.api_key, self.units, self.language)
+
+    @staticmethod
+    def url_for(city, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE):
+        return f"{Config.OW_URL}appid={api_key}&q={city}&units={units}&lang={language}"
+
+    @staticmethod
+    def group_url_for(city_ids, api_key=Config.OW_API_KEY, units=Config.UNITS, language=Config.LANGUAGE):
+        """URL del endpoint `group`, que devuelve el clima de hasta 20 ciudades por id en una sola petición."""
+        ids = ','.join(str(city_id) for city_id in city_ids)
+        return f"{Config.OW_GROUP_URL}appid={api_key}&id={ids}&units={units}&lang={language}"
+
+    @classmethod
+    def get_session(cls):
+        """Devuelve la sesión HTTP compartida, que reutiliza conexiones (keep-alive) entre peticiones."""
+        if cls._session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=Config.OW_MAX_CONNECTIONS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            cls._session = session
+        return cls._session
+
+    def cache_key(self):
+        return weather_cache_key(self.city, self.units, self.language)
+
+    @classmethod
+    def cache_stats(cls):
+        return cls._cache.stats()
 
     def get_climate(self):
-        url = self.build_url()
+        key = self.cache_key()
 
-        if url in WeatherData._cache:
-            storage_time, storage_data = WeatherData._cache[url]
-            if time.time() - storage_time < 3600:  # 3600 segundos = 1 hora (tiempo de refresco de la API)
-                return storage_data
+        storage_data = WeatherData._cache.get(key)
+        if storage_data is not None:
+            CACHE_LOOKUPS.inc('hit')
+            popularity.record(key)
+            return storage_data
+        CACHE_LOOKUPS.inc('miss')
 
         try:
-            answer = requests.get(url)
-            answer.raise_for_status()
-            WeatherData._cache[url] = (time.time(), answer.json())
-            return answer.json()
+            with UPSTREAM_IN_FLIGHT.track_in_progress('sync'), UPSTREAM_SECONDS.time('sync'):
+                answer = self.get_session().get(self.build_url(), timeout=Config.OW_TIMEOUT)
+                answer.raise_for_status()
+                data = answer.json()
+            WeatherData._cache.set(key, data)
+            popularity.record(key)
+            city_ids.learn(self.city, data.get('id'))
+            return data
         except requests.RequestException as e:
+            UPSTREAM_ERRORS.inc('sync')
             logger.error(f"Error al realizar la petición a la API: {e}")
             return None
     
@@ -79,19 +153,8 @@ class WeatherData:
             return "Error: Descripción del clima no encontrada en el objeto JSON."
     @property
     def get_weather_icon(self):
-        weatherIcons = {
-            "01d": "☀️🌞", "01n": "🌕✨", "02d": "⛅🌤️", "02n": "🌑☁️", "03d": "☁️🌥️",
-            "03n": "☁️🌙", "04d": "☁️🌧️", "04n": "☁️☁️", "09d": "🌧️💧", "09n": "🌧️🌒",
-            "10d": "🌦️☔", "10n": "🌧️🌜", "11d": "⛈️🌩️", "11n": "⛈️🌌", "13d": "❄️🌨️",
-            "13n": "❄️🌛", "50d": "🌫️🌁", "50n": "🌫️🌒"
-        }
-        try:
-            icon_code = self.data['weather'][0]['icon']
-            if icon_code in weatherIcons:
-                icons = weatherIcons[icon_code]
-                return f"{icons[0]} {icons[1]}"
-            else:
-                return "Icono del clima no encontrado."
+        try:
+            return format_weather_icon(self.data['weather'][0]['icon'])
         except (KeyError, IndexError):
             return "Error: Icono del clima no encontrada en el objeto JSON."
     @property
@@ -157,18 +220,8 @@ class WeatherData:
             return "Error: Velocidad del viento no encontrada en el objeto JSON."
     @property
     def get_wind_direction(self):
-        direcciones = {
-            "N": "⬆️", "NNE": "⬆️↗️", "NE": "↗️", "ENE": "➡️↗️", 
-            "E": "➡️", "ESE": "➡️↘️", "SE": "↘️", "SSE": "⬇️↘️",
-            "S": "⬇️", "SSW": "⬇️↙️", "SW": "↙️", "WSW": "⬅️↙️",
-            "W": "⬅️", "WNW": "⬅️↖️", "NW": "↖️", "NNW": "⬆️↖️"
-        }
-        try:
-            grados = self.data['wind']['deg']
-            indice = int((grados + 11.25) / 22.5) % 16
-            direccion_cardinal = list(direcciones)[indice]
-            emoji = direcciones[direccion_cardinal]
-            return f"{grados}° {direccion_cardinal} {emoji}"
+        try:
+            return format_wind_direction(self.data['wind']['deg'])
         except KeyError:
             return "Error: Dirección del viento no encontrada en el objeto JSON."
     @property
@@ -243,3 +296,9 @@ class WeatherData:
             return f"{self.data['cod']}"
         except KeyError:
             return "Error: Código de respuesta no encontrado en el objeto JSON."
+
+def _reset_after_fork():
+    # Las conexiones abiertas de la sesión no deben compartirse con un proceso creado con fork.
+    WeatherData._session = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
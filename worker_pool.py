@@ -0,0 +1,374 @@
+# worker_pool.py
+
+import asyncio
+import gc
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+from log_config import get_logger
+from metrics import Counter, Gauge
+
+logger = get_logger(__name__)
+
+WORKER_RESTARTS = Counter('bot_worker_restarts_total', 'Workers reiniciados por el pool, por motivo.', ('reason',))
+WORKERS_ALIVE = Gauge('bot_workers_alive', 'Workers del pool en funcionamiento.')
+
+_forked_bot = None
+
+def _worker_main(connection, worker_id):
+    """Bucle de cada proceso hijo: recibe (tipo, id, texto) y responde (tipo, id, resultado)."""
+    logger.info(f'Worker {worker_id} iniciado (pid {os.getpid()}).')
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        kind, job_id, payload = message
+        if kind == 'ping':
+            connection.send(('pong', job_id, None))
+            continue
+        try:
+            connection.send(('result', job_id, _forked_bot.process_query(payload)))
+        except Exception as e:
+            connection.send(('error', job_id, f'{type(e).__name__}: {e}'))
+    connection.close()
+
+def _fork_server_main(control):
+    """
+    Bucle del proceso que crea los workers (fork server).
+
+    Recibe por `control` el id de un worker y el descriptor de su extremo del pipe, crea el
+    worker con fork y responde su pid. Se crea antes de que el proceso padre inicie hilos, así
+    que tiene uno solo y ningún lock tomado (logging, httpx, sqlite) que un worker pueda heredar.
+    """
+    # Los workers que terminan se recogen solos, sin quedar como procesos zombis.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while True:
+        try:
+            worker_id = control.recv()
+            if worker_id is None:
+                break
+            fd = reduction.recv_handle(control)
+        except (EOFError, OSError):
+            break
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            code = 0
+            try:
+                _worker_main(Connection(fd), worker_id)
+            except BaseException:
+                code = 1
+            os._exit(code)
+        os.close(fd)
+        control.send(pid)
+
+class _ForkedProcess:
+    """Worker creado por el fork server: no es hijo del pool, así que se lo sigue por su pid."""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def is_alive(self):
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def kill(self):
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def join(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_alive() and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+
+class WorkerCrashedError(Exception):
+    """Se lanza cuando el worker que procesaba una consulta terminó o fue reiniciado."""
+
+class _Worker:
+    """Estado de un proceso hijo visto desde el proceso padre."""
+
+    def __init__(self, worker_id, process, connection):
+        self.worker_id = worker_id
+        self.process = process
+        self.connection = connection
+        self.reader = None
+        self.send_lock = threading.Lock()
+        self.job = None            # (id, future) de la consulta en curso
+        self.job_started = None
+        self.ping_sent = None
+        self.last_seen = time.monotonic()
+        self.retired = False
+
+    def send(self, message):
+        with self.send_lock:
+            self.connection.send(message)
+
+class ForkedWorkerPool:
+    """
+    Clase ForkedWorkerPool, pool de procesos creados con fork a partir de un chatbot ya cargado.
+
+    El proceso padre carga los modelos una vez (spaCy, clasificador, índice de ciudades) y
+    luego crea `workers` procesos con fork, que comparten esas estructuras de solo lectura
+    copy-on-write en lugar de cargar cada uno su copia. Antes de hacer fork se congela el
+    recolector de basura (`gc.freeze`) para que no toque las páginas compartidas.
+
+    Los workers no se crean desde el padre, que después tiene hilos (event loop, lectores de
+    los pipes, supervisor, métricas, cliente del clima) y podría tener un lock tomado justo al
+    hacer fork, sino desde un fork server: un proceso que se crea con fork antes de iniciar
+    ningún hilo y solo crea workers, tanto los iniciales como los que los reemplazan.
+
+    Cada consulta se envía al primer worker libre. Un hilo supervisor comprueba cada
+    `health_interval` segundos que los workers sigan vivos, que los libres respondan a un
+    ping en `health_timeout` segundos y que ninguna consulta tarde más de `query_timeout`;
+    si no, termina el worker y pide otro al fork server. La consulta que estaba
+    procesando falla con WorkerCrashedError.
+    """
+
+    def __init__(self, bot, workers=2, health_interval=5.0, health_timeout=10.0, query_timeout=60.0):
+        """
+        Inicializa una instancia de ForkedWorkerPool y crea los workers.
+
+        Parámetros:
+        - bot (WeatherChatbot): Chatbot ya cargado en el proceso padre.
+        - workers (int): Cantidad de procesos hijos.
+        - health_interval (float): Segundos entre comprobaciones de salud.
+        - health_timeout (float): Segundos que un worker libre tiene para responder un ping.
+        - query_timeout (float): Segundos máximos de una consulta antes de reiniciar el worker.
+        """
+        global _forked_bot
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError('ForkedWorkerPool necesita un sistema operativo con fork.')
+        _forked_bot = bot
+        self.workers = max(1, workers)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.query_timeout = query_timeout
+        self.restarts = 0
+        self._context = multiprocessing.get_context('fork')
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._loop = None
+        self._idle = None
+        self._pool = []
+        self._spawn_lock = threading.Lock()
+
+        gc.collect()
+        gc.freeze()
+        other_threads = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+        if other_threads:
+            logger.warning(f'Hilos activos al crear el fork server: {", ".join(other_threads)}; '
+                           f'los workers podrían heredar un lock tomado.')
+        self._fork_server_connection, child_control = self._context.Pipe()
+        self._fork_server = self._context.Process(target=_fork_server_main, args=(child_control,),
+                                                  name='bot-fork-server', daemon=True)
+        self._fork_server.start()
+        child_control.close()
+        for worker_id in range(self.workers):
+            self._pool.append(self._spawn(worker_id))
+        WORKERS_ALIVE.set(len(self._pool))
+        self._monitor = threading.Thread(target=self._monitor_loop, name='worker-monitor', daemon=True)
+        self._monitor.start()
+        logger.info(f'{self.workers} workers creados con fork a partir del proceso {self._fork_server.pid}.')
+
+    def _spawn(self, worker_id):
+        parent_connection, child_connection = self._context.Pipe()
+        try:
+            with self._spawn_lock:
+                self._fork_server_connection.send(worker_id)
+                reduction.send_handle(self._fork_server_connection, child_connection.fileno(), self._fork_server.pid)
+                pid = self._fork_server_connection.recv()
+        except (EOFError, OSError) as e:
+            parent_connection.close()
+            raise RuntimeError(f'El fork server (pid {self._fork_server.pid}) no pudo crear el worker {worker_id}: {e}')
+        finally:
+            child_connection.close()
+        worker = _Worker(worker_id, _ForkedProcess(pid), parent_connection)
+        worker.reader = threading.Thread(target=self._read_loop, args=(worker,), name=f'worker-reader-{worker_id}', daemon=True)
+        worker.reader.start()
+        return worker
+
+    @property
+    def alive(self):
+        return sum(worker.process.is_alive() for worker in self._pool)
+
+    def worker_pids(self):
+        """Pids de los workers actuales, en el orden del pool."""
+        with self._lock:
+            return [worker.process.pid for worker in self._pool]
+
+    def worker_stats(self):
+        return {'alive': self.alive, 'restarts': self.restarts}
+
+    def _ensure_loop(self):
+        if self._idle is None:
+            self._loop = asyncio.get_running_loop()
+            self._idle = asyncio.Queue()
+            for worker in self._pool:
+                self._idle.put_nowait(worker)
+
+    async def submit(self, texto):
+        """Procesa `texto` en el primer worker libre y devuelve la respuesta del chatbot."""
+        self._ensure_loop()
+        while True:
+            worker = await self._idle.get()
+            if not worker.retired:
+                break
+        job_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.job = (job_id, future)
+        worker.job_started = time.monotonic()
+        try:
+            worker.send(('query', job_id, texto))
+            return await future
+        except (OSError, ValueError) as e:
+            raise WorkerCrashedError(f'No se pudo enviar la consulta al worker {worker.worker_id}: {e}')
+        finally:
+            worker.job = None
+            worker.job_started = None
+            if not worker.retired:
+                self._idle.put_nowait(worker)
+
+    def _resolve(self, worker, job_id, result=None, error=None):
+        job = worker.job
+        if job is None or job[0] != job_id:
+            return
+        future = job[1]
+
+        def resolve():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        self._loop.call_soon_threadsafe(resolve)
+
+    def _read_loop(self, worker):
+        """Hilo del padre que recibe las respuestas de un worker."""
+        while True:
+            try:
+                kind, job_id, payload = worker.connection.recv()
+            except (EOFError, OSError):
+                break
+            worker.last_seen = time.monotonic()
+            if kind == 'pong':
+                worker.ping_sent = None
+            elif kind == 'result':
+                self._resolve(worker, job_id, result=payload)
+            elif kind == 'error':
+                self._resolve(worker, job_id, error=RuntimeError(payload))
+        if worker.job is not None:
+            self._resolve(worker, worker.job[0], error=WorkerCrashedError(f'El worker {worker.worker_id} terminó.'))
+        if not worker.retired and not self._closed.is_set():
+            self._replace(worker, 'exited')
+
+    def _replace(self, worker, reason):
+        with self._lock:
+            if worker.retired or self._closed.is_set():
+                return
+            try:
+                self._pool[self._pool.index(worker)] = self._restart(worker, reason)
+            except RuntimeError as e:
+                logger.error(f'No se pudo reemplazar el worker {worker.worker_id}: {e}')
+            WORKERS_ALIVE.set(self.alive)
+
+    def _health_problem(self, worker, now):
+        if not worker.process.is_alive():
+            return 'exited'
+        if worker.job_started is not None:
+            if now - worker.job_started > self.query_timeout:
+                return 'query_timeout'
+        elif worker.ping_sent is not None and now - max(worker.ping_sent, worker.last_seen) > self.health_timeout:
+            return 'unresponsive'
+        return None
+
+    def check_health(self):
+        """Comprueba cada worker, reinicia los que fallaron y envía ping a los libres."""
+        now = time.monotonic()
+        with self._lock:
+            for index, worker in enumerate(self._pool):
+                if self._closed.is_set():
+                    return
+                reason = self._health_problem(worker, now)
+                if reason is not None:
+                    self._pool[index] = self._restart(worker, reason)
+                elif worker.job_started is None and worker.ping_sent is None:
+                    worker.ping_sent = now
+                    try:
+                        worker.send(('ping', 0, None))
+                    except (OSError, ValueError):
+                        pass
+            WORKERS_ALIVE.set(self.alive)
+
+    def _restart(self, worker, reason):
+        logger.warning(f'Reiniciando worker {worker.worker_id} (pid {worker.process.pid}): {reason}.')
+        WORKER_RESTARTS.inc(reason)
+        self.restarts += 1
+        worker.retired = True
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        self._close_connection(worker)
+        if worker.job is not None:
+            self._resolve(worker, worker.job[0], error=WorkerCrashedError(f'El worker {worker.worker_id} fue reiniciado ({reason}).'))
+        replacement = self._spawn(worker.worker_id)
+        if self._idle is not None:
+            self._loop.call_soon_threadsafe(self._idle.put_nowait, replacement)
+        return replacement
+
+    @staticmethod
+    def _close_connection(worker):
+        # Con el worker terminado el lector recibe EOF; se espera a que salga de recv antes de cerrar.
+        if worker.reader is not None and worker.reader is not threading.current_thread():
+            worker.reader.join(timeout=5)
+        worker.connection.close()
+
+    def _monitor_loop(self):
+        while not self._closed.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f'Error al comprobar la salud de los workers: {e}')
+
+    def shutdown(self, wait=True):
+        """Detiene el supervisor y termina los workers."""
+        self._closed.set()
+        with self._lock:
+            for worker in self._pool:
+                worker.retired = True
+                try:
+                    worker.send(None)
+                except (OSError, ValueError):
+                    pass
+            for worker in self._pool:
+                worker.process.join(timeout=5 if wait else 0)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(timeout=5)
+                self._close_connection(worker)
+            WORKERS_ALIVE.set(0)
+        try:
+            self._fork_server_connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self._fork_server.join(timeout=5 if wait else 0)
+        if self._fork_server.is_alive():
+            self._fork_server.kill()
+        self._fork_server_connection.close()
+        gc.unfreeze()